@@ -1,3 +1,4 @@
 from gym_hanabi.envs.hanabi_env import HanabiEnv
 from gym_hanabi.envs.hanabi_self_env import HanabiSelfEnv
 from gym_hanabi.envs.hanabi_ai_env import HanabiAiEnv
+from gym_hanabi.envs.hanabi_vec_env import HanabiVecEnv
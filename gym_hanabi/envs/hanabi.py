@@ -1,6 +1,10 @@
 import collections
+import copy
+import random as py_random
 import termcolor
 
+from gym_hanabi.envs import hanabi_config
+
 ################################################################################
 # Types
 ################################################################################
@@ -13,9 +17,14 @@ DiscardMove = collections.namedtuple('DiscardMove', ['index'])
 PlayMove = collections.namedtuple('PlayMove', ['index'])
 
 class Hand(object):
-    def __init__(self, cards, info):
+    def __init__(self, cards, info, possible=None):
         self.cards = cards
         self.info = info
+        # possible[i] is a bitmask of the cards (see `card_to_int`) that the
+        # card in slot i could be, given every hint the holder has received.
+        # Unlike info, it also records negative information (e.g. "this card
+        # is not red"). A missing card has no possible cards.
+        self.possible = possible if possible is not None else []
 
     def __eq__(self, other):
         return self.cards == other.cards and self.info == other.info
@@ -26,17 +35,234 @@ class Hand(object):
     def __repr__(self):
         return str(self)
 
+# The result of `GameState.play_move`. It records which parts of the game
+# state a move touched, so that anything derived from the game state can be
+# updated without recomputing it from scratch.
+MoveResult = collections.namedtuple(
+    "MoveResult",
+    [
+        "player",  # int, the player who made the move
+        "move",    # the move
+        "target",  # int, the player whose hand changed
+        "card",    # the removed Card, or None for information moves
+        "info",    # the removed card's Information, or None
+        "played",  # bool, whether the removed card was added to the piles
+    ])
+
+# What `GameState.undo` needs to revert a move, on top of its MoveResult.
+UndoRecord = collections.namedtuple(
+    "UndoRecord",
+    [
+        "result",         # MoveResult
+        "num_tokens",     # int, before the move
+        "num_fuses",      # int, before the move
+        "num_turns_left", # int, before the move
+        "last_move",      # the player's previous last move
+        "target_info",    # the target's info before an information move
+        "target_possible",# the target's possible before an information move
+        "possible",       # the removed card's possible cards, or None
+        "hashes",         # the common and deck hashes and the target's hand
+                          # hashes before the move
+    ])
+
 Observation = collections.namedtuple(
     "Observation",
     [
         "num_tokens",      # int
         "num_fuses",       # int
         "discarded_cards", # cards list
-        "played_cards",    # {color -> int}
+        "played_cards",    # {color -> int}, without colors with nothing played
         "your_info",       # Information list
         "players"          # Hand list
     ])
 
+################################################################################
+# Integer Encoding
+################################################################################
+# A card is encoded as the small int `color * num_numbers + (number - 1)`,
+# where `color` is the card's index in `config.colors`. A missing card (i.e.
+# None) is encoded as NO_CARD.
+NO_CARD = -1
+
+# Information is encoded as a pair of small ints, a color index and a number
+# index (i.e. number - 1). An unknown color or number is encoded as UNKNOWN.
+UNKNOWN = -1
+
+# Move ids are laid out exactly like `NestedSpaces.moves()`: first the color
+# information moves, then the number information moves, then the discards, and
+# finally the plays. `move_tables` maps every move id to one of these kinds.
+INFORM_COLOR = 0
+INFORM_NUMBER = 1
+DISCARD = 2
+PLAY = 3
+
+def card_to_int(config, card):
+    if card is None:
+        return NO_CARD
+    num_numbers = len(config.card_counts)
+    return config.colors.index(card.color) * num_numbers + (card.number - 1)
+
+def int_to_card(config, c):
+    if c == NO_CARD:
+        return None
+    num_numbers = len(config.card_counts)
+    return Card(config.colors[c // num_numbers], c % num_numbers + 1)
+
+def int_to_information(config, color, number):
+    return Information(config.colors[color] if color != UNKNOWN else None,
+                       number + 1 if number != UNKNOWN else None)
+
+def new_deck(config):
+    """
+    Returns an unshuffled deck of card ints in the same order that `GameState`
+    builds its deck, so that shuffling both with identically seeded random
+    generators produces the same game.
+    """
+    num_numbers = len(config.card_counts)
+    return [color * num_numbers + (number - 1)
+                for color in range(len(config.colors))
+                for number, count in enumerate(config.card_counts, 1)
+                for _ in range(count)]
+
+def card_masks(config):
+    """
+    Returns a triple (all_cards, color_masks, number_masks) of bitmasks over
+    card ints. `all_cards` has a bit for every card, `color_masks[color]` has
+    a bit for every card of that color, and `number_masks[number]` has a bit
+    for every card with that number.
+    """
+    num_numbers = len(config.card_counts)
+    all_cards = (1 << (len(config.colors) * num_numbers)) - 1
+    color_masks = {}
+    for i, color in enumerate(config.colors):
+        color_masks[color] = ((1 << num_numbers) - 1) << (i * num_numbers)
+    number_masks = {}
+    for number in range(1, num_numbers + 1):
+        number_masks[number] = sum(1 << (i * num_numbers + number - 1)
+                                   for i in range(len(config.colors)))
+    return all_cards, color_masks, number_masks
+
+# Per-config card lookup tables shared by every GameState. See card_tables.
+CardTables = collections.namedtuple(
+    "CardTables",
+    [
+        "card_ints",      # {Card -> card int}
+        "all_cards_mask", # see card_masks
+        "color_masks",    # see card_masks
+        "number_masks",   # see card_masks
+        "zobrist",        # see zobrist_keys
+    ])
+
+# config key -> CardTables.
+CARD_TABLES = {}
+
+def card_tables(config):
+    key = hanabi_config.config_key(config)
+    tables = CARD_TABLES.get(key)
+    if tables is None:
+        num_cards = len(config.colors) * len(config.card_counts)
+        card_ints = {int_to_card(config, c): c for c in range(num_cards)}
+        tables = CardTables(card_ints, *card_masks(config),
+                            zobrist=zobrist_keys(config))
+        CARD_TABLES[key] = tables
+    return tables
+
+# Random 64-bit keys for Zobrist hashing a GameState (see GameState.zobrist_hash).
+# Every list is indexed by the value of a piece of state, e.g.
+# `tokens[num_tokens]` or `hand_cards[player][slot][card int + 1]`.
+ZobristKeys = collections.namedtuple(
+    "ZobristKeys",
+    [
+        "tokens",
+        "fuses",
+        "turns_left",     # indexed by num_turns_left + 1
+        "player_turn",
+        "deck_size",
+        "played",         # [color][height]
+        "discarded",      # [card int][count]
+        "deck",           # [position][card int]
+        "hand_cards",     # [player][slot][card int + 1]
+        "hand_info",      # [player][slot][info], with info an Information
+                          # or None
+        "hand_possible",  # [player][slot], odd multipliers for possible masks
+        "color_ints",     # {color -> index}
+    ])
+
+MASK64 = (1 << 64) - 1
+
+def zobrist_keys(config, seed=0):
+    """
+    Returns the ZobristKeys of `config`. The keys are always the same for the
+    same config and seed, so hashes are comparable across processes.
+    """
+    random = py_random.Random(seed)
+    keys = lambda n: [random.getrandbits(64) for _ in range(n)]
+    num_numbers = len(config.card_counts)
+    num_cards = len(config.colors) * num_numbers
+    deck_size = sum(config.card_counts) * len(config.colors)
+    infos = [None] + [Information(color, number)
+                          for color in [None] + config.colors
+                          for number in [None] + list(range(1, num_numbers + 1))]
+    hand = range(config.hand_size)
+    players = range(config.num_players)
+    return ZobristKeys(
+        tokens=keys(config.max_tokens + 1),
+        fuses=keys(config.max_fuses + 1),
+        turns_left=keys(config.num_turns_after_last_deal + 2),
+        player_turn=keys(config.num_players),
+        deck_size=keys(deck_size + 1),
+        played=[keys(num_numbers + 1) for _ in config.colors],
+        discarded=[keys(config.card_counts[c % num_numbers] + 1)
+                       for c in range(num_cards)],
+        deck=[keys(num_cards) for _ in range(deck_size)],
+        hand_cards=[[keys(num_cards + 1) for _ in hand] for _ in players],
+        hand_info=[[dict(zip(infos, keys(len(infos)))) for _ in hand]
+                       for _ in players],
+        hand_possible=[[k | 1 for k in keys(config.hand_size)]
+                           for _ in players],
+        color_ints={c: i for i, c in enumerate(config.colors)})
+
+def move_tables(config):
+    """
+    Returns a pair of lists (kinds, args) indexed by move id. For information
+    moves, args is a (player, color or number index) pair; for discards and
+    plays, it is (0, card index).
+    """
+    num_colors = len(config.colors)
+    num_numbers = len(config.card_counts)
+    kinds = []
+    args = []
+    for p in range(config.num_players - 1):
+        for color in range(num_colors):
+            kinds.append(INFORM_COLOR)
+            args.append((p, color))
+    for p in range(config.num_players - 1):
+        for number in range(num_numbers):
+            kinds.append(INFORM_NUMBER)
+            args.append((p, number))
+    for kind in [DISCARD, PLAY]:
+        for i in range(config.hand_size):
+            kinds.append(kind)
+            args.append((0, i))
+    return kinds, args
+
+def move_to_id(config, move):
+    num_colors = len(config.colors)
+    num_numbers = len(config.card_counts)
+    num_informs = config.num_players - 1
+    if isinstance(move, InformColorMove):
+        return num_colors * move.player + config.colors.index(move.color)
+    elif isinstance(move, InformNumberMove):
+        return (num_colors * num_informs + num_numbers * move.player +
+                move.number - 1)
+    elif isinstance(move, DiscardMove):
+        return (num_colors + num_numbers) * num_informs + move.index
+    elif isinstance(move, PlayMove):
+        return ((num_colors + num_numbers) * num_informs + config.hand_size +
+                move.index)
+    else:
+        raise ValueError("Unexpected move {}.".format(move))
+
 ################################################################################
 # Helper Functions
 ################################################################################
@@ -67,35 +293,269 @@ def render_infos(infos):
 # Game Logic
 ################################################################################
 class GameState(object):
-    def __init__(self, config, random):
+    def __init__(self, config, random, deck=None):
+        """
+        Starts a new game. If `deck` (a list of Cards whose top is the last
+        card) is given, the game is dealt from a copy of it; otherwise, a new
+        deck is shuffled with `random`.
+        """
         assert config.num_turns_after_last_deal >= config.num_players
         assert config.num_players >= 2
 
         self.config = config
         self.random = random
-
-        self.num_tokens = config.max_tokens
-        self.num_fuses = config.max_fuses
+        self.set_card_tables(card_tables(config))
+        self.deck = []
         self.discarded_cards = []
         self.played_cards = collections.defaultdict(int)
+        self.last_moves = [None] * config.num_players
+        self.undo_log = []
+
+        # discard_counts[c] is the number of discarded cards with card int c,
+        # so that the discard pile never has to be recounted.
+        self.discard_counts = [0] * len(self.card_ints)
+        self.players = [Hand([], [], []) for _ in range(config.num_players)]
+        self.reset(deck)
+
+    def reset(self, deck=None):
+        """
+        Starts a new game of the same config in place, like `__init__` but
+        reusing the game's deck, piles, hands and logs instead of allocating
+        new ones. Anything that holds on to parts of the game (e.g. the
+        players of an observation) sees the new game.
+        """
+        config = self.config
+        self.num_tokens = config.max_tokens
+        self.num_fuses = config.max_fuses
+        del self.discarded_cards[:]
+        self.played_cards.clear()
         self.num_turns_left = -1
         self.player_turn = 0
-        self.last_moves = [None] * config.num_players
+        self.last_moves[:] = [None] * config.num_players
+        del self.undo_log[:]
+        self.discard_counts[:] = [0] * len(self.discard_counts)
 
         # Shuffle the deck.
-        self.deck = [card for color in config.colors
-                          for number, count in enumerate(config.card_counts, 1)
-                          for card in [Card(color, number)] * count]
-        random.shuffle(self.deck)
-
-        # Deal to the players.
-        assert len(self.deck) >= config.num_players * config.hand_size
-        self.players = []
-        for _ in range(config.num_players):
-            player = Hand([], [])
-            player.cards = [self.deck.pop() for _ in range(config.hand_size)]
-            player.info = [Information(None, None) for _ in range(config.hand_size)]
-            self.players.append(player)
+        if deck is not None:
+            self.deck[:] = deck
+        else:
+            self.deck[:] = [card for color in config.colors
+                                 for number, count in enumerate(config.card_counts, 1)
+                                 for card in [Card(color, number)] * count]
+            self.random.shuffle(self.deck)
+
+        # Deal to the players. Cards are dealt from the top of the deck,
+        # which is its last card.
+        hand_size = config.hand_size
+        assert len(self.deck) >= config.num_players * hand_size
+        for player in self.players:
+            player.cards[:] = self.deck[:-hand_size - 1:-1]
+            del self.deck[-hand_size:]
+            player.info[:] = [Information(None, None)] * hand_size
+            player.possible[:] = [self.all_cards_mask] * hand_size
+        self.invalidate_hashes()
+
+    def __deepcopy__(self, memo):
+        # The card tables are immutable and shared by every game of a config,
+        # so copies share them too.
+        for table in (self.card_tables,) + tuple(self.card_tables):
+            memo[id(table)] = table
+        other = GameState.__new__(GameState)
+        memo[id(self)] = other
+        for name, value in self.__dict__.items():
+            setattr(other, name, copy.deepcopy(value, memo))
+        return other
+
+    def set_card_tables(self, tables):
+        self.card_tables = tables
+        self.card_ints = tables.card_ints
+        self.all_cards_mask = tables.all_cards_mask
+        self.color_masks = tables.color_masks
+        self.number_masks = tables.number_masks
+        self.zobrist = tables.zobrist
+
+    ############################################################################
+    # Zobrist Hashing
+    ############################################################################
+    # The hash of a game is the XOR of random keys, one per piece of state
+    # (see ZobristKeys), split into parts that moves update separately:
+    #   - common_hash: tokens, fuses, turns left, player turn, deck size, and
+    #     the played and discarded cards;
+    #   - deck_hash: the order of the cards in the deck;
+    #   - cards_hashes[p]: the cards in player p's hand, slot by slot; and
+    #   - info_hashes[p]: player p's info and possible cards, slot by slot.
+    # Hashes are computed the first time they are asked for, so games that
+    # are never hashed pay almost nothing for them. From then on, moves update
+    # the common and deck hashes in place and invalidate the hashes of the one
+    # hand they change, which is rehashed (in hand size lookups) the next time
+    # a hash is asked for. Last moves are not hashed.
+    def scalars_hash(self):
+        z = self.zobrist
+        return (z.tokens[self.num_tokens] ^
+                z.fuses[self.num_fuses] ^
+                z.turns_left[self.num_turns_left + 1] ^
+                z.player_turn[self.player_turn])
+
+    def hand_cards_hash(self, player_index):
+        keys = self.zobrist.hand_cards[player_index]
+        card_ints = self.card_ints
+        h = 0
+        for slot, card in enumerate(self.players[player_index].cards):
+            h ^= keys[slot][0 if card is None else card_ints[card] + 1]
+        return h
+
+    def hand_info_hash(self, player_index):
+        z = self.zobrist
+        info_keys = z.hand_info[player_index]
+        possible_keys = z.hand_possible[player_index]
+        player = self.players[player_index]
+        h = 0
+        for keys, possible_key, info, possible in zip(
+                info_keys, possible_keys, player.info, player.possible):
+            h ^= keys[info] ^ (((possible + 1) * possible_key) & MASK64)
+        return h
+
+    def invalidate_hashes(self):
+        self.common_hash = None
+        self.deck_hash = None
+        self.cards_hashes = [None] * len(self.players)
+        self.info_hashes = [None] * len(self.players)
+
+    def rehash(self):
+        """
+        Recomputes every hash from scratch.
+        """
+        self.invalidate_hashes()
+        self.update_hashes()
+
+    def update_hashes(self):
+        """
+        Computes the hashes that are missing.
+        """
+        for p in range(len(self.players)):
+            if self.cards_hashes[p] is None:
+                self.cards_hashes[p] = self.hand_cards_hash(p)
+            if self.info_hashes[p] is None:
+                self.info_hashes[p] = self.hand_info_hash(p)
+        if self.common_hash is not None:
+            return
+
+        z = self.zobrist
+        h = self.scalars_hash() ^ z.deck_size[len(self.deck)]
+        for i, color in enumerate(self.config.colors):
+            h ^= z.played[i][self.played_cards.get(color, 0)]
+        for c, count in enumerate(self.discard_counts):
+            h ^= z.discarded[c][count]
+        self.common_hash = h
+
+        deck_hash = 0
+        for position, card in enumerate(self.deck):
+            deck_hash ^= z.deck[position][self.card_ints[card]]
+        self.deck_hash = deck_hash
+
+    def zobrist_hash(self):
+        """
+        Returns a 64-bit hash of the full state of the game.
+        """
+        self.update_hashes()
+        h = self.common_hash ^ self.deck_hash
+        for cards_hash, info_hash in zip(self.cards_hashes, self.info_hashes):
+            h ^= cards_hash ^ info_hash
+        return h
+
+    def info_set_hash(self, player_index):
+        """
+        Returns a 64-bit hash of what `player_index` knows about the game:
+        everything but their own cards and the order of the deck. Two states
+        that the player can't tell apart have the same info set hash.
+        """
+        self.update_hashes()
+        h = self.common_hash
+        for p, (cards_hash, info_hash) in enumerate(zip(self.cards_hashes,
+                                                        self.info_hashes)):
+            h ^= info_hash
+            if p != player_index:
+                h ^= cards_hash
+        return h
+
+    def add_discard(self, card):
+        c = self.card_ints[card]
+        keys = self.zobrist.discarded[c]
+        count = self.discard_counts[c]
+        if self.common_hash is not None:
+            self.common_hash ^= keys[count] ^ keys[count + 1]
+        self.discard_counts[c] = count + 1
+
+    def snapshot(self):
+        """
+        Returns an opaque, immutable snapshot of the state of the game, which
+        `restore` can later restore any number of times. Unlike
+        `copy.deepcopy`, a snapshot only copies the small pieces of mutable
+        state (i.e. the deck, the hands, and the discarded and played cards);
+        it doesn't copy the config or the random number generator.
+        """
+        return (
+            self.num_tokens,
+            self.num_fuses,
+            self.num_turns_left,
+            self.player_turn,
+            tuple(self.deck),
+            tuple(self.discarded_cards),
+            tuple(self.discard_counts),
+            tuple(self.played_cards.items()),
+            tuple(self.last_moves),
+            tuple((tuple(player.cards), tuple(player.info),
+                   tuple(player.possible))
+                      for player in self.players),
+        )
+
+    def restore(self, snapshot):
+        """
+        Restores the state of the game from a `snapshot` of this game (or of
+        a game with the same config), reusing the existing lists. The undo
+        log is cleared.
+        """
+        (self.num_tokens,
+         self.num_fuses,
+         self.num_turns_left,
+         self.player_turn,
+         deck,
+         discarded_cards,
+         discard_counts,
+         played_cards,
+         last_moves,
+         players) = snapshot
+        self.deck[:] = deck
+        self.discarded_cards[:] = discarded_cards
+        self.discard_counts[:] = discard_counts
+        self.played_cards.clear()
+        self.played_cards.update(played_cards)
+        self.last_moves[:] = last_moves
+        for player, (cards, info, possible) in zip(self.players, players):
+            player.cards[:] = cards
+            player.info[:] = info
+            player.possible[:] = possible
+        del self.undo_log[:]
+        self.invalidate_hashes()
+
+    def clone(self):
+        """
+        Returns a copy of this game that shares its config and random number
+        generator.
+        """
+        other = GameState.__new__(GameState)
+        other.config = self.config
+        other.random = self.random
+        other.set_card_tables(self.card_tables)
+        other.deck = []
+        other.discarded_cards = []
+        other.discard_counts = [0] * len(self.discard_counts)
+        other.played_cards = collections.defaultdict(int)
+        other.last_moves = []
+        other.undo_log = []
+        other.players = [Hand([], []) for _ in self.players]
+        other.restore(self.snapshot())
+        return other
 
     def get_current_cards(self):
         return self.players[self.player_turn].cards
@@ -110,66 +570,173 @@ class GameState(object):
         if index >= len(who.cards):
             raise ValueError("Cannot remove non-existent card.")
         card = who.cards.pop(index)
-        who.info.pop(index)
+        info = who.info.pop(index)
+        who.possible.pop(index)
         if card is None:
             raise ValueError("Cannot remove non-existent card.")
-        return card
+        return card, info
 
     def deal_card(self, who):
         if len(self.deck) == 0:
             who.cards.append(None)
             who.info.append(None)
+            who.possible.append(0)
         else:
-            who.cards.append(self.deck.pop())
+            card = self.deck.pop()
+            if self.common_hash is not None:
+                deck_size = len(self.deck)
+                z = self.zobrist
+                self.deck_hash ^= z.deck[deck_size][self.card_ints[card]]
+                self.common_hash ^= (z.deck_size[deck_size + 1] ^
+                                     z.deck_size[deck_size])
+            who.cards.append(card)
             who.info.append(Information(None, None))
+            who.possible.append(self.all_cards_mask)
 
     def play_information_move(self, who, move):
         if self.num_tokens == 0:
             raise ValueError("No more information tokens left.")
 
+        if isinstance(move, InformColorMove):
+            mask = self.color_masks[move.color]
+        else:
+            assert isinstance(move, InformNumberMove)
+            mask = self.number_masks[move.number]
+
         for i, card in enumerate(who.cards):
             if card is None:
                 continue
             if isinstance(move, InformColorMove):
-                if card.color == move.color:
+                matches = card.color == move.color
+                if matches:
                     who.info[i] = who.info[i]._replace(color=card.color)
             else:
-                assert isinstance(move, InformNumberMove)
-                if card.number == move.number:
+                matches = card.number == move.number
+                if matches:
                     who.info[i] = who.info[i]._replace(number=card.number)
 
+            # A card that the hint doesn't point at can't be any of the cards
+            # the hint is about.
+            if matches:
+                who.possible[i] &= mask
+            else:
+                who.possible[i] &= ~mask
+
         self.num_tokens -= 1
 
-    def play_move(self, move):
+    def playable_mask(self):
+        """
+        Returns a bitmask of the cards that can currently be played.
+        """
+        num_numbers = len(self.config.card_counts)
+        mask = 0
+        for i, color in enumerate(self.config.colors):
+            height = self.played_cards.get(color, 0)
+            if height < num_numbers:
+                mask |= 1 << (i * num_numbers + height)
+        return mask
+
+    def legal_moves(self):
+        """
+        Returns the moves that the current player can play without
+        `play_move` raising a ValueError, in the order of `move_tables`.
+        """
+        c = self.config
+        moves = []
+        if self.num_tokens > 0:
+            num_numbers = len(c.card_counts)
+            moves += [InformColorMove(color, p)
+                          for p in range(c.num_players - 1)
+                          for color in c.colors]
+            moves += [InformNumberMove(number, p)
+                          for p in range(c.num_players - 1)
+                          for number in range(1, num_numbers + 1)]
+        cards = self.get_current_cards()
+        indexes = [i for i, card in enumerate(cards) if card is not None]
+        moves += [DiscardMove(i) for i in indexes]
+        moves += [PlayMove(i) for i in indexes]
+        return moves
+
+    def play_move(self, move, record_undo=False):
+        """
+        Plays `move` for the current player and returns a MoveResult. If
+        `record_undo` is true, an undo record is pushed onto `undo_log` so
+        that `undo` can revert the move. Nothing is recorded for a move that
+        raises a ValueError.
+        """
         assert self.num_turns_left != 0
 
         # Record the move.
+        hashing = self.common_hash is not None
+        if hashing:
+            scalars_hash = self.scalars_hash()
+        if record_undo:
+            num_tokens = self.num_tokens
+            num_fuses = self.num_fuses
+            num_turns_left = self.num_turns_left
+            last_move = self.last_moves[self.player_turn]
+            target_info = None
+            target_possible = None
+            possible = None
+            hashes = (self.common_hash, self.deck_hash)
         self.last_moves[self.player_turn] = move
 
         # Play the move.
+        target = self.player_turn
+        card = None
+        info = None
+        played = False
         if isinstance(move, InformColorMove) or isinstance(move, InformNumberMove):
             assert 0 <= move.player < len(self.players), move
             players = self.players[self.player_turn + 1:] + self.players[:self.player_turn]
             who = players[move.player]
+            target = (self.player_turn + 1 + move.player) % self.config.num_players
+            if record_undo:
+                target_info = tuple(who.info)
+                target_possible = tuple(who.possible)
+                hashes += (self.cards_hashes[target], self.info_hashes[target])
             self.play_information_move(who, move)
+            self.info_hashes[target] = None
         elif isinstance(move, DiscardMove):
             who = self.players[self.player_turn]
-            card = self.remove_card(who, move.index)
+            if record_undo and move.index < len(who.possible):
+                possible = who.possible[move.index]
+            card, info = self.remove_card(who, move.index)
             self.discarded_cards.append(card)
+            self.add_discard(card)
             if self.num_tokens < self.config.max_tokens:
                 self.num_tokens += 1
             self.deal_card(who)
         elif isinstance(move, PlayMove):
             who = self.players[self.player_turn]
-            card = self.remove_card(who, move.index)
-            if card.number == self.played_cards[card.color] + 1:
+            if record_undo and move.index < len(who.possible):
+                possible = who.possible[move.index]
+            card, info = self.remove_card(who, move.index)
+            if card.number == self.played_cards.get(card.color, 0) + 1:
+                if hashing:
+                    z = self.zobrist
+                    keys = z.played[z.color_ints[card.color]]
+                    self.common_hash ^= keys[card.number - 1] ^ keys[card.number]
                 self.played_cards[card.color] += 1
+                played = True
             else:
                 self.num_fuses -= 1
                 self.discarded_cards.append(card)
+                self.add_discard(card)
             self.deal_card(who)
         else:
             raise ValueError("Unexpected move {}.".format(move))
+        if card is not None:
+            if record_undo:
+                hashes += (self.cards_hashes[target], self.info_hashes[target])
+            self.cards_hashes[target] = None
+            self.info_hashes[target] = None
+        result = MoveResult(self.player_turn, move, target, card, info, played)
+        if record_undo:
+            self.undo_log.append(UndoRecord(result, num_tokens, num_fuses,
+                                            num_turns_left, last_move,
+                                            target_info, target_possible,
+                                            possible, hashes))
 
         # Figure out when to end the game.
         if self.num_fuses == 0:
@@ -188,6 +755,52 @@ class GameState(object):
 
         self.player_turn += 1
         self.player_turn %= self.config.num_players
+        if hashing:
+            self.common_hash ^= scalars_hash ^ self.scalars_hash()
+        return result
+
+    def undo(self):
+        """
+        Exactly reverts the last move played with `record_undo`, and returns
+        its MoveResult.
+        """
+        record = self.undo_log.pop()
+        result = record.result
+        who = self.players[result.target]
+        if result.card is None:
+            who.info[:] = record.target_info
+            who.possible[:] = record.target_possible
+        else:
+            # Put the dealt card back on the deck and the removed card back
+            # into its slot.
+            dealt = who.cards.pop()
+            who.info.pop()
+            who.possible.pop()
+            if dealt is not None:
+                self.deck.append(dealt)
+            who.cards.insert(result.move.index, result.card)
+            who.info.insert(result.move.index, result.info)
+            who.possible.insert(result.move.index, record.possible)
+            if result.played:
+                # Like in a new game, colors with nothing played have no key.
+                color = result.card.color
+                self.played_cards[color] -= 1
+                if self.played_cards[color] == 0:
+                    del self.played_cards[color]
+            else:
+                self.discarded_cards.pop()
+                self.discard_counts[self.card_ints[result.card]] -= 1
+
+        self.num_tokens = record.num_tokens
+        self.num_fuses = record.num_fuses
+        self.num_turns_left = record.num_turns_left
+        self.player_turn = result.player
+        self.last_moves[result.player] = record.last_move
+        (self.common_hash,
+         self.deck_hash,
+         self.cards_hashes[result.target],
+         self.info_hashes[result.target]) = record.hashes
+        return result
 
     def to_observation(self):
         # Rotate the players so that "you" always appears first.
@@ -208,7 +821,7 @@ class GameState(object):
     def render(self):
         played_cards = []
         for c in self.config.colors:
-            if self.played_cards[c] > 0:
+            if self.played_cards.get(c, 0) > 0:
                 played_cards.append(render_card(Card(c, self.played_cards[c])))
             else:
                 played_cards.append(termcolor.colored("--", c))
@@ -1,34 +1,90 @@
+import collections
+
 from gym_hanabi.envs.hanabi_env import *
 
+def get_ai_actions(ai_policy, observation_samples):
+    """
+    Returns the actions that `ai_policy` picks for a list of observation
+    samples. Policies with a batched `get_actions` (e.g. rllab policies,
+    which return a pair (actions, agent infos)) are called once for all the
+    samples; other policies are called once per sample.
+    """
+    if hasattr(ai_policy, "get_actions"):
+        actions, _ = ai_policy.get_actions(observation_samples)
+        return actions
+    return [ai_policy.get_action(s)[0] for s in observation_samples]
+
+def step_envs(envs, actions):
+    """
+    Steps every HanabiAiEnv in `envs` with its action in `actions`, with the
+    AI partners of all the envs that share an `ai_policy` batched into a
+    single `get_ai_actions` call. Returns the list of `_step` results.
+    """
+    results = [None] * len(envs)
+    # id(ai_policy) -> list of (env index, agent reward, illegal).
+    pending = collections.OrderedDict()
+    for i, (env, action) in enumerate(zip(envs, actions)):
+        action, illegal = env.resolve_action(action)
+        if action is None:
+            results[i] = env.illegal_step_result()
+            continue
+        reward, done = env.play_action(action)
+        if done:
+            results[i] = env.step_result(reward, done, illegal)
+        else:
+            pending.setdefault(id(env.ai_policy), []).append(
+                (i, reward, illegal))
+
+    for group in pending.values():
+        ai_policy = envs[group[0][0]].ai_policy
+        samples = [envs[i].observation_sample() for i, _, _ in group]
+        # Every profiled env waits for the whole batched call.
+        perfs = [envs[i].perf for i, _, _ in group
+                     if envs[i].perf is not None]
+        if perfs:
+            start = perfs[0].clock()
+        ai_actions = get_ai_actions(ai_policy, samples)
+        if perfs:
+            elapsed = perfs[0].clock() - start
+            for perf in perfs:
+                perf.add_latency("ai_partner", elapsed)
+        for (i, reward, illegal), ai_action in zip(group, ai_actions):
+            env = envs[i]
+            ai_action = env.resolve_ai_action(ai_action)
+            if ai_action is None:
+                results[i] = env.terminal_step_result()
+                continue
+            ai_reward, done = env.play_action(ai_action)
+            results[i] = env.step_result(reward + ai_reward, done, illegal)
+    return results
+
 class HanabiAiEnv(HanabiEnv):
-    def __init__(self, config, reward, spaces, ai_policy=None):
+    def __init__(self, config, reward, spaces, ai_policy=None,
+                 verify_observations=False, use_deck_bank=False,
+                 observation_mode="sample", canonical_colors=False,
+                 illegal_move_mode="terminate", illegal_move_penalty=1.0,
+                 reuse_game_states=False):
+        assert illegal_move_mode in ILLEGAL_MOVE_MODES, illegal_move_mode
         self.config = config
         self.reward = reward
         self.spaces = spaces
         self.ai_policy = ai_policy
+        self.verify_observations = verify_observations
+        self.use_deck_bank = use_deck_bank
+        self.observation_mode = observation_mode
+        self.canonical_colors = canonical_colors
+        self.illegal_move_mode = illegal_move_mode
+        self.illegal_move_penalty = illegal_move_penalty
+        if reuse_game_states:
+            self.game_state_pool = GameStatePool(config)
         self.action_space = spaces.action_space()
-        self.observation_space = spaces.observation_space()
+        self.observation_space = self.make_observation_space()
+        self.incremental_observation = \
+            hanabi_incremental.IncrementalObservation(
+                spaces, verify=verify_observations)
+        self.incremental_action_mask = \
+            hanabi_incremental.IncrementalActionMask(spaces)
         self._seed()
 
     def _step(self, action):
-        spaces = self.spaces
-        try:
-            move = spaces.sample_to_action(action,
-                    self.game_state.get_current_cards())
-            reward, done = self.play_move(move)
-            if not done:
-                observation = self.game_state.to_observation()
-                observation_sample = spaces.observation_to_sample(observation)
-                ai_action_sample = self.ai_policy.get_action(observation_sample)[0]
-                ai_action = spaces.sample_to_action(ai_action_sample,
-                        self.game_state.get_current_cards())
-                ai_reward, done = self.play_move(ai_action)
-                reward += ai_reward
-            observation = self.game_state.to_observation()
-            observation_sample = spaces.observation_to_sample(observation)
-            info = {"game_state": self.game_state, "illegal": False}
-            return (observation_sample, reward, done, info)
-        except ValueError as e:
-            reward = self.reward.illegal_move_reward(self.game_state)
-            info = {"game_state": self.game_state, "illegal": True}
-            return (None, reward, True, info)
+        return step_envs([self], [action])[0]
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi_ai_env
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_reward
+from gym_hanabi.envs import hanabi_spaces
+from gym_hanabi.policies import heuristic_policy
+
+class BatchedPolicy(object):
+    """
+    Wraps a policy with a batched `get_actions` that records the size of
+    every batch.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.batch_sizes = []
+
+    def get_actions(self, observations):
+        self.batch_sizes.append(len(observations))
+        return [self.policy.get_action(o)[0] for o in observations], {}
+
+class TestHanabiAiEnv(unittest.TestCase):
+    def make_envs(self, num_envs, ai_policy):
+        config = hanabi_config.MINI_HANABI_CONFIG
+        envs = []
+        for i in range(num_envs):
+            env = hanabi_ai_env.HanabiAiEnv(
+                config, hanabi_reward.SkewedReward(),
+                hanabi_spaces.NestedSpaces(config), ai_policy=ai_policy)
+            env._seed(i)
+            env._reset()
+            envs.append(env)
+        return envs
+
+    def test_step_envs(self):
+        random = np.random.RandomState(0)
+        policy = heuristic_policy.HeuristicPolicy(self.make_envs(1, None)[0])
+        batched = BatchedPolicy(policy)
+        envs = self.make_envs(8, policy)
+        batched_envs = self.make_envs(8, batched)
+        for _ in range(50):
+            masks = [env.legal_action_mask() for env in envs]
+            # Mostly legal actions, and the occasional illegal one.
+            actions = [random.choice(np.flatnonzero(m))
+                           if random.rand() < 0.95 else random.randint(len(m))
+                           for m in masks]
+            expected = [env._step(a) for env, a in zip(envs, actions)]
+            results = hanabi_ai_env.step_envs(batched_envs, actions)
+            for e, r in zip(expected, results):
+                self.assertEqual(e[0], r[0])
+                self.assertEqual(e[1:3], r[1:3])
+                self.assertEqual(e[3]["illegal"], r[3]["illegal"])
+            for i, (_, _, done, _) in enumerate(expected):
+                if done:
+                    envs[i]._reset()
+                    batched_envs[i]._reset()
+        # The partners of the games that were still going were batched.
+        self.assertLessEqual(len(batched.batch_sizes), 50)
+        self.assertGreater(max(batched.batch_sizes), 1)
+
+    def test_profiling(self):
+        policy = heuristic_policy.HeuristicPolicy(self.make_envs(1, None)[0])
+        env = self.make_envs(1, policy)[0]
+        env.set_profiling()
+        num_steps = 0
+        done = False
+        while not done:
+            action = np.flatnonzero(env.legal_action_mask())[0]
+            _, _, done, _ = env._step(action)
+            num_steps += 1
+        stats = env.perf_stats()["ai_partner"]
+        # The partner moves after every step but a game's last.
+        self.assertIn(stats["count"], [num_steps - 1, num_steps])
+        self.assertEqual(sum(stats["histogram"]), stats["count"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs.hanabi import (NO_CARD, UNKNOWN, INFORM_COLOR,
+                                   INFORM_NUMBER, DISCARD, PLAY)
+
+################################################################################
+# Helper Functions
+################################################################################
+def shuffled_decks(config, random, num_games):
+    decks = []
+    for _ in range(num_games):
+        deck = hanabi.new_deck(config)
+        random.shuffle(deck)
+        decks.append(deck)
+    return np.array(decks, dtype=np.int8)
+
+def move_tables(config):
+    """
+    Returns `hanabi.move_tables` as a pair of NumPy arrays.
+    """
+    kinds, args = hanabi.move_tables(config)
+    return np.array(kinds, dtype=np.int8), np.array(args, dtype=np.int8)
+
+################################################################################
+# Game Logic
+################################################################################
+class BatchGameState(object):
+    """
+    A struct-of-arrays version of `hanabi.GameState` that simulates
+    `num_games` games at once. Every piece of game state is a NumPy array whose
+    first axis is the game:
+
+      - decks:          (N, deck size) card ints; the top of the deck is at
+                        index `deck_sizes - 1`.
+      - hands:          (N, players, hand size) card ints.
+      - info_colors:    (N, players, hand size) color indexes or UNKNOWN.
+      - info_numbers:   (N, players, hand size) number indexes or UNKNOWN.
+      - played:         (N, colors) height of each played pile.
+      - discard_counts: (N, colors * numbers) count of each discarded card.
+      - num_tokens, num_fuses, num_turns_left, player_turn, deck_sizes: (N,).
+      - last_moves:     (N, players) move ids, or -1 if a player hasn't moved.
+
+    Hands keep the same slot order as `hanabi.Hand`: removing a card shifts
+    the cards after it to the left and the new card is dealt into the last
+    slot. Info is absent (hanabi's None) exactly when the card is NO_CARD.
+    """
+
+    def __init__(self, config, num_games, decks=None, random=None):
+        assert config.num_turns_after_last_deal >= config.num_players
+        assert config.num_players >= 2
+
+        self.config = config
+        self.num_games = num_games
+        self.num_numbers = len(config.card_counts)
+        self.move_kinds, self.move_args = move_tables(config)
+
+        deck_size = len(hanabi.new_deck(config))
+        assert deck_size >= config.num_players * config.hand_size
+        shape = (num_games, config.num_players, config.hand_size)
+        self.decks = np.zeros((num_games, deck_size), dtype=np.int8)
+        self.deck_sizes = np.zeros(num_games, dtype=np.int32)
+        self.hands = np.zeros(shape, dtype=np.int8)
+        self.info_colors = np.zeros(shape, dtype=np.int8)
+        self.info_numbers = np.zeros(shape, dtype=np.int8)
+        self.played = np.zeros((num_games, len(config.colors)), dtype=np.int32)
+        self.discard_counts = np.zeros(
+            (num_games, len(config.colors) * self.num_numbers), dtype=np.int32)
+        self.num_tokens = np.zeros(num_games, dtype=np.int32)
+        self.num_fuses = np.zeros(num_games, dtype=np.int32)
+        self.num_turns_left = np.zeros(num_games, dtype=np.int32)
+        self.player_turn = np.zeros(num_games, dtype=np.int32)
+        self.last_moves = np.zeros((num_games, config.num_players),
+                                   dtype=np.int32)
+
+        if decks is None:
+            assert random is not None, "Either decks or random is required."
+            decks = shuffled_decks(config, random, num_games)
+        self.reset(decks)
+
+    def reset(self, decks, games=None):
+        """
+        Starts new games with the given decks. If `games` is given (a boolean
+        mask or an index array), only those games are reset and `decks` holds
+        one deck per reset game.
+        """
+        c = self.config
+        if games is None:
+            games = np.arange(self.num_games)
+        decks = np.asarray(decks, dtype=np.int8)
+        deck_size = self.decks.shape[1]
+
+        # Deal to the players. `hanabi.GameState` pops cards off the end of the
+        # deck, one player at a time.
+        self.decks[games] = decks
+        hands = decks[:, deck_size - 1 - np.arange(c.num_players * c.hand_size)]
+        self.hands[games] = hands.reshape(-1, c.num_players, c.hand_size)
+        self.deck_sizes[games] = deck_size - c.num_players * c.hand_size
+
+        self.info_colors[games] = UNKNOWN
+        self.info_numbers[games] = UNKNOWN
+        self.played[games] = 0
+        self.discard_counts[games] = 0
+        self.num_tokens[games] = c.max_tokens
+        self.num_fuses[games] = c.max_fuses
+        self.num_turns_left[games] = -1
+        self.player_turn[games] = 0
+        self.last_moves[games] = -1
+
+    def current_scores(self):
+        return self.played.sum(axis=1)
+
+    def max_score(self):
+        return len(self.config.colors) * self.num_numbers
+
+    def done(self):
+        return self.num_turns_left == 0
+
+    def remove_cards(self, games, who, indexes):
+        """
+        Removes the card at `indexes` from the hand of player `who` in each of
+        `games`, shifting the remaining cards (and info) left. The last slot is
+        left for `deal_cards`. Returns the removed cards.
+        """
+        cards = self.hands[games, who, indexes]
+        slots = np.arange(self.config.hand_size)
+        src = slots[None, :] + (slots[None, :] >= indexes[:, None])
+        src = np.minimum(src, self.config.hand_size - 1)
+        rows = games[:, None]
+        for array in [self.hands, self.info_colors, self.info_numbers]:
+            array[games, who] = array[rows, who[:, None], src]
+        return cards
+
+    def deal_cards(self, games, who):
+        has_cards = self.deck_sizes[games] > 0
+        top = np.maximum(self.deck_sizes[games] - 1, 0)
+        cards = np.where(has_cards, self.decks[games, top], NO_CARD)
+        self.deck_sizes[games] -= has_cards
+        self.hands[games, who, -1] = cards
+        self.info_colors[games, who, -1] = UNKNOWN
+        self.info_numbers[games, who, -1] = UNKNOWN
+
+    def play_information_moves(self, games, kinds, args):
+        c = self.config
+        who = (self.player_turn[games] + 1 + args[:, 0]) % c.num_players
+        cards = self.hands[games, who]
+        present = cards != NO_CARD
+        values = args[:, 1][:, None]
+
+        is_color = (kinds == INFORM_COLOR)[:, None]
+        color_match = present & is_color & (cards // self.num_numbers == values)
+        number_match = present & ~is_color & (cards % self.num_numbers == values)
+        self.info_colors[games, who] = np.where(
+            color_match, values, self.info_colors[games, who])
+        self.info_numbers[games, who] = np.where(
+            number_match, values, self.info_numbers[games, who])
+        self.num_tokens[games] -= 1
+
+    def play_moves(self, moves):
+        """
+        Plays one move id per game. Returns a triple of arrays (rewards, dones,
+        illegal). The reward of a game is the change in its score. A move is
+        illegal where `hanabi.GameState.play_move` would raise a ValueError;
+        illegal moves leave their game untouched. Games that are already over
+        are left untouched as well.
+        """
+        c = self.config
+        moves = np.asarray(moves)
+        assert moves.shape == (self.num_games,), moves.shape
+
+        active = self.num_turns_left != 0
+        valid = (0 <= moves) & (moves < len(self.move_kinds))
+        safe_moves = np.where(valid, moves, 0)
+        kinds = self.move_kinds[safe_moves]
+        args = self.move_args[safe_moves]
+
+        # Figure out which moves are legal.
+        is_info = (kinds == INFORM_COLOR) | (kinds == INFORM_NUMBER)
+        turns = self.player_turn
+        indexes = np.minimum(args[:, 1], c.hand_size - 1)
+        own_cards = self.hands[np.arange(self.num_games), turns, indexes]
+        legal = valid & np.where(is_info, self.num_tokens > 0,
+                                          own_cards != NO_CARD)
+        illegal = active & ~legal
+        applied = active & legal
+        scores = self.current_scores()
+
+        # Information moves.
+        games = np.flatnonzero(applied & is_info)
+        self.play_information_moves(games, kinds[games], args[games])
+
+        # Discards and plays.
+        games = np.flatnonzero(applied & ~is_info)
+        who = turns[games]
+        cards = self.remove_cards(games, who, args[games, 1])
+        colors = cards // self.num_numbers
+        numbers = cards % self.num_numbers
+        is_play = kinds[games] == PLAY
+        success = is_play & (self.played[games, colors] == numbers)
+        self.played[games, colors] += success
+        self.num_fuses[games] -= is_play & ~success
+        self.discard_counts[games, cards] += ~success
+        is_discard = ~is_play & (self.num_tokens[games] < c.max_tokens)
+        self.num_tokens[games] += is_discard
+        self.deal_cards(games, who)
+
+        # Figure out when to end the games.
+        games = np.flatnonzero(applied)
+        self.last_moves[games, turns[games]] = moves[games]
+        new_scores = self.current_scores()
+        over = (self.num_fuses == 0) | (new_scores == self.max_score())
+        last_round = ~over & (self.deck_sizes == 0)
+        starting = last_round & (self.num_turns_left == -1)
+        turns_left = self.num_turns_left
+        turns_left = np.where(over, 0, turns_left)
+        turns_left = np.where(starting, c.num_turns_after_last_deal, turns_left)
+        turns_left = np.where(last_round & ~starting, turns_left - 1, turns_left)
+        self.num_turns_left[games] = turns_left[games]
+        self.player_turn[games] = (turns[games] + 1) % c.num_players
+
+        rewards = np.where(applied, new_scores - scores, 0)
+        return rewards, self.done(), illegal
+
+    def game_state_cards(self, game, player):
+        """
+        Returns the hand of `player` in `game` as a list of `hanabi.Card`s.
+        """
+        return [hanabi.int_to_card(self.config, c)
+                    for c in self.hands[game, player]]
+
+    def game_state_info(self, game, player):
+        """
+        Returns the info of `player` in `game` as a list of
+        `hanabi.Information`s.
+        """
+        info = []
+        for c, color, number in zip(self.hands[game, player],
+                                    self.info_colors[game, player],
+                                    self.info_numbers[game, player]):
+            if c == NO_CARD:
+                info.append(None)
+            else:
+                info.append(hanabi.int_to_information(self.config, color,
+                                                      number))
+        return info
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_batch
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_spaces
+
+class TestBatchGameState(unittest.TestCase):
+    def assertMatches(self, batch, game, game_state):
+        self.assertEqual(batch.num_tokens[game], game_state.num_tokens)
+        self.assertEqual(batch.num_fuses[game], game_state.num_fuses)
+        self.assertEqual(batch.num_turns_left[game], game_state.num_turns_left)
+        self.assertEqual(batch.player_turn[game], game_state.player_turn)
+        self.assertEqual(batch.deck_sizes[game], len(game_state.deck))
+        self.assertEqual(batch.current_scores()[game],
+                         game_state.current_score())
+        for player_index, player in enumerate(game_state.players):
+            self.assertEqual(batch.game_state_cards(game, player_index),
+                             player.cards)
+            self.assertEqual(batch.game_state_info(game, player_index),
+                             player.info)
+        discarded = [hanabi.card_to_int(game_state.config, card)
+                         for card in game_state.discarded_cards]
+        expected = np.bincount(discarded,
+                               minlength=batch.discard_counts.shape[1])
+        self.assertEqual(list(batch.discard_counts[game]), list(expected))
+
+    def check_config(self, config, num_games=32, seed=0):
+        moves = hanabi_spaces.NestedSpaces(config).moves()
+        decks = hanabi_batch.shuffled_decks(config,
+                np.random.RandomState(seed), num_games)
+        batch = hanabi_batch.BatchGameState(config, num_games, decks=decks)
+
+        random = np.random.RandomState(seed)
+        game_states = [hanabi.GameState(config, random)
+                           for _ in range(num_games)]
+        for game, game_state in enumerate(game_states):
+            self.assertMatches(batch, game, game_state)
+
+        move_random = np.random.RandomState(seed + 1)
+        done = [False] * num_games
+        while not all(done):
+            move_ids = move_random.randint(len(moves), size=num_games)
+            rewards, dones, illegal = batch.play_moves(move_ids)
+            for game, game_state in enumerate(game_states):
+                if done[game]:
+                    continue
+                score = game_state.current_score()
+                try:
+                    game_state.play_move(moves[move_ids[game]])
+                except ValueError:
+                    self.assertTrue(illegal[game])
+                    done[game] = True
+                    continue
+                self.assertFalse(illegal[game])
+                self.assertEqual(rewards[game],
+                                 game_state.current_score() - score)
+                self.assertEqual(dones[game], game_state.num_turns_left == 0)
+                self.assertMatches(batch, game, game_state)
+                done[game] = dones[game]
+
+    def test_matches_game_state(self):
+        configs = [
+            hanabi_config.HANABI_CONFIG,
+            hanabi_config.MINI_HANABI_CONFIG,
+            hanabi_config.MINI_HANABI_3P_CONFIG,
+            hanabi_config.MINI_HANABI_LOTSOFTURNS_CONFIG,
+        ]
+        for config in configs:
+            self.check_config(config)
+
+    def test_move_to_id(self):
+        for config in [hanabi_config.MINI_HANABI_3P_CONFIG,
+                       hanabi_config.HANABI_CONFIG]:
+            for i, move in enumerate(hanabi_spaces.NestedSpaces(config).moves()):
+                self.assertEqual(hanabi.move_to_id(config, move), i)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import collections
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_spaces
+
+class ColorCanonicalizer(object):
+    """
+    Hanabi is symmetric under relabeling the colors: renaming every red card
+    blue and every blue card red (in the hands, the info, and the discarded
+    and played cards) gives an equivalent game. A ColorCanonicalizer maps an
+    observation to a canonical representative of its relabelings, so that
+    caches, tables and learners only see one of the up to `len(colors)!`
+    equivalent observations.
+
+    A relabeling is represented as a permutation `perm`, a tuple such that
+    color `perm[i]` of the original observation (an index into
+    `config.colors`) is renamed to color `i`. Actions chosen for the
+    canonical observation are mapped back to actions of the original game
+    with `from_canonical_action`.
+
+    The canonical order sorts the colors by a signature which records every
+    place the color appears in the observation. Two colors with equal
+    signatures can be swapped without changing the observation, so the
+    canonical observation doesn't depend on how ties are broken.
+    """
+
+    def __init__(self, spaces):
+        self.spaces = spaces
+        self.config = spaces.config
+        # perm -> (to canonical action array, from canonical action array)
+        self.action_maps = {}
+
+    def color_signature(self, observation, color):
+        num_numbers = len(self.config.card_counts)
+        discarded = [0] * num_numbers
+        for card in observation.discarded_cards:
+            if card.color == color:
+                discarded[card.number - 1] += 1
+
+        def info_signature(info):
+            if info is None:
+                return -1
+            return int(info.color == color)
+
+        def card_signature(card):
+            if card is None or card.color != color:
+                return 0
+            return card.number
+
+        return (
+            observation.played_cards.get(color, 0),
+            tuple(discarded),
+            tuple(info_signature(info) for info in observation.your_info),
+            tuple((tuple(card_signature(card) for card in player.cards),
+                   tuple(info_signature(info) for info in player.info))
+                  for player in observation.players),
+        )
+
+    def color_permutation(self, observation):
+        """
+        Returns the permutation that canonicalizes `observation`.
+        """
+        signatures = [self.color_signature(observation, color)
+                          for color in self.config.colors]
+        return tuple(sorted(range(len(signatures)),
+                            key=lambda i: signatures[i]))
+
+    def relabel(self, observation, perm):
+        """
+        Returns `observation` with color `perm[i]` renamed to color `i`.
+        `observation` is not modified.
+        """
+        colors = self.config.colors
+        names = {colors[original]: colors[i] for i, original in enumerate(perm)}
+
+        def card(c):
+            return None if c is None else hanabi.Card(names[c.color], c.number)
+
+        def info(i):
+            if i is None or i.color is None:
+                return i
+            return hanabi.Information(names[i.color], i.number)
+
+        played_cards = collections.defaultdict(int)
+        for color, height in observation.played_cards.items():
+            played_cards[names[color]] = height
+        players = [hanabi.Hand([card(c) for c in player.cards],
+                               [info(i) for i in player.info])
+                       for player in observation.players]
+        return hanabi.Observation(
+            observation.num_tokens,
+            observation.num_fuses,
+            [card(c) for c in observation.discarded_cards],
+            played_cards,
+            [info(i) for i in observation.your_info],
+            players)
+
+    def canonicalize(self, observation):
+        """
+        Returns a pair (canonical observation, perm).
+        """
+        perm = self.color_permutation(observation)
+        return self.relabel(observation, perm), perm
+
+    def observation_to_sample(self, observation):
+        """
+        Returns a pair (canonical observation sample, perm).
+        """
+        canonical, perm = self.canonicalize(observation)
+        return self.spaces.observation_to_sample(canonical), perm
+
+    def relabel_move(self, move, names):
+        if isinstance(move, hanabi.InformColorMove):
+            return move._replace(color=names[move.color])
+        return move
+
+    def get_action_maps(self, perm):
+        maps = self.action_maps.get(perm)
+        if maps is not None:
+            return maps
+
+        colors = self.config.colors
+        names = {colors[original]: colors[i] for i, original in enumerate(perm)}
+        tables = self.spaces.tables()
+        flattened = isinstance(self.spaces, hanabi_spaces.FlattenedSpaces)
+        to_canonical = np.empty(len(tables.moves), dtype=np.int64)
+        for action, move in enumerate(tables.moves):
+            move = self.relabel_move(move, names)
+            if flattened and isinstance(move, (hanabi.DiscardMove,
+                                               hanabi.PlayMove)):
+                # FlattenedSpaces discards and plays name a card (or
+                # information) rather than a slot, so relabel it too.
+                card = tables.card_vector[move.index]
+                if card.color is not None:
+                    card = card._replace(color=names[card.color])
+                    move = type(move)(tables.card_indexes[card])
+            to_canonical[action] = self.spaces.action_to_sample(move)
+        from_canonical = np.empty_like(to_canonical)
+        from_canonical[to_canonical] = np.arange(len(to_canonical))
+        maps = (to_canonical, from_canonical)
+        self.action_maps[perm] = maps
+        return maps
+
+    def to_canonical_action(self, action, perm):
+        return int(self.get_action_maps(perm)[0][action])
+
+    def from_canonical_action(self, action, perm):
+        """
+        Maps an action of the canonical observation back to an action of the
+        original observation.
+        """
+        return int(self.get_action_maps(perm)[1][action])
+
+    def canonical_action_mask(self, mask, perm):
+        """
+        Maps a NumPy mask over the original actions to the canonical actions.
+        """
+        return mask[self.get_action_maps(perm)[1]]
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_canonical
+from gym_hanabi.envs import hanabi_env_test
+
+class TestColorCanonicalizer(unittest.TestCase):
+    def test_relabelings(self):
+        random = np.random.RandomState(0)
+        for env in hanabi_env_test.make_self_envs():
+            spaces = env.spaces
+            canonicalizer = hanabi_canonical.ColorCanonicalizer(spaces)
+            num_colors = len(env.config.colors)
+            for _ in range(2):
+                env._reset()
+                done = False
+                while not done:
+                    observation = env.game_state.to_observation()
+                    expected, perm = canonicalizer.observation_to_sample(
+                        observation)
+
+                    # Every relabeling has the same canonical observation.
+                    relabeled = canonicalizer.relabel(
+                        observation, tuple(random.permutation(num_colors)))
+                    actual, _ = canonicalizer.observation_to_sample(relabeled)
+                    self.assertEqual(actual, expected)
+
+                    # Canonical actions are the relabeled original actions.
+                    canonical = canonicalizer.relabel(observation, perm)
+                    cards = env.game_state.get_current_cards()
+                    names = {env.config.colors[o]: env.config.colors[i]
+                                 for i, o in enumerate(perm)}
+                    canonical_cards = [
+                        None if c is None else c._replace(color=names[c.color])
+                            for c in cards]
+                    for action in range(env.action_space.n):
+                        canonical_action = canonicalizer.to_canonical_action(
+                            action, perm)
+                        self.assertEqual(canonicalizer.from_canonical_action(
+                            canonical_action, perm), action)
+                        move = spaces.sample_to_action(action, cards)
+                        canonical_move = spaces.sample_to_action(
+                            canonical_action, canonical_cards)
+                        self.assertEqual(
+                            canonicalizer.relabel_move(move, names),
+                            canonical_move)
+
+                    action = random.choice(np.flatnonzero(
+                        env.legal_action_mask()))
+                    _, _, done, _ = env._step(action)
+
+    def test_env(self):
+        random = np.random.RandomState(0)
+        for env in hanabi_env_test.make_self_envs(canonical_colors=True):
+            for _ in range(2):
+                observation = env._reset()
+                done = False
+                while not done:
+                    canonicalizer = env.canonicalizer
+                    expected, _ = canonicalizer.observation_to_sample(
+                        env.game_state.to_observation())
+                    self.assertEqual(observation, expected)
+                    action = random.choice(np.flatnonzero(
+                        env.legal_action_mask()))
+                    observation, _, done, info = env._step(action)
+                    self.assertFalse(info["illegal"])
+
+if __name__ == "__main__":
+    unittest.main()
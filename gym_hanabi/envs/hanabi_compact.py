@@ -0,0 +1,218 @@
+import array
+import collections
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs.hanabi import (NO_CARD, UNKNOWN, INFORM_COLOR,
+                                   INFORM_NUMBER, DISCARD, PLAY)
+
+################################################################################
+# Game Logic
+################################################################################
+class CompactGameState(object):
+    """
+    A compact version of `hanabi.GameState`. Cards are small ints (see
+    `hanabi.card_to_int`) and every hand and its info live in fixed-size
+    slots of flat `array`s, so playing a move allocates no `Card`,
+    `Information` or `Hand` objects. Player `p`'s hand occupies slots
+    `p * hand_size` through `(p + 1) * hand_size - 1`; like `hanabi.Hand`,
+    removing a card shifts the cards after it to the left and new cards are
+    dealt into the last slot.
+
+    `play_move` takes the same moves as `hanabi.GameState.play_move` and
+    raises a ValueError on the same illegal moves, but it checks for them
+    before changing any state. `play_move_id` takes a move id instead (see
+    `hanabi.move_tables`). `to_observation` converts the state back into a
+    `hanabi.Observation`.
+    """
+
+    __slots__ = [
+        "config",
+        "random",
+        "num_numbers",
+        "num_tokens",
+        "num_fuses",
+        "num_turns_left",
+        "player_turn",
+        "score",
+        "deck",
+        "hands",
+        "info_colors",
+        "info_numbers",
+        "played",
+        "discarded",
+        "last_moves",
+        "move_kinds",
+        "move_args",
+    ]
+
+    def __init__(self, config, random, deck=None):
+        assert config.num_turns_after_last_deal >= config.num_players
+        assert config.num_players >= 2
+
+        self.config = config
+        self.random = random
+        self.num_numbers = len(config.card_counts)
+        self.move_kinds, self.move_args = hanabi.move_tables(config)
+
+        self.num_tokens = config.max_tokens
+        self.num_fuses = config.max_fuses
+        self.num_turns_left = -1
+        self.player_turn = 0
+        self.score = 0
+        self.played = bytearray(len(config.colors))
+        self.discarded = bytearray()
+        self.last_moves = array.array("b", [-1] * config.num_players)
+
+        # Shuffle the deck.
+        if deck is None:
+            deck = hanabi.new_deck(config)
+            random.shuffle(deck)
+        self.deck = bytearray(deck)
+
+        # Deal to the players.
+        num_slots = config.num_players * config.hand_size
+        assert len(self.deck) >= num_slots
+        self.hands = array.array("b", [self.deck.pop() for _ in range(num_slots)])
+        self.info_colors = array.array("b", [UNKNOWN] * num_slots)
+        self.info_numbers = array.array("b", [UNKNOWN] * num_slots)
+
+    def current_score(self):
+        return self.score
+
+    def max_score(self):
+        return len(self.config.colors) * self.num_numbers
+
+    def remove_card(self, player, index):
+        start = player * self.config.hand_size + index
+        end = (player + 1) * self.config.hand_size
+        card = self.hands[start]
+        for slots in [self.hands, self.info_colors, self.info_numbers]:
+            slots[start:end - 1] = slots[start + 1:end]
+        return card
+
+    def deal_card(self, player):
+        last = (player + 1) * self.config.hand_size - 1
+        self.hands[last] = self.deck.pop() if self.deck else NO_CARD
+        self.info_colors[last] = UNKNOWN
+        self.info_numbers[last] = UNKNOWN
+
+    def play_information_move(self, kind, relative_player, value):
+        if self.num_tokens == 0:
+            raise ValueError("No more information tokens left.")
+
+        c = self.config
+        player = (self.player_turn + 1 + relative_player) % c.num_players
+        start = player * c.hand_size
+        hands = self.hands
+        num_numbers = self.num_numbers
+        if kind == INFORM_COLOR:
+            for i in range(start, start + c.hand_size):
+                card = hands[i]
+                if card != NO_CARD and card // num_numbers == value:
+                    self.info_colors[i] = value
+        else:
+            for i in range(start, start + c.hand_size):
+                card = hands[i]
+                if card != NO_CARD and card % num_numbers == value:
+                    self.info_numbers[i] = value
+
+        self.num_tokens -= 1
+
+    def play_card_move(self, kind, index):
+        c = self.config
+        if not 0 <= index < c.hand_size:
+            raise ValueError("Cannot remove non-existent card.")
+        if self.hands[self.player_turn * c.hand_size + index] == NO_CARD:
+            raise ValueError("Cannot remove non-existent card.")
+
+        card = self.remove_card(self.player_turn, index)
+        if kind == DISCARD:
+            self.discarded.append(card)
+            if self.num_tokens < c.max_tokens:
+                self.num_tokens += 1
+        else:
+            color = card // self.num_numbers
+            if card % self.num_numbers == self.played[color]:
+                self.played[color] += 1
+                self.score += 1
+            else:
+                self.num_fuses -= 1
+                self.discarded.append(card)
+        self.deal_card(self.player_turn)
+
+    def play_move_id(self, move_id):
+        assert self.num_turns_left != 0
+
+        kind = self.move_kinds[move_id]
+        player, value = self.move_args[move_id]
+        if kind == INFORM_COLOR or kind == INFORM_NUMBER:
+            self.play_information_move(kind, player, value)
+        else:
+            self.play_card_move(kind, value)
+        self.last_moves[self.player_turn] = move_id
+
+        # Figure out when to end the game.
+        if self.num_fuses == 0:
+            # We used up all the fuses.
+            self.num_turns_left = 0
+        elif self.score == self.max_score():
+            # We played every card.
+            self.num_turns_left = 0
+        elif len(self.deck) == 0:
+            # If there are no more cards in the deck, then we start the last
+            # rounds of the game (if we haven't already).
+            if self.num_turns_left == -1:
+                self.num_turns_left = self.config.num_turns_after_last_deal
+            else:
+                self.num_turns_left -= 1
+
+        self.player_turn += 1
+        self.player_turn %= self.config.num_players
+
+    def play_move(self, move):
+        if isinstance(move, (hanabi.DiscardMove, hanabi.PlayMove)):
+            if not 0 <= move.index < self.config.hand_size:
+                raise ValueError("Cannot remove non-existent card.")
+        elif isinstance(move, (hanabi.InformColorMove, hanabi.InformNumberMove)):
+            assert 0 <= move.player < self.config.num_players - 1, move
+        self.play_move_id(hanabi.move_to_id(self.config, move))
+
+    def get_current_cards(self):
+        return self.player_cards(self.player_turn)
+
+    def player_cards(self, player):
+        start = player * self.config.hand_size
+        end = start + self.config.hand_size
+        return [hanabi.int_to_card(self.config, c) for c in self.hands[start:end]]
+
+    def player_info(self, player):
+        start = player * self.config.hand_size
+        info = []
+        for i in range(start, start + self.config.hand_size):
+            if self.hands[i] == NO_CARD:
+                info.append(None)
+            else:
+                info.append(hanabi.int_to_information(
+                    self.config, self.info_colors[i], self.info_numbers[i]))
+        return info
+
+    def to_observation(self):
+        """
+        Returns the same `hanabi.Observation` that `hanabi.GameState` would.
+        """
+        c = self.config
+        played_cards = collections.defaultdict(int)
+        for color, count in zip(c.colors, self.played):
+            if count > 0:
+                played_cards[color] = count
+        discarded_cards = [hanabi.int_to_card(c, card) for card in self.discarded]
+
+        # Rotate the players so that "you" always appears first.
+        players = []
+        for i in range(1, c.num_players):
+            player = (self.player_turn + i) % c.num_players
+            players.append(hanabi.Hand(self.player_cards(player),
+                                       self.player_info(player)))
+        return hanabi.Observation(self.num_tokens, self.num_fuses,
+                                  discarded_cards, played_cards,
+                                  self.player_info(self.player_turn), players)
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_compact
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_spaces
+
+class TestCompactGameState(unittest.TestCase):
+    def assertObservationsEqual(self, spaces, actual, expected):
+        self.assertEqual(actual, expected)
+        self.assertEqual(spaces.observation_to_sample(actual),
+                         spaces.observation_to_sample(expected))
+
+    def check_config(self, config, num_games=20):
+        spaces = hanabi_spaces.NestedSpaces(config)
+        moves = spaces.moves()
+        move_random = np.random.RandomState(0)
+        for seed in range(num_games):
+            game_state = hanabi.GameState(config, np.random.RandomState(seed))
+            compact = hanabi_compact.CompactGameState(
+                config, np.random.RandomState(seed))
+            self.assertObservationsEqual(spaces, compact.to_observation(),
+                                         game_state.to_observation())
+
+            while game_state.num_turns_left != 0:
+                move = moves[move_random.randint(len(moves))]
+                try:
+                    game_state.play_move(move)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        compact.play_move(move)
+                    break
+                compact.play_move(move)
+                self.assertEqual(compact.current_score(),
+                                 game_state.current_score())
+                self.assertEqual(compact.num_turns_left,
+                                 game_state.num_turns_left)
+                self.assertEqual(compact.get_current_cards(),
+                                 game_state.get_current_cards())
+                self.assertObservationsEqual(spaces, compact.to_observation(),
+                                             game_state.to_observation())
+
+    def test_matches_game_state(self):
+        self.check_config(hanabi_config.HANABI_CONFIG)
+        self.check_config(hanabi_config.MINI_HANABI_CONFIG)
+        self.check_config(hanabi_config.MINI_HANABI_3P_CONFIG)
+
+    def test_illegal_moves_leave_state_untouched(self):
+        config = hanabi_config.MINI_HANABI_CONFIG
+        compact = hanabi_compact.CompactGameState(
+            config, np.random.RandomState(0))
+        compact.num_tokens = 0
+        hands = list(compact.hands)
+        with self.assertRaises(ValueError):
+            compact.play_move(hanabi.InformColorMove("red", 0))
+        with self.assertRaises(ValueError):
+            compact.play_move(hanabi.PlayMove(config.hand_size))
+        self.assertEqual(list(compact.hands), hands)
+        self.assertEqual(compact.player_turn, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,3 +55,11 @@ MINI_HANABI_LOTSOFINFO_CONFIG = \
 
 MINI_HANABI_LOTSOFTURNS_CONFIG = \
     MINI_HANABI_CONFIG._replace(num_turns_after_last_deal=15)
+
+def config_key(config):
+    """
+    Returns a hashable key for `config`, whose lists make it unhashable.
+    Configs with equal fields have equal keys.
+    """
+    return tuple(tuple(field) if isinstance(field, list) else field
+                     for field in config)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+
+class DeckBank(object):
+    """
+    A bank of pre-shuffled decks. Deck `index` of the bank for `(config,
+    seed)` is always the same deck, so any episode that starts from a bank
+    deck can be reproduced from its seed and index alone.
+
+    Decks are generated `block_size` at a time with a single vectorized
+    permutation: we draw a (block_size, deck size) array of uniform keys and
+    argsort every row. Decks are card ints (see `hanabi.card_to_int`) with the
+    top of the deck at the end, like `hanabi.GameState.deck`.
+    """
+
+    def __init__(self, config, seed, block_size=4096):
+        assert seed >= 0, seed
+        self.config = config
+        self.seed = seed
+        self.block_size = block_size
+        self.unshuffled_deck = np.array(hanabi.new_deck(config), dtype=np.int8)
+        num_cards = len(config.colors) * len(config.card_counts)
+        self.cards_table = [hanabi.int_to_card(config, c)
+                                for c in range(num_cards)]
+        self.block_index = None
+        self.block = None
+
+    def seed_words(self, block_index):
+        """
+        Returns the list of 32-bit words that seeds block `block_index`.
+        """
+        words = [block_index]
+        seed = self.seed
+        while True:
+            words.append(seed & 0xffffffff)
+            seed >>= 32
+            if seed == 0:
+                return words
+
+    def generate_block(self, block_index):
+        random = np.random.RandomState(self.seed_words(block_index))
+        keys = random.random_sample((self.block_size, len(self.unshuffled_deck)))
+        return self.unshuffled_deck[np.argsort(keys, axis=1)]
+
+    def get_block(self, block_index):
+        if block_index != self.block_index:
+            self.block = self.generate_block(block_index)
+            self.block_index = block_index
+        return self.block
+
+    def deck(self, index):
+        """
+        Returns deck `index` as an array of card ints.
+        """
+        assert index >= 0, index
+        block_index, offset = divmod(index, self.block_size)
+        return self.get_block(block_index)[offset]
+
+    def decks(self, indexes):
+        """
+        Returns an (N, deck size) array with the decks `indexes`.
+        """
+        indexes = np.asarray(indexes)
+        decks = np.empty((len(indexes), len(self.unshuffled_deck)),
+                         dtype=np.int8)
+        block_indexes = indexes // self.block_size
+        for block_index in np.unique(block_indexes):
+            rows = block_indexes == block_index
+            offsets = indexes[rows] % self.block_size
+            decks[rows] = self.get_block(block_index)[offsets]
+        return decks
+
+    def cards(self, index):
+        """
+        Returns deck `index` as a list of `hanabi.Card`s, ready to be passed
+        to `hanabi.GameState`.
+        """
+        return [self.cards_table[c] for c in self.deck(index).tolist()]
@@ -1,46 +1,341 @@
 import gym
 import gym.utils
 import gym.utils.seeding
+import numpy as np
 from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_canonical
+from gym_hanabi.envs import hanabi_deck
+from gym_hanabi.envs import hanabi_incremental
+from gym_hanabi.envs import hanabi_perf
+from gym_hanabi.envs import hanabi_render
 import six
 
+# "sample" observations are nested tuples (see `Spaces.observation_space`).
+# "vector" observations are float32 vectors (see `Spaces.encode_into`); the
+# env encodes every observation into the same buffer, so callers that keep an
+# observation past the next step or reset must copy it.
+OBSERVATION_MODES = ["sample", "vector"]
+
+# What an env does when the agent takes an illegal action (see
+# `HanabiEnv.resolve_action`):
+#   - "terminate": the episode ends with `Reward.illegal_move_reward` and a
+#     None observation.
+#   - "noop": nothing is played, the reward is `-illegal_move_penalty`, and
+#     the same player moves again.
+#   - "resample": a uniformly random legal action is played instead.
+# In every mode, the step's info["illegal"] is true.
+ILLEGAL_MOVE_MODES = ["terminate", "noop", "resample"]
+
+class GameStatePool(object):
+    """
+    A pool of the `hanabi.GameState`s of finished games of a config, which
+    `get` reuses (see `GameState.reset`) instead of allocating new games.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.game_states = []
+
+    def get(self, random, deck=None):
+        """
+        Returns a new game, like `hanabi.GameState(config, random, deck)`.
+        """
+        if not self.game_states:
+            return hanabi.GameState(self.config, random, deck=deck)
+        game_state = self.game_states.pop()
+        game_state.random = random
+        game_state.reset(deck)
+        return game_state
+
+    def put(self, game_state):
+        """
+        Returns a finished game to the pool. The caller must not use it
+        anymore.
+        """
+        self.game_states.append(game_state)
+
 class HanabiEnv(gym.Env):
-    metadata = {"render.modes": ["human", "ansi"]}
+    # "ansi_diff" renders a frame as the ANSI escape sequences that turn the
+    # env's last rendered frame into it (see `hanabi_render.Renderer.diff`).
+    metadata = {"render.modes": ["human", "ansi", "ansi_diff"]}
+
+    # The env's `hanabi_perf.PerfStats`, or None if profiling is off.
+    perf = None
+
+    # The env's `hanabi_render.Renderer`, created by the first render.
+    renderer = None
+
+    # The current game, and the pool that `_reset` recycles finished games
+    # through if the env reuses game states. A reused game is reset in place
+    # (see `GameState.reset`), so callers that keep the game state of an
+    # episode (e.g. from a step's info) past the next reset must copy it.
+    game_state = None
+    game_state_pool = None
+
+    # If true, `_step` and `_reset` return a None observation and leave it to
+    # the caller to call `observation()`, e.g. HanabiVecEnv, which encodes
+    # the observations of all its envs into the rows of one buffer.
+    defer_observations = False
+
+    def set_profiling(self, enabled=True):
+        """
+        Turns profiling on or off. While profiling is on, the env times the
+        phases of its steps: resolve_action, sample_to_action, play_move
+        (`GameState.play_move` and the incremental updates), reward,
+        observation (the sample and its encoding) and, in AI envs,
+        ai_partner, the latency of the AI partner's inference. Turning
+        profiling on clears the stats.
+        """
+        self.perf = hanabi_perf.PerfStats() if enabled else None
+
+    def perf_stats(self):
+        """
+        Returns the stats of the env's profiled phases (see
+        `hanabi_perf.PerfStats.stats`), or None if profiling is off.
+        """
+        if self.perf is None:
+            return None
+        return self.perf.stats()
+
+    def make_observation_space(self):
+        assert self.observation_mode in OBSERVATION_MODES, self.observation_mode
+        if self.canonical_colors:
+            self.canonicalizer = hanabi_canonical.ColorCanonicalizer(
+                self.spaces)
+        if self.observation_mode == "vector":
+            self.observation_buffer = np.zeros(self.spaces.encoding_size(),
+                                               dtype=np.float32)
+            self.encode_into = self.spaces.compile().encode_into
+            return self.spaces.encoding_space()
+        return self.spaces.observation_space()
 
     def play_move(self, move):
         # The reward of this move is the current reward after the move minus
-        # the current reward before the move.
-        reward = -self.reward.current_reward(self.game_state)
-        self.game_state.play_move(move)
-        reward += self.reward.current_reward(self.game_state)
+        # the current reward before the move. Rewards that are sums over the
+        # piles look the difference up (see `Reward.delta`).
+        perf = self.perf
+        pile_sum = self.reward.is_pile_sum()
+        if not pile_sum:
+            before = self.reward.current_reward(self.game_state)
+        if perf is not None:
+            start = perf.clock()
+        result = self.game_state.play_move(move)
+        self.incremental_observation.update(result)
+        self.incremental_action_mask.update(result)
+        if perf is not None:
+            start = perf.record("play_move", start)
+        if pile_sum:
+            reward = self.reward.delta(self.config, result)
+        else:
+            reward = self.reward.current_reward(self.game_state) - before
+        if perf is not None:
+            perf.record("reward", start)
 
         # The game is over when there are no turns left.
         done = self.game_state.num_turns_left == 0
         return reward, done
 
+    def observation_sample(self):
+        """
+        Returns the observation sample of the current player. The sample is
+        maintained incrementally as moves are played; if
+        `self.verify_observations` is true, it is also checked against a full
+        rebuild of the observation.
+        """
+        return self.incremental_observation.sample(self.game_state.player_turn)
+
+    def observation(self):
+        """
+        Returns the observation of the current player in the env's
+        observation mode. If the env canonicalizes colors, the observation
+        is canonical (see `hanabi_canonical.ColorCanonicalizer`), and so are
+        the actions that `_step` expects until the next observation.
+        """
+        perf = self.perf
+        if perf is not None:
+            start = perf.clock()
+        if self.canonical_colors:
+            observation = self.game_state.to_observation()
+            sample, self.color_permutation = \
+                self.canonicalizer.observation_to_sample(observation)
+        else:
+            sample = self.observation_sample()
+        if self.observation_mode == "vector":
+            sample = self.encode_into(sample, self.observation_buffer)
+        if perf is not None:
+            perf.record("observation", start)
+        return sample
+
+    def legal_action_mask(self):
+        """
+        Returns a NumPy bool mask over the action space which is true for the
+        actions that the current player can legally take.
+        """
+        mask = self.incremental_action_mask.mask(self.game_state.player_turn)
+        if self.canonical_colors:
+            return self.canonicalizer.canonical_action_mask(
+                mask, self.color_permutation)
+        return mask
+
+    def original_action(self, action):
+        """
+        Maps an action for the last observation to an action of the game.
+        """
+        if self.canonical_colors:
+            return self.canonicalizer.from_canonical_action(
+                action, self.color_permutation)
+        return action
+
+    def resolve_action(self, action):
+        """
+        Checks `action`, an action for the last observation, against the
+        legal action mask instead of letting the game raise a ValueError.
+        Returns a pair (game action, illegal): the action of the game (see
+        `original_action`) to play, or None if nothing should be played, and
+        whether `action` was illegal.
+        """
+        perf = self.perf
+        if perf is not None:
+            start = perf.clock()
+        mask = self.incremental_action_mask.mask(self.game_state.player_turn)
+        illegal = True
+        if 0 <= action < len(mask):
+            action = self.original_action(action)
+            illegal = not mask[action]
+        if illegal and self.illegal_move_mode == "resample":
+            action = self.random_legal_action(mask)
+        elif illegal:
+            action = None
+        if perf is not None:
+            perf.record("resolve_action", start)
+        return action, illegal
+
+    def resolve_ai_action(self, action):
+        """
+        Like `resolve_action` for an AI partner's action, which is an action
+        of the game. An AI partner's illegal action ends the episode unless
+        the env resamples illegal actions.
+        """
+        mask = self.incremental_action_mask.mask(self.game_state.player_turn)
+        if 0 <= action < len(mask) and mask[action]:
+            return action
+        if self.illegal_move_mode == "resample":
+            return self.random_legal_action(mask)
+        return None
+
+    def random_legal_action(self, mask):
+        # A player can run out of cards and tokens when the game has more
+        # turns after the last deal than cards in a hand.
+        legal_actions = np.flatnonzero(mask)
+        if len(legal_actions) == 0:
+            return None
+        return int(self.np_random.choice(legal_actions))
+
+    def play_action(self, action):
+        """
+        Plays the legal game action `action` and returns (reward, done).
+        """
+        perf = self.perf
+        if perf is not None:
+            start = perf.clock()
+        move = self.spaces.sample_to_action(
+            action, self.game_state.get_current_cards())
+        if perf is not None:
+            perf.record("sample_to_action", start)
+        return self.play_move(move)
+
+    def step_result(self, reward, done, illegal=False):
+        info = {"game_state": self.game_state, "illegal": illegal}
+        if self.defer_observations:
+            return (None, reward, done, info)
+        return (self.observation(), reward, done, info)
+
+    def terminal_step_result(self):
+        reward = self.reward.illegal_move_reward(self.game_state)
+        info = {"game_state": self.game_state, "illegal": True}
+        return (None, reward, True, info)
+
+    def illegal_step_result(self):
+        """
+        Returns the result of a step whose illegal action wasn't played.
+        """
+        if self.illegal_move_mode == "noop":
+            return self.step_result(-self.illegal_move_penalty, False, True)
+        return self.terminal_step_result()
+
+    def possible_cards_sample(self):
+        """
+        Returns the cards that each slot of the current player's hand could
+        hold, given every hint the player has received (see
+        `Spaces.possible_cards_to_sample`).
+        """
+        who = self.game_state.players[self.game_state.player_turn]
+        return self.spaces.possible_cards_to_sample(who.possible)
+
     def _step(self, action):
         raise NotImplementedError()
 
+    def new_game_state(self):
+        """
+        Returns the game state of a new episode. If the env uses a deck bank,
+        the episode is dealt from deck `self.episode_index` of the bank for
+        `self.episode_seed`, and can be replayed with `reset_to_episode`.
+        """
+        deck = None
+        if self.use_deck_bank:
+            deck = self.deck_bank.cards(self.episode_index)
+        if self.game_state_pool is not None:
+            return self.game_state_pool.get(self.np_random, deck)
+        return hanabi.GameState(self.config, self.np_random, deck=deck)
+
+    def reset_to_episode(self, seed, index):
+        """
+        Resets the env to episode `index` of seed `seed`. Episodes are only
+        reproducible when the env uses a deck bank.
+        """
+        assert self.use_deck_bank
+        if seed != self.episode_seed:
+            self._seed(seed)
+        self.next_episode_index = index
+        return self._reset()
+
     def _reset(self):
-        self.game_state = hanabi.GameState(self.config, self.np_random)
-        observation = self.game_state.to_observation()
-        return self.spaces.observation_to_sample(observation)
+        self.episode_index = self.next_episode_index
+        self.next_episode_index += 1
+        if self.game_state_pool is not None and self.game_state is not None:
+            self.game_state_pool.put(self.game_state)
+        self.game_state = self.new_game_state()
+        self.incremental_observation.reset(self.game_state)
+        self.incremental_action_mask.reset(self.game_state)
+        if self.defer_observations:
+            return None
+        return self.observation()
 
     def _render(self, mode='human', close=False):
         if close:
             return
 
+        if self.renderer is None:
+            self.renderer = hanabi_render.Renderer(self.config)
         if mode == "human":
-            print(self.game_state.render())
+            print(self.renderer.render(self.game_state))
         elif mode == "ansi":
             s = six.StringIO()
-            s.write(self.game_state.render() + "\n")
+            s.write(self.renderer.render(self.game_state) + "\n")
+            return s
+        elif mode == "ansi_diff":
+            s = six.StringIO()
+            s.write(self.renderer.diff(self.game_state))
             return s
         else:
             super(HanabiEnv, self).render(mode=mode)
 
     def _seed(self, seed=None):
         self.np_random, seed = gym.utils.seeding.np_random(seed)
+        self.episode_seed = seed
+        self.next_episode_index = 0
+        if self.use_deck_bank:
+            self.deck_bank = hanabi_deck.DeckBank(self.config, seed)
         return [seed]
 
 if __name__ == "__main__":
@@ -0,0 +1,394 @@
+import copy
+import itertools
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_ai_env
+from gym_hanabi.envs import hanabi_batch
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_deck
+from gym_hanabi.envs import hanabi_env
+from gym_hanabi.envs import hanabi_reward
+from gym_hanabi.envs import hanabi_self_env
+from gym_hanabi.envs import hanabi_spaces
+from gym_hanabi.policies import heuristic_policy
+
+class TokensReward(hanabi_reward.Reward):
+    """
+    A reward that isn't a sum over the piles: the score plus the tokens.
+    """
+
+    def current_reward(self, game_state):
+        return game_state.current_score() + game_state.num_tokens
+
+    def illegal_move_reward(self, game_state):
+        return -self.current_reward(game_state)
+
+class ScaledReward(hanabi_reward.Reward):
+    """
+    A pile sum whose piles depend on a parameter.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def pile_reward(self, height):
+        return self.scale * height
+
+    def illegal_move_reward(self, game_state):
+        return -self.current_reward(game_state)
+
+def make_self_envs(**kwargs):
+    configs = [
+        hanabi_config.HANABI_CONFIG,
+        hanabi_config.MINI_HANABI_CONFIG,
+        hanabi_config.MINI_HANABI_3P_CONFIG,
+    ]
+    envs = []
+    for config in configs:
+        for spaces in [hanabi_spaces.NestedSpaces(config),
+                       hanabi_spaces.FlattenedSpaces(config)]:
+            env = hanabi_self_env.HanabiSelfEnv(
+                config, hanabi_reward.SkewedReward(), spaces, **kwargs)
+            env._seed(0)
+            envs.append(env)
+    return envs
+
+ENV_CLASSES = [hanabi_self_env.HanabiSelfEnv, hanabi_ai_env.HanabiAiEnv]
+
+def make_env(env_class, config=hanabi_config.MINI_HANABI_CONFIG,
+             spaces_class=hanabi_spaces.NestedSpaces, **kwargs):
+    """
+    Returns a seeded `env_class` env. AI envs are partnered with a
+    HeuristicPolicy.
+    """
+    env = env_class(config, hanabi_reward.SkewedReward(), spaces_class(config),
+                    **kwargs)
+    if env_class is hanabi_ai_env.HanabiAiEnv:
+        env.ai_policy = heuristic_policy.HeuristicPolicy(env)
+    env._seed(0)
+    return env
+
+class TestHanabiSelfEnv(unittest.TestCase):
+    def test_incremental_observation(self):
+        random = np.random.RandomState(0)
+        for env in make_self_envs(verify_observations=True):
+            for _ in range(20):
+                observation = env._reset()
+                self.assertEqual(observation,
+                                 env.incremental_observation.full_sample(0))
+                done = False
+                while not done:
+                    action = random.randint(env.action_space.n)
+                    _, _, done, _ = env._step(action)
+
+    def test_legal_action_mask(self):
+        random = np.random.RandomState(0)
+        for env in make_self_envs():
+            for _ in range(2):
+                env._reset()
+                done = False
+                while not done:
+                    game_state = env.game_state
+                    mask = env.legal_action_mask()
+                    self.assertEqual(list(mask), list(
+                        env.spaces.legal_action_mask(game_state)))
+                    for action in range(env.action_space.n):
+                        trial = copy.deepcopy(game_state)
+                        try:
+                            move = env.spaces.sample_to_action(
+                                action, trial.get_current_cards())
+                            trial.play_move(move)
+                            legal = True
+                        except ValueError:
+                            legal = False
+                        self.assertEqual(mask[action], legal)
+
+                    if isinstance(env.spaces, hanabi_spaces.NestedSpaces):
+                        legal_moves = [env.spaces.sample_to_action(a, None)
+                                           for a in np.flatnonzero(mask)]
+                        self.assertEqual(game_state.legal_moves(), legal_moves)
+
+                    legal_actions = np.flatnonzero(mask)
+                    _, _, done, info = env._step(random.choice(legal_actions))
+                    self.assertFalse(info["illegal"])
+
+    def test_batches(self):
+        random = np.random.RandomState(0)
+        for env in make_self_envs():
+            config = env.config
+            spaces = env.spaces
+            samples = []
+            hands = []
+            for _ in range(3):
+                env._reset()
+                done = False
+                while not done:
+                    samples.append(env.observation_sample())
+                    cards = env.game_state.get_current_cards()
+                    hands.append([hanabi.card_to_int(config, c) for c in cards])
+                    action = random.choice(np.flatnonzero(
+                        env.legal_action_mask()))
+                    _, _, done, _ = env._step(action)
+
+            encoded = spaces.encode_batch(samples)
+            self.assertEqual(encoded.shape, (len(samples),
+                                             spaces.encoding_size()))
+            for sample, vector in zip(samples, encoded):
+                self.assertEqual(list(vector), list(spaces.encode(sample)))
+
+            n = spaces.action_space().n
+            actions = random.randint(-1, n + 1, size=len(hands))
+            move_ids = spaces.decode_actions_batch(actions, hands)
+            for action, hand, move_id in zip(actions, hands, move_ids):
+                cards = [hanabi.int_to_card(config, c) for c in hand]
+                if not 0 <= action < n:
+                    self.assertEqual(move_id, -1)
+                    continue
+                move = spaces.sample_to_action(action, cards)
+                if (not isinstance(move, (hanabi.InformColorMove,
+                                          hanabi.InformNumberMove)) and
+                        (move.index >= len(cards) or cards[move.index] is None)):
+                    self.assertEqual(move_id, -1)
+                else:
+                    self.assertEqual(move_id, hanabi.move_to_id(config, move))
+
+    def test_deck_bank(self):
+        config = hanabi_config.MINI_HANABI_CONFIG
+        bank = hanabi_deck.DeckBank(config, 2**40 + 3, block_size=16)
+        indexes = [0, 17, 5, 40, 17]
+        decks = bank.decks(indexes)
+        for index, deck in zip(indexes, decks):
+            self.assertEqual(list(deck), list(bank.deck(index)))
+            self.assertEqual(sorted(deck), hanabi.new_deck(config))
+        self.assertNotEqual(list(decks[0]), list(decks[1]))
+
+        # Only envs that ask for a deck bank build one.
+        self.assertFalse(hasattr(make_self_envs()[0], "deck_bank"))
+        env = make_self_envs(use_deck_bank=True)[0]
+        env._seed(7)
+        observations = [env._reset() for _ in range(3)]
+        self.assertEqual(env.episode_index, 2)
+        self.assertEqual(env.reset_to_episode(7, 1), observations[1])
+        env._seed(8)
+        self.assertEqual(env.reset_to_episode(7, 0), observations[0])
+
+    def test_reward_delta(self):
+        config = hanabi_config.HANABI_CONFIG
+        rewards = [
+            hanabi_reward.ConstantReward(),
+            hanabi_reward.LinearReward(),
+            hanabi_reward.SquaredReward(),
+            hanabi_reward.SkewedReward(),
+        ]
+        random = np.random.RandomState(0)
+        for _ in range(10):
+            game_state = hanabi.GameState(config, random)
+            while game_state.num_turns_left != 0:
+                # Favor plays so that the piles grow.
+                moves = game_state.legal_moves()
+                plays = [m for m in moves if isinstance(m, hanabi.PlayMove)]
+                moves = plays if random.rand() < 0.8 else moves
+                before = [r.current_reward(game_state) for r in rewards]
+                result = game_state.play_move(moves[random.randint(len(moves))])
+                for reward, b in zip(rewards, before):
+                    self.assertEqual(reward.delta(config, result),
+                                     reward.current_reward(game_state) - b)
+
+        # Every instance looks up its own piles.
+        played = np.array([[1, 0, 2, 0, 5]])
+        for scale in [1, 3]:
+            reward = ScaledReward(scale)
+            self.assertEqual(reward.pile_rewards(5),
+                             [scale * h for h in range(6)])
+            self.assertEqual(list(reward.batch_current_reward(config, played)),
+                             [scale * 8])
+
+        # Rewards that only override current_reward are rewarded with its
+        # change.
+        reward = TokensReward()
+        self.assertFalse(reward.is_pile_sum())
+        self.assertTrue(all(r.is_pile_sum() for r in rewards))
+        env = hanabi_self_env.HanabiSelfEnv(
+            config, reward, hanabi_spaces.NestedSpaces(config))
+        env._seed(0)
+        env._reset()
+        done = False
+        while not done:
+            before = reward.current_reward(env.game_state)
+            action = random.choice(np.flatnonzero(env.legal_action_mask()))
+            _, step_reward, done, _ = env._step(action)
+            self.assertEqual(step_reward,
+                             reward.current_reward(env.game_state) - before)
+
+        batch = hanabi_batch.BatchGameState(config, 64, random=random)
+        for _ in range(30):
+            before = batch.played.copy()
+            batch.play_moves(random.randint(len(batch.move_kinds), size=64))
+            for reward in rewards:
+                expected = [sum(reward.pile_reward(h) for h in row)
+                                for row in batch.played]
+                self.assertEqual(
+                    list(reward.batch_current_reward(config, batch.played)),
+                    expected)
+                delta = reward.batch_delta(config, before, batch.played)
+                self.assertEqual(list(delta), list(
+                    expected - reward.batch_current_reward(config, before)))
+
+class TestHanabiEnvs(unittest.TestCase):
+    def test_vector_observations(self):
+        random = np.random.RandomState(0)
+        # The layout depends on the config and the spaces.
+        for env_class, config, spaces_class in itertools.product(
+                ENV_CLASSES,
+                [hanabi_config.HANABI_CONFIG,
+                 hanabi_config.MINI_HANABI_CONFIG],
+                [hanabi_spaces.NestedSpaces, hanabi_spaces.FlattenedSpaces]):
+            with self.subTest(env_class=env_class.__name__, config=config,
+                              spaces_class=spaces_class.__name__):
+                env = make_env(env_class, config, spaces_class,
+                               observation_mode="vector")
+                leaf_sizes = env.spaces.tables().leaf_sizes
+                for _ in range(3):
+                    observation = env._reset()
+                    done = False
+                    while not done:
+                        self.assertIs(observation, env.observation_buffer)
+                        self.assertTrue(
+                            env.observation_space.contains(observation))
+                        leaves = list(hanabi_spaces.sample_leaves(
+                            env.observation_sample()))
+                        leaves[0] += 1
+                        leaves[1] += 1
+                        if spaces_class is hanabi_spaces.NestedSpaces:
+                            one_hots = np.split(observation,
+                                                np.cumsum(leaf_sizes)[:-1])
+                            self.assertEqual(
+                                [list(h).index(1) for h in one_hots], leaves)
+                            self.assertEqual(observation.sum(), len(leaves))
+                        else:
+                            self.assertEqual(list(observation), leaves)
+
+                        mask = env.legal_action_mask()
+                        action = random.choice(np.flatnonzero(mask))
+                        observation, _, done, _ = env._step(action)
+
+    def test_illegal_move_modes(self):
+        random = np.random.RandomState(0)
+        # The spaces lay out and check the discard and play actions
+        # differently.
+        for mode, env_class, spaces_class in itertools.product(
+                hanabi_env.ILLEGAL_MOVE_MODES, ENV_CLASSES,
+                [hanabi_spaces.NestedSpaces, hanabi_spaces.FlattenedSpaces]):
+            if (env_class is hanabi_ai_env.HanabiAiEnv and
+                    spaces_class is hanabi_spaces.FlattenedSpaces):
+                # The heuristic AI partner makes illegal moves of its own.
+                continue
+            with self.subTest(mode=mode, env_class=env_class.__name__,
+                              spaces_class=spaces_class.__name__):
+                env = make_env(env_class, spaces_class=spaces_class,
+                               illegal_move_mode=mode,
+                               illegal_move_penalty=2.5)
+                for _ in range(3):
+                    observation = env._reset()
+                    done = False
+                    while not done:
+                        mask = env.legal_action_mask()
+                        if random.rand() < 0.8:
+                            action = random.choice(np.flatnonzero(mask))
+                            _, _, done, info = env._step(action)
+                            self.assertFalse(info["illegal"])
+                            continue
+
+                        # An illegal action, possibly out of range.
+                        illegal = list(np.flatnonzero(~mask)) + [len(mask)]
+                        action = illegal[random.randint(len(illegal))]
+                        game_state = env.game_state
+                        before = (env.observation_sample(),
+                                  game_state.player_turn, game_state.num_tokens,
+                                  len(game_state.deck))
+                        current_reward = env.reward.current_reward(game_state)
+                        observation, reward, done, info = env._step(action)
+                        self.assertTrue(info["illegal"])
+                        after = (env.observation_sample(),
+                                 game_state.player_turn, game_state.num_tokens,
+                                 len(game_state.deck))
+                        if mode == "terminate":
+                            self.assertIsNone(observation)
+                            self.assertEqual(reward, -current_reward)
+                            self.assertTrue(done)
+                        elif mode == "noop":
+                            self.assertEqual(observation, before[0])
+                            self.assertEqual(reward, -2.5)
+                            self.assertFalse(done)
+                            self.assertEqual(after, before)
+                        else:
+                            # A legal action was played instead.
+                            self.assertNotEqual(after, before)
+
+    def test_profiling(self):
+        random = np.random.RandomState(0)
+        for env_class in ENV_CLASSES:
+            with self.subTest(env_class=env_class.__name__):
+                env = make_env(env_class, observation_mode="vector")
+                self.assertIsNone(env.perf_stats())
+                env.set_profiling()
+                env._reset()
+                num_steps = 0
+                done = False
+                while not done:
+                    action = random.choice(
+                        np.flatnonzero(env.legal_action_mask()))
+                    _, _, done, _ = env._step(action)
+                    num_steps += 1
+                stats = env.perf_stats()
+                self.assertEqual(stats["observation"]["count"], num_steps + 1)
+                # AI envs also play their partners' moves.
+                num_moves = stats["play_move"]["count"]
+                if env_class is hanabi_ai_env.HanabiAiEnv:
+                    self.assertEqual(num_moves, num_steps +
+                                     stats["ai_partner"]["count"])
+                else:
+                    self.assertEqual(num_moves, num_steps)
+                    self.assertNotIn("ai_partner", stats)
+                self.assertEqual(stats["resolve_action"]["count"], num_steps)
+                for phase in ["sample_to_action", "play_move", "reward"]:
+                    self.assertEqual(stats[phase]["count"], num_moves)
+                    self.assertGreater(stats[phase]["total"], 0)
+                self.assertIn("play_move", env.perf.summary())
+                env.set_profiling(False)
+                self.assertIsNone(env.perf_stats())
+
+    def test_reuse_game_states(self):
+        random = np.random.RandomState(0)
+        # Reused GameStates reset buffers sized by the config.
+        for use_deck_bank, env_class, config in itertools.product(
+                [True, False], ENV_CLASSES,
+                [hanabi_config.HANABI_CONFIG,
+                 hanabi_config.MINI_HANABI_CONFIG]):
+            with self.subTest(use_deck_bank=use_deck_bank,
+                              env_class=env_class.__name__, config=config):
+                env = make_env(env_class, config, use_deck_bank=use_deck_bank)
+                reuse_env = make_env(env_class, config,
+                                     use_deck_bank=use_deck_bank,
+                                     reuse_game_states=True)
+                game_states = set()
+                for _ in range(3):
+                    self.assertEqual(reuse_env._reset(), env._reset())
+                    game_states.add((id(reuse_env.game_state),
+                                     id(reuse_env.incremental_observation),
+                                     id(reuse_env.incremental_action_mask)))
+                    done = False
+                    while not done:
+                        action = random.choice(
+                            np.flatnonzero(env.legal_action_mask()))
+                        expected = env._step(action)
+                        result = reuse_env._step(action)
+                        self.assertEqual(result[:3], expected[:3])
+                        done = expected[2]
+                self.assertEqual(len(game_states), 1)
+
+if __name__ == "__main__":
+    unittest.main()
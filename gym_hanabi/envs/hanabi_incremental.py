@@ -0,0 +1,125 @@
+class IncrementalObservation(object):
+    """
+    Maintains the encoded observation of every player of a `hanabi.GameState`.
+
+    `spaces.observation_to_sample(game_state.to_observation())` rotates the
+    players and re-encodes every field of the observation from scratch. An
+    IncrementalObservation instead keeps the sample of every field (each
+    player's cards and info, the discarded and played cards) and, after every
+    move, updates only the fields that the move's `hanabi.MoveResult` says
+    were touched. `sample(player)` then assembles the observation sample of
+    `player` from the cached fields.
+
+    If `verify` is true, every assembled sample is checked against the full
+    rebuild.
+
+    An IncrementalObservation can be created without a game, and `reset` to
+    each new game, so that envs keep one for all their episodes.
+    """
+
+    def __init__(self, spaces, game_state=None, verify=False):
+        self.spaces = spaces
+        self.verify = verify
+        self.game_state = None
+        if game_state is not None:
+            self.reset(game_state)
+
+    def reset(self, game_state):
+        spaces = self.spaces
+        self.game_state = game_state
+        self.cards = [spaces.hand_cards_to_sample(player.cards)
+                          for player in game_state.players]
+        self.info = [spaces.hand_info_to_sample(player.info)
+                         for player in game_state.players]
+        if game_state.discarded_cards:
+            self.discarded_counts = spaces.card_int_counts_sample(
+                game_state.discard_counts)
+        else:
+            # New games have nothing discarded.
+            self.discarded_counts = [0] * spaces.num_card_indexes()
+        self.played_counts = spaces.cards_count_sample(
+            spaces.played_cards_list(game_state.played_cards))
+        self.discarded = tuple(self.discarded_counts)
+        self.played = tuple(self.played_counts)
+
+    def update(self, result):
+        """
+        Updates the cached fields after `self.game_state.play_move` returned
+        `result`.
+        """
+        spaces = self.spaces
+        target = result.target
+        who = self.game_state.players[target]
+        if result.card is None:
+            # An information move only changes the info of one hand.
+            self.info[target] = spaces.hand_info_to_sample(who.info)
+            return
+
+        index = result.move.index
+        self.cards[target] = spaces.update_hand_cards_sample(
+            self.cards[target], index, result.card, who.cards[-1])
+        self.info[target] = spaces.update_hand_info_sample(
+            self.info[target], index, result.info, who.info[-1])
+        card_index = spaces.card_index(result.card)
+        if result.played:
+            self.played_counts[card_index] += 1
+            self.played = tuple(self.played_counts)
+        else:
+            self.discarded_counts[card_index] += 1
+            self.discarded = tuple(self.discarded_counts)
+
+    def full_sample(self, player):
+        """
+        Rebuilds the observation sample of `player` from scratch.
+        """
+        assert player == self.game_state.player_turn, player
+        observation = self.game_state.to_observation()
+        return self.spaces.observation_to_sample(observation)
+
+    def sample(self, player):
+        game_state = self.game_state
+        num_players = len(game_state.players)
+        others = [(player + i) % num_players for i in range(1, num_players)]
+        sample = self.spaces.assemble_sample(
+            game_state.num_tokens,
+            game_state.num_fuses,
+            self.discarded,
+            self.played,
+            self.info[player],
+            [(self.cards[p], self.info[p]) for p in others])
+        if self.verify:
+            expected = self.full_sample(player)
+            assert sample == expected, (sample, expected)
+        return sample
+
+class IncrementalActionMask(object):
+    """
+    Maintains the legal action mask (see `Spaces.legal_action_mask`) of every
+    player of a `hanabi.GameState`. The information actions only depend on the
+    number of tokens, and the discard and play actions only depend on the
+    player's hand, so a player's hand mask is only recomputed when a move
+    changes that player's hand. Like an IncrementalObservation, it can be
+    created without a game.
+    """
+
+    def __init__(self, spaces, game_state=None):
+        self.spaces = spaces
+        self.game_state = None
+        if game_state is not None:
+            self.reset(game_state)
+
+    def reset(self, game_state):
+        self.game_state = game_state
+        self.hand_masks = [self.spaces.hand_action_mask(player.cards)
+                               for player in game_state.players]
+
+    def update(self, result):
+        if result.card is not None:
+            who = self.game_state.players[result.target]
+            self.hand_masks[result.target] = \
+                self.spaces.hand_action_mask(who.cards)
+
+    def mask(self, player):
+        assert player == self.game_state.player_turn, player
+        return self.spaces.legal_action_mask(self.game_state,
+                                             self.hand_masks[player])
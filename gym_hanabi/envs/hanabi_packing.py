@@ -0,0 +1,89 @@
+import gym.spaces
+import numpy as np
+
+from gym_hanabi.envs import hanabi_spaces
+
+class ObservationPacker(object):
+    """
+    Packs observation samples into compact byte strings for storing
+    trajectories.
+
+    Every leaf of an observation sample is a small int bounded by its
+    Discrete space (see `hanabi_spaces.discrete_leaves`), so a leaf with n
+    values fits in ceil(log2(n)) bits. A packed observation is the
+    concatenation of the bit fields of all its leaves, in the same order and
+    with the same tokens convention as `Spaces.encode_into`, padded to a
+    whole number of bytes. Packing and unpacking work on (N, ...) arrays at
+    once.
+
+    >>> from gym_hanabi.envs import hanabi_config
+    >>> spaces = hanabi_spaces.NestedSpaces(hanabi_config.HANABI_CONFIG)
+    >>> ObservationPacker(spaces).num_bytes
+    21
+    """
+
+    def __init__(self, spaces):
+        self.spaces = spaces
+        leaf_sizes = np.array(spaces.tables().leaf_sizes)
+        self.widths = np.maximum(
+            1, np.ceil(np.log2(np.maximum(leaf_sizes, 1))).astype(np.int64))
+        self.num_leaves = len(self.widths)
+        self.num_bits = int(self.widths.sum())
+        self.num_bytes = (self.num_bits + 7) // 8
+
+        # Bit i of a packed observation is bit `bit_shifts[i]` of leaf
+        # `bit_leaves[i]`, most significant bit first.
+        self.starts = np.concatenate([[0], np.cumsum(self.widths)[:-1]])
+        self.bit_leaves = np.repeat(np.arange(self.num_leaves), self.widths)
+        self.bit_shifts = (np.repeat(self.starts + self.widths, self.widths) -
+                           np.arange(self.num_bits) - 1)
+
+    def pack_leaves(self, leaves):
+        """
+        Packs an (N, number of leaves) array of sample leaves (see
+        `Spaces.sample_to_leaves`) into an (N, `num_bytes`) uint8 array.
+        """
+        leaves = np.asarray(leaves, dtype=np.int64).copy()
+        leaves[:, :2] += 1
+        bits = (leaves[:, self.bit_leaves] >> self.bit_shifts) & 1
+        return np.packbits(bits.astype(np.uint8), axis=1)
+
+    def pack(self, samples):
+        leaves = [self.spaces.sample_to_leaves(s) for s in samples]
+        leaves = np.array(leaves, dtype=np.int64).reshape(len(samples), -1)
+        return self.pack_leaves(leaves)
+
+    def unpack_leaves(self, packed):
+        """
+        Inverse of `pack_leaves`.
+        """
+        packed = np.asarray(packed, dtype=np.uint8).reshape(-1, self.num_bytes)
+        bits = np.unpackbits(packed, axis=1)[:, :self.num_bits]
+        values = bits.astype(np.int64) << self.bit_shifts
+        leaves = np.add.reduceat(values, self.starts, axis=1)
+        leaves[:, :2] -= 1
+        return leaves
+
+    def unpack_vectors(self, packed, dtype=np.float32):
+        """
+        Unpacks straight to vector encodings, like `Spaces.encode_batch`.
+        """
+        return self.spaces.encode_leaves_batch(self.unpack_leaves(packed),
+                                               dtype)
+
+    def unpack(self, packed):
+        """
+        Unpacks to a list of observation samples.
+        """
+        space = self.spaces.observation_space()
+        return [leaves_to_sample(space, iter(row.tolist()))
+                    for row in self.unpack_leaves(packed)]
+
+def leaves_to_sample(space, leaves):
+    """
+    Rebuilds a sample of the (nested) Tuple space `space` from an iterator
+    over its leaves. Inverse of `hanabi_spaces.sample_leaves`.
+    """
+    if isinstance(space, gym.spaces.Tuple):
+        return tuple(leaves_to_sample(s, leaves) for s in space.spaces)
+    return next(leaves)
@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi_env_test
+from gym_hanabi.envs import hanabi_packing
+
+class TestObservationPacker(unittest.TestCase):
+    def test_round_trip(self):
+        random = np.random.RandomState(0)
+        for env in hanabi_env_test.make_self_envs():
+            samples = []
+            for _ in range(3):
+                samples.append(env._reset())
+                done = False
+                while not done:
+                    action = random.choice(np.flatnonzero(
+                        env.legal_action_mask()))
+                    observation, _, done, _ = env._step(action)
+                    samples.append(observation)
+
+            packer = hanabi_packing.ObservationPacker(env.spaces)
+            packed = packer.pack(samples)
+            self.assertEqual(packed.shape, (len(samples), packer.num_bytes))
+            self.assertEqual(packed.dtype, np.uint8)
+            self.assertEqual(packer.unpack(packed), samples)
+            self.assertTrue(np.array_equal(packer.unpack_vectors(packed),
+                                           env.spaces.encode_batch(samples)))
+
+if __name__ == "__main__":
+    unittest.main()
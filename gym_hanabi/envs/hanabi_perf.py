@@ -0,0 +1,99 @@
+import collections
+import time
+
+class PerfStats(object):
+    """
+    Per-phase counters and timers of a HanabiEnv's steps (see
+    `HanabiEnv.set_profiling`).
+
+    Every phase keeps the number of times it ran and its total time. Phases
+    recorded with `add_latency` also keep a histogram of their latencies
+    with power-of-two buckets: bucket 0 counts latencies under 1us, and
+    bucket b > 0 counts latencies in [2^(b - 1), 2^b) us.
+
+    >>> perf = PerfStats()
+    >>> perf.add("play_move", 0.5)
+    >>> perf.add("play_move", 1.5)
+    >>> perf.add_latency("ai_partner", 0.000003)
+    >>> stats = perf.stats()
+    >>> stats["play_move"]["count"], stats["play_move"]["total"]
+    (2, 2.0)
+    >>> stats["ai_partner"]["histogram"]
+    [0, 0, 1]
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.counts = collections.OrderedDict()
+        self.totals = collections.OrderedDict()
+        self.histograms = {}
+
+    def add(self, phase, elapsed):
+        if phase in self.counts:
+            self.counts[phase] += 1
+            self.totals[phase] += elapsed
+        else:
+            self.counts[phase] = 1
+            self.totals[phase] = elapsed
+
+    def add_latency(self, phase, elapsed):
+        self.add(phase, elapsed)
+        bucket = int(elapsed * 1e6).bit_length()
+        histogram = self.histograms.setdefault(phase, [])
+        if bucket >= len(histogram):
+            histogram.extend([0] * (bucket + 1 - len(histogram)))
+        histogram[bucket] += 1
+
+    def record(self, phase, start):
+        """
+        Adds the time from `start` (a reading of `self.clock`) until now to
+        `phase`, and returns now.
+        """
+        now = self.clock()
+        self.add(phase, now - start)
+        return now
+
+    def stats(self):
+        """
+        Returns {phase -> {"count", "total", "mean"[, "histogram"]}}, with
+        times in seconds.
+        """
+        stats = collections.OrderedDict()
+        for phase, count in self.counts.items():
+            total = self.totals[phase]
+            stats[phase] = {"count": count, "total": total,
+                            "mean": total / count}
+            if phase in self.histograms:
+                stats[phase]["histogram"] = list(self.histograms[phase])
+        return stats
+
+    def summary(self):
+        """
+        Returns a human readable table of `stats()`.
+        """
+        stats = self.stats()
+        total = sum(s["total"] for s in stats.values())
+        lines = ["{:<18} {:>10} {:>10} {:>10} {:>6}".format(
+            "phase", "count", "total (s)", "mean (us)", "%")]
+        for phase, s in stats.items():
+            lines.append("{:<18} {:>10} {:>10.3f} {:>10.2f} {:>6.1f}".format(
+                phase, s["count"], s["total"], s["mean"] * 1e6,
+                100.0 * s["total"] / total if total else 0.0))
+        for phase, s in stats.items():
+            if "histogram" not in s:
+                continue
+            lines.append("{} latency:".format(phase))
+            for bucket, count in enumerate(s["histogram"]):
+                if count == 0:
+                    continue
+                low = 0 if bucket == 0 else 2 ** (bucket - 1)
+                lines.append("  {:>8}us - {:>8}us {:>10}".format(
+                    low, 2 ** bucket, count))
+        return "\n".join(lines)
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,176 @@
+import collections
+import re
+
+import termcolor
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_config
+
+# Clears the terminal and moves the cursor to the top left corner. Gym's
+# ANSI video recorder writes this before every frame.
+CLEAR = "\x1b[2J\x1b[1;1H"
+
+# Moves the cursor to the start of line {} (one-based) and clears the line.
+LINE = "\x1b[{};1H\x1b[2K"
+LINE_RE = re.compile("\x1b\\[(\\d+);1H\x1b\\[2K")
+
+# Per-config glyphs of the rendered cards, shared by every Renderer.
+Glyphs = collections.namedtuple(
+    "Glyphs",
+    [
+        "cards",  # {Card or None -> `hanabi.render_card`}
+        "piles",  # piles[color][height], the glyph of a played pile
+        "infos",  # {Information or None -> `hanabi.render_information`}
+    ])
+
+# config key -> Glyphs.
+GLYPHS = {}
+
+def glyphs(config):
+    key = hanabi_config.config_key(config)
+    cached = GLYPHS.get(key)
+    if cached is None:
+        cards = {None: hanabi.render_card(None)}
+        piles = {}
+        infos = {None: hanabi.render_information(None)}
+        for color in config.colors:
+            piles[color] = [termcolor.colored("--", color)]
+            for number in range(1, len(config.card_counts) + 1):
+                card = hanabi.Card(color, number)
+                cards[card] = hanabi.render_card(card)
+                piles[color].append(cards[card])
+        # Information has None fields for unknown colors and numbers.
+        for color in [None] + list(config.colors):
+            for number in [None] + list(range(1, len(config.card_counts) + 1)):
+                info = hanabi.Information(color, number)
+                infos[info] = hanabi.render_information(info)
+        cached = Glyphs(cards, piles, infos)
+        GLYPHS[key] = cached
+    return cached
+
+class Renderer(object):
+    """
+    Renders the frames of `hanabi.GameState.render`, but from the cached
+    glyphs of the config, and only re-renders the lines of the frame whose
+    part of the game state changed since the last frame.
+
+    `render` returns the whole frame. `diff` returns the frame as ANSI
+    escape sequences that turn the last frame into the new one: a cleared
+    screen and the whole frame the first time, and afterwards only the
+    changed lines, each prefixed by a cursor move to the line (see
+    `apply_diff`). Played in a terminal, the stream of diffs of every frame
+    shows the frames one after another.
+
+    A Renderer can render any game of its config, but diffs are relative to
+    the last frame that it rendered.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.glyphs = glyphs(config)
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the last frame, so that the next one is rendered in full.
+        """
+        self.keys = []
+        self.lines = []
+
+    def frame_keys(self, game_state):
+        """
+        Returns the parts of `game_state` that each line of its frame shows.
+        """
+        # Moves are compared with their types, since e.g. PlayMove(0) ==
+        # DiscardMove(0).
+        keys = [(type(move), move) for move in game_state.last_moves]
+        keys.append(len(game_state.deck))
+        keys.append(game_state.num_tokens)
+        keys.append(game_state.num_fuses)
+        keys.append(tuple(game_state.discarded_cards))
+        played = game_state.played_cards
+        keys.append(tuple(played.get(c, 0) for c in self.config.colors))
+        for i, player in enumerate(game_state.players):
+            keys.append((i == game_state.player_turn, tuple(player.cards)))
+            keys.append(tuple(player.info))
+        return keys
+
+    def render_line(self, index, key):
+        config = self.config
+        num_players = config.num_players
+        glyphs = self.glyphs
+        if index < num_players:
+            return " Player {}'s last move: {}".format(index, key[1])
+        index -= num_players
+        if index == 0:
+            return " deck:                 {}".format(key)
+        elif index == 1:
+            return " tokens:               {}/{}".format(key, config.max_tokens)
+        elif index == 2:
+            return " fuses:                {}/{}".format(key, config.max_fuses)
+        elif index == 3:
+            return " discarded:            {}".format(
+                " ".join(glyphs.cards[card] for card in key))
+        elif index == 4:
+            return " played:               {}".format(
+                " ".join(glyphs.piles[color][height] for color, height
+                             in zip(config.colors, key)))
+        player, info_line = divmod(index - 5, 2)
+        if info_line:
+            return " Player {} info:        {}".format(
+                player, " ".join(glyphs.infos[info] for info in key))
+        turn, cards = key
+        return "{}Player {} hand:        {}".format(
+            "*" if turn else " ", player,
+            " ".join(glyphs.cards[card] for card in cards))
+
+    def update(self, game_state):
+        """
+        Updates the lines of the last frame to the frame of `game_state`,
+        and returns the indexes of the lines that changed.
+        """
+        keys = self.frame_keys(game_state)
+        if len(keys) != len(self.keys):
+            self.keys = [None] * len(keys)
+            self.lines = [None] * len(keys)
+            changed = list(range(len(keys)))
+        else:
+            changed = [i for i, (key, last) in enumerate(zip(keys, self.keys))
+                           if key != last]
+        for i in changed:
+            self.lines[i] = self.render_line(i, keys[i])
+        self.keys = keys
+        return changed
+
+    def render(self, game_state):
+        self.update(game_state)
+        return "\n".join(self.lines)
+
+    def diff(self, game_state):
+        full = not self.lines
+        changed = self.update(game_state)
+        if full or len(changed) == len(self.lines):
+            return CLEAR + "\n".join(self.lines)
+        return "".join(LINE.format(i + 1) + self.lines[i] for i in changed)
+
+def apply_diff(lines, diff):
+    """
+    Returns the lines of the frame that `diff` (see `Renderer.diff`) turns
+    the frame `lines` into.
+
+    >>> apply_diff([], CLEAR + "a\\nb\\nc")
+    ['a', 'b', 'c']
+    >>> apply_diff(['a', 'b', 'c'], LINE.format(3) + "d" + LINE.format(1) + "e")
+    ['e', 'b', 'd']
+    """
+    if diff.startswith(CLEAR):
+        return diff[len(CLEAR):].split("\n")
+    lines = list(lines)
+    parts = LINE_RE.split(diff)
+    for number, line in zip(parts[1::2], parts[2::2]):
+        lines[int(number) - 1] = line
+    return lines
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
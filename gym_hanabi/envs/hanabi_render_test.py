@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_render
+from gym_hanabi.envs import hanabi_spaces
+from gym_hanabi.envs.hanabi_env_test import make_self_envs
+
+class TestRenderer(unittest.TestCase):
+    def test_matches_game_state_render(self):
+        random = np.random.RandomState(0)
+        for config in [hanabi_config.HANABI_CONFIG,
+                       hanabi_config.MINI_HANABI_3P_CONFIG]:
+            spaces = hanabi_spaces.NestedSpaces(config)
+            renderer = hanabi_render.Renderer(config)
+            diff_renderer = hanabi_render.Renderer(config)
+            lines = []
+            for seed in range(5):
+                game_state = hanabi.GameState(config,
+                                              np.random.RandomState(seed))
+                while True:
+                    frame = game_state.render()
+                    self.assertEqual(renderer.render(game_state), frame)
+                    lines = hanabi_render.apply_diff(
+                        lines, diff_renderer.diff(game_state))
+                    self.assertEqual("\n".join(lines), frame)
+                    if game_state.num_turns_left == 0:
+                        break
+                    mask = spaces.legal_action_mask(game_state)
+                    if not mask.any():
+                        break
+                    action = random.choice(np.flatnonzero(mask))
+                    game_state.play_move(spaces.sample_to_action(
+                        action, game_state.get_current_cards()),
+                        record_undo=True)
+                    # Undone moves change the frame back.
+                    if random.rand() < 0.1:
+                        game_state.undo()
+
+    def test_diff_is_compact(self):
+        config = hanabi_config.HANABI_CONFIG
+        game_state = hanabi.GameState(config, np.random.RandomState(0))
+        renderer = hanabi_render.Renderer(config)
+        first = renderer.diff(game_state)
+        self.assertTrue(first.startswith(hanabi_render.CLEAR))
+        self.assertEqual(renderer.diff(game_state), "")
+        number = game_state.players[1].cards[0].number
+        game_state.play_move(hanabi.InformNumberMove(number, 0))
+        # The last move, the tokens, the turn and the informed hand changed.
+        diff = renderer.diff(game_state)
+        self.assertEqual(len(hanabi_render.LINE_RE.findall(diff)), 5)
+        self.assertLess(len(diff), len(first))
+
+    def test_env_render_modes(self):
+        env = make_self_envs()[0]
+        env._reset()
+        env._step(np.flatnonzero(env.legal_action_mask())[0])
+        frame = env._render(mode="ansi").getvalue()
+        self.assertEqual(frame, env.game_state.render() + "\n")
+        # Diffs are relative to the last frame of either mode.
+        env._step(np.flatnonzero(env.legal_action_mask())[0])
+        lines = hanabi_render.apply_diff(frame[:-1].split("\n"), env._render(
+            mode="ansi_diff").getvalue())
+        self.assertEqual("\n".join(lines), env.game_state.render())
+
+if __name__ == "__main__":
+    unittest.main()
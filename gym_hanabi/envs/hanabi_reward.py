@@ -1,37 +1,106 @@
+import numpy as np
+
 class Reward(object):
-    def current_reward(self, game_state):
+    """
+    Every reward is a sum over the played piles of a function of the pile's
+    height. Subclasses implement `pile_reward`; the other methods look it up
+    in a table that every reward computes once per number of numbers.
+
+    A subclass may instead override `current_reward` with a reward that
+    isn't a sum over the piles. Then `is_pile_sum` is false, `delta` and the
+    batch methods don't apply, and the envs reward a move with the change in
+    `current_reward` (see `HanabiEnv.play_move`).
+    """
+
+    # Number of numbers -> list of pile rewards, set on the instance by
+    # pile_rewards, since a reward's piles may depend on its parameters.
+    pile_tables = None
+
+    def pile_reward(self, height):
         raise NotImplementedError()
 
+    def pile_rewards(self, num_numbers):
+        """
+        Returns the list [pile_reward(0), ..., pile_reward(num_numbers)].
+        """
+        if self.pile_tables is None:
+            self.pile_tables = {}
+        table = self.pile_tables.get(num_numbers)
+        if table is None:
+            table = [self.pile_reward(h) for h in range(num_numbers + 1)]
+            self.pile_tables[num_numbers] = table
+        return table
+
+    def is_pile_sum(self):
+        """
+        Returns whether `current_reward` is the sum of `pile_reward` over the
+        piles, which `delta` and the batch methods rely on.
+        """
+        return type(self).current_reward is Reward.current_reward
+
+    def current_reward(self, game_state):
+        table = self.pile_rewards(len(game_state.config.card_counts))
+        return sum(table[v] for v in game_state.played_cards.values())
+
+    def delta(self, config, move_result):
+        """
+        Returns the change in `current_reward` caused by the move of a game
+        of `config` that returned `move_result` (see
+        `hanabi.GameState.play_move`). Only a successfully played card
+        changes the reward.
+        """
+        if not move_result.played:
+            return 0
+        table = self.pile_rewards(len(config.card_counts))
+        height = move_result.card.number
+        return table[height] - table[height - 1]
+
+    def batch_current_reward(self, config, played):
+        """
+        Returns the current reward of many games at once, given an (N, colors)
+        array with the height of every pile (e.g. `BatchGameState.played`).
+        """
+        table = np.array(self.pile_rewards(len(config.card_counts)))
+        return table[played].sum(axis=1)
+
+    def batch_delta(self, config, played_before, played_after):
+        return (self.batch_current_reward(config, played_after) -
+                self.batch_current_reward(config, played_before))
+
     def illegal_move_reward(self, game_state):
         raise NotImplementedError()
 
+    def batch_illegal_move_reward(self, config, played):
+        """
+        Like `illegal_move_reward`, for many games at once. Every reward
+        takes away the current reward of an illegal move's game.
+        """
+        return -self.batch_current_reward(config, played)
+
 class ConstantReward(Reward):
-    def current_reward(self, game_state):
-        return game_state.current_score()
+    def pile_reward(self, height):
+        return height
 
     def illegal_move_reward(self, game_state):
         return -self.current_reward(game_state)
 
 class LinearReward(Reward):
-    def current_reward(self, game_state):
-        f = lambda v: sum(range(1, v + 1))
-        return sum(f(v) for v in game_state.played_cards.values())
+    def pile_reward(self, height):
+        return sum(range(1, height + 1))
 
     def illegal_move_reward(self, game_state):
         return -self.current_reward(game_state)
 
 class SquaredReward(Reward):
-    def current_reward(self, game_state):
-        f = lambda v: sum(x**2 for x in range(1, v + 1))
-        return sum(f(v) for v in game_state.played_cards.values())
+    def pile_reward(self, height):
+        return sum(x**2 for x in range(1, height + 1))
 
     def illegal_move_reward(self, game_state):
         return -self.current_reward(game_state)
 
 class SkewedReward(Reward):
-    def current_reward(self, game_state):
-        f = lambda v: sum(10**(x-1) for x in range(1, v + 1))
-        return sum(f(v) for v in game_state.played_cards.values())
+    def pile_reward(self, height):
+        return sum(10**(x-1) for x in range(1, height + 1))
 
     def illegal_move_reward(self, game_state):
         return -self.current_reward(game_state)
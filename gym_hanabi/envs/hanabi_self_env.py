@@ -1,24 +1,37 @@
 from gym_hanabi.envs import hanabi_env
+from gym_hanabi.envs import hanabi_incremental
 
 class HanabiSelfEnv(hanabi_env.HanabiEnv):
-    def __init__(self, config, reward, spaces):
+    def __init__(self, config, reward, spaces, verify_observations=False,
+                 use_deck_bank=False,
+                 observation_mode="sample", canonical_colors=False,
+                 illegal_move_mode="terminate", illegal_move_penalty=1.0,
+                 reuse_game_states=False):
+        assert illegal_move_mode in hanabi_env.ILLEGAL_MOVE_MODES, \
+            illegal_move_mode
         self.config = config
         self.reward = reward
         self.spaces = spaces
+        self.verify_observations = verify_observations
+        self.use_deck_bank = use_deck_bank
+        self.observation_mode = observation_mode
+        self.canonical_colors = canonical_colors
+        self.illegal_move_mode = illegal_move_mode
+        self.illegal_move_penalty = illegal_move_penalty
+        if reuse_game_states:
+            self.game_state_pool = hanabi_env.GameStatePool(config)
         self.action_space = spaces.action_space()
-        self.observation_space = spaces.observation_space()
+        self.observation_space = self.make_observation_space()
+        self.incremental_observation = \
+            hanabi_incremental.IncrementalObservation(
+                spaces, verify=verify_observations)
+        self.incremental_action_mask = \
+            hanabi_incremental.IncrementalActionMask(spaces)
         self._seed()
 
     def _step(self, action_sample):
-        try:
-            move = self.spaces.sample_to_action(action_sample,
-                    self.game_state.get_current_cards())
-            reward, done = self.play_move(move)
-            observation = self.game_state.to_observation()
-            observation_sample = self.spaces.observation_to_sample(observation)
-            info = {"game_state": self.game_state, "illegal": False}
-            return (observation_sample, reward, done, info)
-        except ValueError:
-            reward = self.reward.illegal_move_reward(self.game_state)
-            info = {"game_state": self.game_state, "illegal": True}
-            return (None, reward, True, info)
+        action, illegal = self.resolve_action(action_sample)
+        if action is None:
+            return self.illegal_step_result()
+        reward, done = self.play_action(action)
+        return self.step_result(reward, done, illegal)
@@ -1,38 +1,647 @@
 import collections
+import itertools
 
 import gym
 import gym.spaces
 import gym_hanabi
+import numpy as np
 from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_config
 from overrides import overrides
 
+# Lookup tables that a Spaces builds once per config. See Spaces.tables.
+SpacesTables = collections.namedtuple(
+    "SpacesTables",
+    [
+        "moves",         # move list, indexed by action
+        "move_ids",      # {(move type, move) -> action}
+        "kinds",         # NumPy array of hanabi.INFORM_COLOR, ..., hanabi.PLAY
+        "targets",       # NumPy array of relative players (for information
+                         # moves) and card indexes (for discards and plays)
+        "color_indexes", # {color -> index in config.colors}
+        "card_vector",   # card list, indexed by card index
+        "card_indexes",  # {(color, number) -> card index}
+        "card_int_indexes", # NumPy array mapping card ints to card indexes
+        "card_matches",  # NumPy bool array, true at [card index, card int]
+                         # if the card int matches the card (or information)
+        "leaf_sizes",    # n of every Discrete(n) leaf of observation_space()
+        "leaf_offsets",  # index of every leaf's one-hot in encode_into's
+                         # output (only used by NestedSpaces)
+    ])
+
+# (Spaces class, config key) -> SpacesTables. See Spaces.tables.
+SPACES_TABLES = {}
+
+# Functions that a Spaces generates once per config. Every function behaves
+# like the Spaces method of the same name. See Spaces.compile.
+CompiledSpaces = collections.namedtuple(
+    "CompiledSpaces",
+    [
+        "source",                # the generated Python source
+        "sample_to_leaves",      # (sample) -> list of ints
+        "encode_into",           # (sample, out) -> out
+        "observation_to_sample", # (observation) -> sample
+        "sample_to_observation", # (sample) -> observation
+    ])
+
+# (Spaces class, config key) -> CompiledSpaces. See Spaces.compile.
+COMPILED_SPACES = {}
+
+def discrete_leaves(space):
+    """
+    Returns the Discrete leaves of the (nested) Tuple space `space`, depth
+    first.
+    """
+    if isinstance(space, gym.spaces.Tuple):
+        return [leaf for s in space.spaces for leaf in discrete_leaves(s)]
+    assert isinstance(space, gym.spaces.Discrete), space
+    return [space]
+
+def sample_leaves(sample):
+    """
+    Yields the ints of the (nested) tuple `sample` in the same order that
+    `discrete_leaves` visits the leaves of the sample's space.
+    """
+    for s in sample:
+        if isinstance(s, tuple):
+            for leaf in sample_leaves(s):
+                yield leaf
+        else:
+            yield s
+
+class SourceWriter(object):
+    """
+    Accumulates the source of generated functions, and the constants (e.g.
+    dicts and cards) that the source refers to by name.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+
+    def constant(self, value):
+        name = "K{}".format(len(self.constants))
+        self.constants[name] = value
+        return name
+
+    def line(self, indent, text):
+        self.lines.append("    " * indent + text)
+
+    def unpack(self, indent, space, name, starred=False):
+        """
+        Writes statements which unpack the sample `name` of the (nested)
+        Tuple space `space` into one variable per leaf. Returns the names of
+        the variables, in `discrete_leaves` order. If `starred` is true,
+        tuples of leaves aren't unpacked and are returned as a single
+        starred expression (e.g. "*s_2") instead.
+        """
+        if not isinstance(space, gym.spaces.Tuple):
+            return [name]
+        if starred and not any(isinstance(s, gym.spaces.Tuple)
+                               for s in space.spaces):
+            return ["*" + name]
+        names = ["{}_{}".format(name, i) for i in range(len(space.spaces))]
+        self.line(indent, "{}, = {}".format(", ".join(names), name))
+        return [leaf for s, n in zip(space.spaces, names)
+                     for leaf in self.unpack(indent, s, n, starred)]
+
+    def counts_to_list(self, function_name, items):
+        """
+        Writes a function which maps a tuple of counts to the list of `items`
+        repeated by their counts, in order.
+        """
+        self.line(0, "def {}(v):".format(function_name))
+        names = ["v_{}".format(i) for i in range(len(items))]
+        self.line(1, "{}, = v".format(", ".join(names)))
+        self.line(1, "out = []")
+        for name, item in zip(names, items):
+            self.line(1, "if {}:".format(name))
+            self.line(2, "out += {} * {}".format(self.constant([item]), name))
+        self.line(1, "return out")
+
+    def source(self):
+        return "\n".join(self.lines) + "\n"
+
 class Spaces(object):
     def __init__(self, config):
         self.config = config
+        self._tables = None
+        self._compiled = None
 
-    def observation_space(self):
+    def moves(self):
         raise NotImplementedError()
 
-    def observation_to_sample(self, observation):
+    def card_vector(self):
+        """
+        Returns the list of cards (or information) that the discarded and
+        played card samples count, indexed by `card_index`.
+        """
         raise NotImplementedError()
 
-    def sample_to_observation(self, sample):
+    def tables(self):
+        """
+        Returns the SpacesTables of this space's config. The tables are built
+        from `moves` and `card_vector` the first time they are needed and
+        shared by every Spaces of the same class and config, so encoding and
+        decoding moves and cards are dictionary and list lookups. The tables
+        must not be modified.
+        """
+        if self._tables is None:
+            key = (type(self), hanabi_config.config_key(self.config))
+            tables = SPACES_TABLES.get(key)
+            if tables is None:
+                tables = self.build_tables()
+                SPACES_TABLES[key] = tables
+            self._tables = tables
+        return self._tables
+
+    def build_tables(self):
+        moves = tuple(self.moves())
+        kinds = np.empty(len(moves), dtype=np.int8)
+        targets = np.empty(len(moves), dtype=np.int16)
+        for i, move in enumerate(moves):
+            if isinstance(move, hanabi.InformColorMove):
+                kinds[i], targets[i] = hanabi.INFORM_COLOR, move.player
+            elif isinstance(move, hanabi.InformNumberMove):
+                kinds[i], targets[i] = hanabi.INFORM_NUMBER, move.player
+            elif isinstance(move, hanabi.DiscardMove):
+                kinds[i], targets[i] = hanabi.DISCARD, move.index
+            else:
+                assert isinstance(move, hanabi.PlayMove), move
+                kinds[i], targets[i] = hanabi.PLAY, move.index
+        kinds.flags.writeable = False
+        targets.flags.writeable = False
+
+        card_vector = tuple(self.card_vector())
+        num_cards = len(self.config.colors) * len(self.config.card_counts)
+        card_matches = np.zeros((len(card_vector), num_cards), dtype=bool)
+        for i, info in enumerate(card_vector):
+            for c in range(num_cards):
+                card = hanabi.int_to_card(self.config, c)
+                card_matches[i, c] = (
+                    (info.color is None or info.color == card.color) and
+                    (info.number is None or info.number == card.number))
+        card_matches.flags.writeable = False
+        card_indexes = {tuple(card): i for i, card in enumerate(card_vector)}
+        card_int_indexes = np.array(
+            [card_indexes[hanabi.int_to_card(self.config, c)]
+                 for c in range(num_cards)])
+        card_int_indexes.flags.writeable = False
+
+        # The tokens and fuses leaves hold num_tokens - 1 and num_fuses - 1,
+        # which are -1 when there are no tokens or fuses left, so vectors
+        # encode num_tokens and num_fuses instead (see encode_into).
+        leaf_sizes = [int(leaf.n) for leaf in
+                          discrete_leaves(self.observation_space())]
+        leaf_sizes[0] = self.config.max_tokens + 1
+        leaf_sizes[1] = self.config.max_fuses + 1
+        leaf_offsets = [int(o) for o in np.cumsum([0] + leaf_sizes[:-1])]
+        leaf_offsets[0] += 1
+        leaf_offsets[1] += 1
+        return SpacesTables(
+            moves=moves,
+            # Moves are keyed by type too since e.g. DiscardMove(0) and
+            # PlayMove(0) are equal tuples.
+            move_ids={(type(move), move): i for i, move in enumerate(moves)},
+            kinds=kinds,
+            targets=targets,
+            color_indexes={c: i for i, c in enumerate(self.config.colors)},
+            card_vector=card_vector,
+            card_indexes=card_indexes,
+            card_int_indexes=card_int_indexes,
+            card_matches=card_matches,
+            leaf_sizes=tuple(leaf_sizes),
+            leaf_offsets=tuple(leaf_offsets))
+
+    def compile(self):
+        """
+        Returns the CompiledSpaces of this space's config: versions of
+        `sample_to_leaves`, `encode_into`, `observation_to_sample` and
+        `sample_to_observation` generated for the config, with the sample
+        layout unrolled and the sizes, offsets and lookup tables baked in as
+        constants. Like the tables, the functions are generated once and
+        shared by every Spaces of the same class and config.
+        """
+        if self._compiled is None:
+            key = (type(self), hanabi_config.config_key(self.config))
+            compiled = COMPILED_SPACES.get(key)
+            if compiled is None:
+                compiled = self.build_compiled()
+                COMPILED_SPACES[key] = compiled
+            self._compiled = compiled
+        return self._compiled
+
+    def build_compiled(self):
+        writer = SourceWriter()
+        self.write_compiled(writer)
+        source = writer.source()
+        namespace = dict(writer.constants)
+        namespace.update(collections=collections, hanabi=hanabi)
+        name = "<compiled {}>".format(type(self).__name__)
+        exec(compile(source, name, "exec"), namespace)
+        return CompiledSpaces(
+            source=source,
+            sample_to_leaves=namespace["sample_to_leaves"],
+            encode_into=namespace["encode_into"],
+            observation_to_sample=namespace["observation_to_sample"],
+            sample_to_observation=namespace["sample_to_observation"])
+
+    def write_compiled(self, writer):
+        tables = self.tables()
+        space = self.observation_space()
+        c = self.config
+        num_players = c.num_players - 1
+
+        writer.line(0, "def sample_to_leaves(s):")
+        leaves = writer.unpack(1, space, "s", starred=True)
+        writer.line(1, "return [{}]".format(", ".join(leaves)))
+
+        writer.line(0, "def encode_into(s, out):")
+        self.write_encode_into(writer, space)
+        writer.line(1, "return out")
+
+        # Subclasses write hand_cards_to_sample, hand_info_to_sample,
+        # sample_to_hand_cards and sample_to_hand_info.
+        self.write_hand_functions(writer)
+
+        card_indexes = writer.constant(tables.card_indexes)
+        played_indexes = writer.constant({
+            (color, height): tuple(tables.card_indexes[(color, number)]
+                                       for number in range(1, height + 1))
+            for color in c.colors
+            for height in range(len(c.card_counts) + 1)})
+        num_card_indexes = len(tables.card_vector)
+        players = ["p{}".format(i) for i in range(num_players)]
+        writer.line(0, "def observation_to_sample(obs):")
+        writer.line(1, "discarded = [0] * {}".format(num_card_indexes))
+        writer.line(1, "for card in obs.discarded_cards:")
+        writer.line(2, "discarded[{}[card]] += 1".format(card_indexes))
+        writer.line(1, "played = [0] * {}".format(num_card_indexes))
+        writer.line(1, "for item in obs.played_cards.items():")
+        writer.line(2, "for i in {}[item]:".format(played_indexes))
+        writer.line(3, "played[i] += 1")
+        writer.line(1, "{}, = obs.players".format(", ".join(players)))
+        writer.line(1, "return (obs.num_tokens - 1, obs.num_fuses - 1, "
+                       "tuple(discarded), tuple(played), "
+                       "hand_info_to_sample(obs.your_info), " + "".join(
+                           "hand_cards_to_sample({0}.cards), "
+                           "hand_info_to_sample({0}.info), ".format(p)
+                           for p in players) + ")")
+
+        # Discarded cards are decoded as cards, even by FlattenedSpaces whose
+        # card vector holds informations.
+        writer.counts_to_list("sample_to_cards", [
+            hanabi.Card(card.color, card.number)
+                for card in tables.card_vector])
+        players = ["s{}".format(i) for i in range(5 + 2 * num_players)]
+        writer.line(0, "def sample_to_observation(s):")
+        writer.line(1, "{}, = s".format(", ".join(players)))
+        played = writer.unpack(1, space.spaces[3], players[3])
+        writer.line(1, "played = collections.defaultdict(int)")
+        for color in c.colors:
+            # Every color's pile is its highest played number.
+            keyword = "if"
+            for number in range(len(c.card_counts), 0, -1):
+                leaf = played[tables.card_indexes[(color, number)]]
+                writer.line(1, "{} {}:".format(keyword, leaf))
+                writer.line(2, "played[{!r}] = {}".format(color, number))
+                keyword = "elif"
+        writer.line(1, "return hanabi.Observation({} + 1, {} + 1, "
+                       "sample_to_cards({}), played, "
+                       "sample_to_hand_info({}), [".format(*players[:3] +
+                                                           players[4:5]))
+        for cards, info in zip(players[5::2], players[6::2]):
+            writer.line(2, "hanabi.Hand(sample_to_hand_cards({}), "
+                           "sample_to_hand_info({})),".format(cards, info))
+        writer.line(1, "])")
+
+    def write_encode_into(self, writer, space):
+        """
+        Writes the body of the compiled `encode_into`, whose sample `s` is a
+        sample of `space`.
+        """
         raise NotImplementedError()
 
-    def action_space(self):
+    def write_hand_functions(self, writer):
         raise NotImplementedError()
 
     def action_to_sample(self, move):
+        action = self.tables().move_ids.get((type(move), move))
+        if action is None:
+            raise ValueError("Unexpected move {}.".format(move))
+        return action
+
+    def observation_space(self):
+        raise NotImplementedError()
+
+    def sample_to_observation(self, sample):
+        raise NotImplementedError()
+
+    def action_space(self):
         raise NotImplementedError()
 
     def sample_to_action(self, sample, cards):
         raise NotImplementedError()
 
+    def num_information_moves(self):
+        """
+        Every action space starts with the information moves, laid out like
+        `hanabi.move_tables`. The remaining actions are discards and plays.
+        """
+        c = self.config
+        return (len(c.colors) + len(c.card_counts)) * (c.num_players - 1)
+
+    def hand_action_mask(self, cards):
+        """
+        Returns a NumPy bool mask over the discard and play actions which is
+        true for the actions that are legal for a player holding `cards`.
+        """
+        raise NotImplementedError()
+
+    def legal_action_mask(self, game_state, hand_mask=None):
+        """
+        Returns a NumPy bool mask over `action_space()` which is true for the
+        actions that the current player of `game_state` can legally take. If
+        `hand_mask` is given, it is used in place of
+        `hand_action_mask(game_state.get_current_cards())`.
+        """
+        if hand_mask is None:
+            hand_mask = self.hand_action_mask(game_state.get_current_cards())
+        num_information_moves = self.num_information_moves()
+        mask = np.empty(num_information_moves + len(hand_mask), dtype=bool)
+        mask[:num_information_moves] = game_state.num_tokens > 0
+        mask[num_information_moves:] = hand_mask
+        return mask
+
+    # Besides nested tuples, observation samples can be encoded as flat NumPy
+    # vectors. The layout of the vector follows the Discrete leaves of
+    # `observation_space()`, depth first: tokens, fuses, the discarded cards,
+    # the played cards, your info, and then the cards and info of every other
+    # player, starting with the next player. NestedSpaces one-hot encodes
+    # every leaf, so a Discrete(n) leaf takes up n entries; FlattenedSpaces
+    # stores every leaf's count in a single entry. The only exceptions are the
+    # tokens and fuses leaves, which are encoded as the number of tokens (0 to
+    # max_tokens) and fuses (0 to max_fuses) rather than the sample's
+    # num_tokens - 1 and num_fuses - 1. The layout only depends on the config.
+    def encoding_size(self):
+        raise NotImplementedError()
+
+    def encoding_space(self, dtype=np.float32):
+        """
+        Returns the Box space of `encode_into`'s vectors.
+        """
+        raise NotImplementedError()
+
+    def encode_into(self, sample, out):
+        """
+        Writes the vector encoding of the observation sample `sample` (e.g.
+        from `observation_to_sample`) into `out`, a NumPy vector of
+        `encoding_size()` entries of any numeric dtype, filling `out` in
+        place. Returns `out`.
+        """
+        raise NotImplementedError()
+
+    def sample_to_leaves(self, sample):
+        """
+        Returns the list of ints of `sample`, like `sample_leaves`.
+        """
+        return list(sample_leaves(sample))
+
+    def encode(self, sample, dtype=np.float32):
+        out = np.empty(self.encoding_size(), dtype=dtype)
+        return self.encode_into(sample, out)
+
+    def encode_batch(self, samples, dtype=np.float32):
+        """
+        Returns an (N, `encoding_size()`) array with the vector encodings of
+        the N observation samples `samples`.
+        """
+        leaves = np.array([self.sample_to_leaves(s) for s in samples],
+                          dtype=np.int64).reshape(len(samples), -1)
+        return self.encode_leaves_batch(leaves, dtype)
+
+    def encode_leaves_batch(self, leaves, dtype):
+        """
+        Encodes an (N, number of leaves) array of `sample_leaves`.
+        """
+        raise NotImplementedError()
+
+    def hand_slots_batch(self, card_indexes, hands):
+        """
+        Given an array of N discard or play move targets (see
+        `SpacesTables.targets`) and an (N, hand size) array of card ints,
+        returns a pair (slots, matched) of arrays: the hand slot every move
+        refers to, and whether such a slot exists.
+        """
+        raise NotImplementedError()
+
+    def decode_actions_batch(self, actions, hands):
+        """
+        Decodes the actions of N games at once. `hands` is an (N, hand size)
+        array with the card ints (see `hanabi.card_to_int`) of the acting
+        player of every game, e.g. the current player's row of
+        `BatchGameState.hands`. Returns an array with the move id (see
+        `hanabi.move_to_id`) of every action, or -1 if the action is out of
+        range or refers to a card that the hand doesn't have.
+
+        Unlike `sample_to_action`, this never raises.
+        """
+        tables = self.tables()
+        actions = np.asarray(actions)
+        hands = np.asarray(hands)
+        valid = (actions >= 0) & (actions < len(tables.moves))
+        safe_actions = np.where(valid, actions, 0)
+        kinds = tables.kinds[safe_actions]
+        targets = tables.targets[safe_actions]
+
+        # The information moves come first and are laid out identically in
+        # every space.
+        num_information_moves = self.num_information_moves()
+        move_ids = safe_actions.astype(np.int64)
+        card_moves = kinds >= hanabi.DISCARD
+        slots, matched = self.hand_slots_batch(targets[card_moves],
+                                               hands[card_moves])
+        move_ids[card_moves] = (
+            num_information_moves + slots +
+            (kinds[card_moves] == hanabi.PLAY) * self.config.hand_size)
+        valid[card_moves] &= matched
+        move_ids[~valid] = -1
+        return move_ids
+
+    def legal_action_mask_batch(self, num_tokens, hands):
+        """
+        Returns an (N, `action_space().n`) bool array of legal action masks
+        (see `legal_action_mask`), given N numbers of tokens and an (N, hand
+        size) array of the acting players' card ints.
+        """
+        num_actions = len(self.tables().moves)
+        actions = np.tile(np.arange(num_actions), len(hands))
+        hands = np.repeat(np.asarray(hands), num_actions, axis=0)
+        mask = (self.decode_actions_batch(actions, hands) >= 0).reshape(
+            -1, num_actions)
+        mask[:, :self.num_information_moves()] &= \
+            (np.asarray(num_tokens) > 0)[:, np.newaxis]
+        return mask
+
+    def batch_to_leaves(self, batch):
+        """
+        Returns an (N, number of leaves) array whose row i holds the
+        `sample_to_leaves` of the current player's observation in game i of
+        `batch`, a `hanabi_batch.BatchGameState`. Pass it to
+        `encode_leaves_batch` to encode the observations of every game
+        without building any samples.
+        """
+        tables = self.tables()
+        c = self.config
+        num_numbers = len(c.card_counts)
+        rows = np.arange(batch.num_games)[:, np.newaxis]
+
+        # The card indexes of the card ints are distinct, so discarded and
+        # played counts are scattered rather than summed.
+        card_ints = np.arange(len(c.colors) * num_numbers)
+        num_card_indexes = len(tables.card_vector)
+        discarded = np.zeros((batch.num_games, num_card_indexes), np.int64)
+        discarded[:, tables.card_int_indexes] = batch.discard_counts
+        played = np.zeros((batch.num_games, num_card_indexes), np.int64)
+        played[:, tables.card_int_indexes] = (
+            batch.played[:, card_ints // num_numbers] > card_ints % num_numbers)
+
+        # Players relative to the current player, like `to_observation`.
+        who = ((batch.player_turn[:, np.newaxis] + np.arange(c.num_players)) %
+               c.num_players)
+        hands = batch.hands[rows, who]
+        info_colors = batch.info_colors[rows, who]
+        info_numbers = batch.info_numbers[rows, who]
+
+        leaves = [batch.num_tokens[:, np.newaxis] - 1,
+                  batch.num_fuses[:, np.newaxis] - 1,
+                  discarded,
+                  played,
+                  self.batch_info_leaves(hands[:, 0], info_colors[:, 0],
+                                         info_numbers[:, 0])]
+        for p in range(1, c.num_players):
+            leaves.append(self.batch_cards_leaves(hands[:, p]))
+            leaves.append(self.batch_info_leaves(hands[:, p], info_colors[:, p],
+                                                 info_numbers[:, p]))
+        return np.concatenate([np.asarray(l, np.int64) for l in leaves],
+                              axis=1)
+
+    def batch_cards_leaves(self, cards):
+        """
+        Returns the leaves of the hand cards samples of an (N, hand size)
+        array of card ints.
+        """
+        raise NotImplementedError()
+
+    def batch_info_leaves(self, cards, info_colors, info_numbers):
+        """
+        Returns the leaves of the hand info samples of N hands, given arrays
+        like `BatchGameState.hands`, `info_colors` and `info_numbers`.
+        """
+        raise NotImplementedError()
+
+    def possible_cards_to_sample(self, possible):
+        """
+        Returns a NumPy bool array of shape (hand size, colors * numbers)
+        whose row i is true for the cards that slot i could hold, given
+        `possible`, a list of bitmasks like `hanabi.Hand.possible`. Columns
+        are indexed by `hanabi.card_to_int`.
+        """
+        num_cards = len(self.config.colors) * len(self.config.card_counts)
+        bits = np.arange(num_cards, dtype=np.int64)
+        possible = np.asarray(possible, dtype=np.int64).reshape(-1, 1)
+        return ((possible >> bits) & 1).astype(bool)
+
+    # An observation sample is assembled from smaller samples, one per field
+    # of the observation. The methods below encode (and update) individual
+    # fields so that an observation sample can be maintained incrementally
+    # (see hanabi_incremental.py) instead of being rebuilt after every move.
+    def hand_cards_to_sample(self, cards):
+        raise NotImplementedError()
+
+    def hand_info_to_sample(self, info):
+        raise NotImplementedError()
+
+    def update_hand_cards_sample(self, sample, index, removed, added):
+        """
+        Returns `sample`, the sample of a hand's cards, after the card
+        `removed` at `index` is removed and the card `added` is dealt.
+        """
+        raise NotImplementedError()
+
+    def update_hand_info_sample(self, sample, index, removed, added):
+        """
+        Like `update_hand_cards_sample` but for a hand's info.
+        """
+        raise NotImplementedError()
+
+    def card_index(self, card):
+        """
+        Returns the index of `card` in the discarded and played card samples.
+        """
+        return self.tables().card_indexes[card]
+
+    def num_card_indexes(self):
+        return len(self.tables().card_vector)
+
+    def cards_count_sample(self, cards):
+        """
+        Returns a list with the number of each card in `cards`, indexed by
+        `card_index`.
+        """
+        card_indexes = self.tables().card_indexes
+        counts = [0] * len(card_indexes)
+        for card in cards:
+            counts[card_indexes[card]] += 1
+        return counts
+
+    def card_int_counts_sample(self, card_int_counts):
+        """
+        Like `cards_count_sample`, but given the number of each card indexed
+        by card int, e.g. `hanabi.GameState.discard_counts`.
+        """
+        counts = np.bincount(self.tables().card_int_indexes,
+                             weights=card_int_counts,
+                             minlength=self.num_card_indexes())
+        return [int(n) for n in counts]
+
+    def played_cards_list(self, played_cards):
+        return [hanabi.Card(color, number)
+                    for color, count in played_cards.items()
+                    for number in range(1, count + 1)]
+
+    def assemble_sample(self, num_tokens, num_fuses, discarded_sample,
+                        played_sample, your_info_sample, players_samples):
+        """
+        Assembles an observation sample from the samples of its fields.
+        `players_samples` is a list of (cards sample, info sample) pairs.
+        """
+        return (
+            num_tokens - 1,
+            num_fuses - 1,
+            discarded_sample,
+            played_sample,
+            your_info_sample,
+        ) + tuple(s for player in players_samples for s in player)
+
+    def observation_to_sample(self, obs):
+        played_cards = self.played_cards_list(obs.played_cards)
+        players = [(self.hand_cards_to_sample(player.cards),
+                    self.hand_info_to_sample(player.info))
+                   for player in obs.players]
+        return self.assemble_sample(
+            obs.num_tokens,
+            obs.num_fuses,
+            tuple(self.cards_count_sample(obs.discarded_cards)),
+            tuple(self.cards_count_sample(played_cards)),
+            self.hand_info_to_sample(obs.your_info),
+            players)
+
 
 class NestedSpaces(Spaces):
     def color_to_sample(self, color):
-        assert color in self.config.colors, color
-        return self.config.colors.index(color)
+        assert color in self.tables().color_indexes, color
+        return self.tables().color_indexes[color]
 
     def sample_to_color(self, sample):
         assert 0 <= sample < len(self.config.colors), sample
@@ -106,12 +715,17 @@ class NestedSpaces(Spaces):
         num_cards = len(self.unique_cards())
         return gym.spaces.Tuple(tuple([gym.spaces.Discrete(2)] * num_cards))
 
+    @overrides
+    def card_vector(self):
+        return self.unique_cards()
+
     def cards_to_sample(self, cards):
-        assert all(card in self.unique_cards() for card in cards), cards
-        return tuple([cards.count(card) for card in self.unique_cards()])
+        card_indexes = self.tables().card_indexes
+        assert all(card in card_indexes for card in cards), cards
+        return tuple(self.cards_count_sample(cards))
 
     def sample_to_cards(self, sample):
-        ucs = self.unique_cards()
+        ucs = self.tables().card_vector
         assert len(sample) == len(ucs)
         return [c for (card, count) in zip(ucs, sample) for c in [card] * count]
 
@@ -181,24 +795,21 @@ class NestedSpaces(Spaces):
         ) + other_players)
 
     @overrides
-    def observation_to_sample(self, obs):
-        played_cards = []
-        for color, count in obs.played_cards.items():
-            numbers = range(1, count + 1)
-            played_cards += [hanabi.Card(color, number) for number in numbers]
+    def hand_cards_to_sample(self, cards):
+        return tuple(self.card_to_sample(card) for card in cards)
 
-        players = []
-        for player in obs.players:
-            players.append(tuple(self.card_to_sample(card) for card in player.cards))
-            players.append(tuple(self.information_to_sample(info) for info in player.info))
+    @overrides
+    def hand_info_to_sample(self, info):
+        return tuple(self.information_to_sample(i) for i in info)
 
-        return (
-            obs.num_tokens - 1,
-            obs.num_fuses - 1,
-            self.cards_to_sample(obs.discarded_cards),
-            self.cards_to_sample(played_cards),
-            tuple(self.information_to_sample(i) for i in obs.your_info),
-        ) + tuple(players)
+    @overrides
+    def update_hand_cards_sample(self, sample, index, removed, added):
+        return sample[:index] + sample[index + 1:] + (self.card_to_sample(added),)
+
+    @overrides
+    def update_hand_info_sample(self, sample, index, removed, added):
+        return (sample[:index] + sample[index + 1:] +
+                (self.information_to_sample(added),))
 
     @overrides
     def sample_to_observation(self, sample):
@@ -235,6 +846,99 @@ class NestedSpaces(Spaces):
         return hanabi.Observation(num_tokens, num_fuses, discarded_cards,
                                   played_cards, your_info, players)
 
+    @overrides
+    def encoding_size(self):
+        return sum(self.tables().leaf_sizes)
+
+    @overrides
+    def encoding_space(self, dtype=np.float32):
+        return gym.spaces.Box(0, 1, (self.encoding_size(),), dtype=dtype)
+
+    @overrides
+    def encode_into(self, sample, out):
+        out.fill(0)
+        for offset, value in zip(self.tables().leaf_offsets,
+                                 self.sample_to_leaves(sample)):
+            out[offset + value] = 1
+        return out
+
+    @overrides
+    def sample_to_leaves(self, sample):
+        # Tokens, fuses, the discarded and played counts, and then hands of
+        # (color, number) pairs.
+        leaves = list(sample[:2])
+        leaves.extend(sample[2])
+        leaves.extend(sample[3])
+        for hand in sample[4:]:
+            leaves.extend(itertools.chain.from_iterable(hand))
+        return leaves
+
+    @overrides
+    def encode_leaves_batch(self, leaves, dtype):
+        out = np.zeros((len(leaves), self.encoding_size()), dtype=dtype)
+        offsets = np.array(self.tables().leaf_offsets)
+        rows = np.arange(len(leaves))[:, np.newaxis]
+        out[rows, offsets + leaves] = 1
+        return out
+
+    @overrides
+    def write_encode_into(self, writer, space):
+        leaves = writer.unpack(1, space, "s")
+        offsets = self.tables().leaf_offsets
+        writer.line(1, "out.fill(0)")
+        writer.line(1, "out.put([{}], 1)".format(", ".join(
+            "{} + {}".format(o, leaf) for o, leaf in zip(offsets, leaves))))
+
+    @overrides
+    def write_hand_functions(self, writer):
+        cards = self.unique_cards() + [None]
+        infos = [hanabi.Information(color, number)
+                     for color in self.config.colors + [None]
+                     for number in list(range(1, len(self.config.card_counts) +
+                                                 1)) + [None]] + [None]
+        functions = [
+            ("hand_cards_to_sample",
+             {card: self.card_to_sample(card) for card in cards}),
+            ("hand_info_to_sample",
+             {info: self.information_to_sample(info) for info in infos}),
+            ("sample_to_hand_cards",
+             {self.card_to_sample(card): card for card in cards}),
+            ("sample_to_hand_info",
+             {self.information_to_sample(info): info for info in infos}),
+        ]
+        for name, table in functions:
+            function = "tuple" if name.endswith("_to_sample") else "list"
+            writer.line(0, "def {}(x):".format(name))
+            writer.line(1, "return {}(map({}, x))".format(
+                function, writer.constant(table.__getitem__)))
+
+    @overrides
+    def batch_cards_leaves(self, cards):
+        num_numbers = len(self.config.card_counts)
+        present = cards != hanabi.NO_CARD
+        colors = np.where(present, cards // num_numbers, len(self.config.colors))
+        numbers = np.where(present, cards % num_numbers, num_numbers)
+        return np.stack([colors, numbers], axis=2).reshape(len(cards), -1)
+
+    @overrides
+    def batch_info_leaves(self, cards, info_colors, info_numbers):
+        num_colors = len(self.config.colors)
+        num_numbers = len(self.config.card_counts)
+        absent = cards == hanabi.NO_CARD
+        colors = np.where(info_colors == hanabi.UNKNOWN, num_colors, info_colors)
+        numbers = np.where(info_numbers == hanabi.UNKNOWN, num_numbers,
+                           info_numbers)
+        colors = np.where(absent, num_colors + 1, colors)
+        numbers = np.where(absent, num_numbers + 1, numbers)
+        return np.stack([colors, numbers], axis=2).reshape(len(cards), -1)
+
+    @overrides
+    def hand_slots_batch(self, card_indexes, hands):
+        # Discards and plays name the slot directly.
+        rows = np.arange(len(hands))
+        return card_indexes, hands[rows, card_indexes] != hanabi.NO_CARD
+
+    @overrides
     def moves(self):
         c = self.config
         num_numbers = len(c.card_counts)
@@ -249,51 +953,27 @@ class NestedSpaces(Spaces):
 
     @overrides
     def action_space(self):
-        return gym.spaces.Discrete(len(self.moves()))
+        return gym.spaces.Discrete(len(self.tables().moves))
 
     @overrides
-    def action_to_sample(self, move):
-        c = self.config
-        num_numbers = len(c.card_counts)
-        offsets = [0, len(c.colors) * (c.num_players - 1), num_numbers * (c.num_players - 1), c.hand_size]
-        if isinstance(move, hanabi.InformColorMove):
-            return sum(offsets[:1]) + len(c.colors) * move.player + c.colors.index(move.color)
-        elif isinstance(move, hanabi.InformNumberMove):
-            return sum(offsets[:2]) + num_numbers * move.player + (move.number - 1)
-        elif isinstance(move, hanabi.DiscardMove):
-            return sum(offsets[:3]) + range(c.hand_size).index(move.index)
-        elif isinstance(move, hanabi.PlayMove):
-            return sum(offsets[:4]) + range(c.hand_size).index(move.index)
-        else:
-            raise ValueError("Unexpected move {}.".format(move))
+    def sample_to_action(self, sample, cards):
+        moves = self.tables().moves
+        assert 0 <= sample < len(moves), sample
+        return moves[sample]
 
     @overrides
-    def sample_to_action(self, sample, cards):
-        assert 0 <= sample < len(self.moves()), sample
-        return self.moves()[sample]
+    def hand_action_mask(self, cards):
+        present = [card is not None for card in cards]
+        return np.array(present + present, dtype=bool)
 
 
 class FlattenedSpaces(Spaces):
     def information_to_sample(self, information):
-        card_colors = len(self.config.colors) + 1
-        card_counts = len(self.config.card_counts) + 1
-        sample = [0] * (card_colors * card_counts)
+        card_indexes = self.tables().card_indexes
+        sample = [0] * len(card_indexes)
         for info in information:
-            if info is None:
-                continue
-
-            if info.number is None:
-                info_number = card_counts - 1
-            else:
-                info_number = info.number - 1
-
-            if info.color is None:
-                info_color = card_colors - 1
-            else:
-                info_color = self.config.colors.index(info.color)
-
-            index = (info_color * card_counts) + info_number
-            sample[index] += 1
+            if info is not None:
+                sample[card_indexes[info]] += 1
         return tuple(sample)
 
     def get_information_vector(self):
@@ -301,10 +981,15 @@ class FlattenedSpaces(Spaces):
         counts = list(range(1, len(self.config.card_counts) + 1)) + [None]
         return [hanabi.Information(color, count) for color in colors for count in counts]
 
+    @overrides
+    def card_vector(self):
+        return self.get_information_vector()
+
     def sample_to_information(self, sample):
-        assert len(sample) == len(self.get_information_vector()), sample
+        info_vector = self.tables().card_vector
+        assert len(sample) == len(info_vector), sample
         information = []
-        for info, s in zip(self.get_information_vector(), sample):
+        for info, s in zip(info_vector, sample):
             if s > 0:
                 information += [info] * s
         return information
@@ -332,25 +1017,28 @@ class FlattenedSpaces(Spaces):
         ) + other_players)
 
     @overrides
-    def observation_to_sample(self, obs):
-        played_cards = []
-        for color, count in obs.played_cards.items():
-            numbers = range(1, count + 1)
-            played_cards += [hanabi.Card(color, number) for number in numbers]
+    def hand_cards_to_sample(self, cards):
+        return self.information_to_sample(cards)
 
-        players = []
-        for player in obs.players:
-            players.append(self.information_to_sample(player.cards))
-            players.append(self.information_to_sample(player.info))
+    @overrides
+    def hand_info_to_sample(self, info):
+        return self.information_to_sample(info)
 
-        return (
-            obs.num_tokens - 1,
-            obs.num_fuses - 1,
-            self.information_to_sample(obs.discarded_cards),
-            self.information_to_sample(played_cards),
-            self.information_to_sample(obs.your_info)
-        ) + tuple(players)
+    def update_counts_sample(self, sample, removed, added):
+        counts = list(sample)
+        if removed is not None:
+            counts[self.card_index(removed)] -= 1
+        if added is not None:
+            counts[self.card_index(added)] += 1
+        return tuple(counts)
 
+    @overrides
+    def update_hand_cards_sample(self, sample, index, removed, added):
+        return self.update_counts_sample(sample, removed, added)
+
+    @overrides
+    def update_hand_info_sample(self, sample, index, removed, added):
+        return self.update_counts_sample(sample, removed, added)
 
     def sample_to_observation(self, sample):
         (sample_num_tokens,
@@ -392,6 +1080,99 @@ class FlattenedSpaces(Spaces):
         return hanabi.Observation(num_tokens, num_fuses, discarded_cards,
                                   played_cards, your_info, players)
 
+    @overrides
+    def encoding_size(self):
+        return len(self.tables().leaf_sizes)
+
+    @overrides
+    def encoding_space(self, dtype=np.float32):
+        high = np.array(self.tables().leaf_sizes, dtype=dtype) - 1
+        return gym.spaces.Box(np.zeros_like(high), high, dtype=dtype)
+
+    @overrides
+    def encode_into(self, sample, out):
+        for i, value in enumerate(self.sample_to_leaves(sample)):
+            out[i] = value
+        out[0] += 1
+        out[1] += 1
+        return out
+
+    @overrides
+    def sample_to_leaves(self, sample):
+        # Tokens, fuses, and then vectors of counts.
+        leaves = list(sample[:2])
+        for counts in sample[2:]:
+            leaves.extend(counts)
+        return leaves
+
+    @overrides
+    def encode_leaves_batch(self, leaves, dtype):
+        out = leaves.astype(dtype)
+        out[:, :2] += 1
+        return out
+
+    @overrides
+    def write_encode_into(self, writer, space):
+        leaves = writer.unpack(1, space, "s", starred=True)
+        leaves = ["{} + 1".format(leaf) for leaf in leaves[:2]] + leaves[2:]
+        writer.line(1, "out[:] = ({},)".format(", ".join(leaves)))
+
+    @overrides
+    def write_hand_functions(self, writer):
+        card_vector = self.tables().card_vector
+        card_indexes = writer.constant(self.tables().card_indexes)
+        writer.line(0, "def hand_cards_to_sample(x):")
+        writer.line(1, "counts = [0] * {}".format(len(card_vector)))
+        writer.line(1, "for card in x:")
+        writer.line(2, "if card is not None:")
+        writer.line(3, "counts[{}[card]] += 1".format(card_indexes))
+        writer.line(1, "return tuple(counts)")
+        writer.line(0, "hand_info_to_sample = hand_cards_to_sample")
+        writer.counts_to_list("sample_to_hand_cards", [
+            hanabi.Card(info.color, info.number) for info in card_vector])
+        writer.counts_to_list("sample_to_hand_info", card_vector)
+
+    def batch_counts(self, card_indexes):
+        """
+        Counts the card indexes of every row of `card_indexes`, skipping -1.
+        """
+        num_card_indexes = len(self.tables().card_vector)
+        n = len(card_indexes)
+        present = card_indexes >= 0
+        offsets = np.arange(n)[:, np.newaxis] * num_card_indexes
+        counts = np.bincount((offsets + card_indexes)[present],
+                             minlength=n * num_card_indexes)
+        return counts.reshape(n, num_card_indexes)
+
+    @overrides
+    def batch_cards_leaves(self, cards):
+        card_int_indexes = self.tables().card_int_indexes
+        return self.batch_counts(np.where(cards != hanabi.NO_CARD,
+                                          card_int_indexes[cards], -1))
+
+    @overrides
+    def batch_info_leaves(self, cards, info_colors, info_numbers):
+        # `get_information_vector` lists the numbers (and then None) of every
+        # color (and then of None).
+        num_colors = len(self.config.colors)
+        num_numbers = len(self.config.card_counts)
+        colors = np.where(info_colors == hanabi.UNKNOWN, num_colors, info_colors)
+        numbers = np.where(info_numbers == hanabi.UNKNOWN, num_numbers,
+                           info_numbers)
+        indexes = colors.astype(np.int64) * (num_numbers + 1) + numbers
+        return self.batch_counts(np.where(cards != hanabi.NO_CARD, indexes, -1))
+
+    @overrides
+    def hand_slots_batch(self, card_indexes, hands):
+        # Like find_matching_card, the first card of the hand that matches
+        # the information.
+        card_matches = self.tables().card_matches
+        matches = ((hands != hanabi.NO_CARD) &
+                   card_matches[card_indexes[:, np.newaxis],
+                                np.maximum(hands, 0)])
+        return matches.argmax(axis=1), matches.any(axis=1)
+
+    @overrides
     def moves(self):
         num_numbers = len(self.config.card_counts)
         card_colors = len(self.config.colors) + 1
@@ -408,39 +1189,12 @@ class FlattenedSpaces(Spaces):
 
     @overrides
     def action_space(self):
-        return gym.spaces.Discrete(len(self.moves()))
-
-    @overrides
-    def action_to_sample(self, move):
-        c = self.config
-        num_numbers = len(self.config.card_counts)
-        card_colors = len(self.config.colors) + 1
-        card_counts = len(self.config.card_counts) + 1
-        num_cards = card_colors * card_counts
-
-        offsets = [
-            0,
-            len(c.colors) * (c.num_players - 1),
-            num_numbers * (c.num_players - 1),
-            num_cards
-        ]
-        if isinstance(move, hanabi.InformColorMove):
-            offset = sum(offsets[:1])
-            return offset + len(c.colors) * move.player + c.colors.index(move.color)
-        elif isinstance(move, hanabi.InformNumberMove):
-            offset = sum(offsets[:2])
-            return offset + num_numbers * move.player + (move.number - 1)
-        elif isinstance(move, hanabi.DiscardMove):
-            offset = sum(offsets[:3])
-            return offset + move.index
-        elif isinstance(move, hanabi.PlayMove):
-            offset = sum(offsets[:4])
-            return offset + move.index
-        else:
-            raise ValueError("Unexpected move {}.".format(move))
+        return gym.spaces.Discrete(len(self.tables().moves))
 
     def find_matching_card(self, info, cards):
         for i, my_card in enumerate(cards):
+            if my_card is None:
+                continue
             color_matches = info.color is None or info.color == my_card.color
             number_matches = info.number is None or info.number == my_card.number
             if color_matches and number_matches:
@@ -452,13 +1206,17 @@ class FlattenedSpaces(Spaces):
 
     @overrides
     def sample_to_action(self, sample, cards):
-        assert 0 <= sample < len(self.moves()), sample
-        move = self.moves()[sample]
-        if isinstance(move, hanabi.DiscardMove):
-            info = self.get_information_vector()[move.index]
-            move = hanabi.DiscardMove(index=self.find_matching_card(info, cards))
-        elif isinstance(move, hanabi.PlayMove):
-            info = self.get_information_vector()[move.index]
-            move = hanabi.PlayMove(index=self.find_matching_card(info, cards))
+        tables = self.tables()
+        assert 0 <= sample < len(tables.moves), sample
+        move = tables.moves[sample]
+        if isinstance(move, (hanabi.DiscardMove, hanabi.PlayMove)):
+            info = tables.card_vector[move.index]
+            move = type(move)(index=self.find_matching_card(info, cards))
 
         return move
+
+    @overrides
+    def hand_action_mask(self, cards):
+        matches = [self.find_matching_card(info, cards) < len(cards)
+                       for info in self.tables().card_vector]
+        return np.array(matches + matches, dtype=bool)
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from gym_hanabi.envs import hanabi
 from gym_hanabi.envs import hanabi_config
 from gym_hanabi.envs import hanabi_spaces
@@ -328,5 +330,90 @@ class TestNestedSpaces(unittest.TestCase):
             actual = self.spaces.sample_to_action(sample, cards)
             self.assertEqual(self.spaces.sample_to_action(sample, cards), expected)
 
+class TestSpacesTables(unittest.TestCase):
+    def test_tables(self):
+        for config in [hanabi_config.HANABI_CONFIG,
+                       hanabi_config.MINI_HANABI_3P_CONFIG]:
+            for cls in [hanabi_spaces.NestedSpaces,
+                        hanabi_spaces.FlattenedSpaces]:
+                spaces = cls(config)
+                tables = spaces.tables()
+                # Tables are shared by every space of the same class and
+                # config, even if the config is a different object.
+                self.assertIs(cls(config._replace()).tables(), tables)
+                self.assertEqual(list(tables.moves), spaces.moves())
+                for action, move in enumerate(tables.moves):
+                    self.assertEqual(spaces.action_to_sample(move), action)
+                for index, card in enumerate(tables.card_vector):
+                    self.assertEqual(spaces.card_index(card), index)
+                with self.assertRaises(ValueError):
+                    spaces.action_to_sample(hanabi.PlayMove(-1))
+
+                deck = hanabi.new_deck(config)[::3]
+                num_cards = len(config.colors) * len(config.card_counts)
+                counts = [deck.count(c) for c in range(num_cards)]
+                cards = [hanabi.int_to_card(config, c) for c in deck]
+                self.assertEqual(spaces.card_int_counts_sample(counts),
+                                 spaces.cards_count_sample(cards))
+
+class TestVectorEncoding(unittest.TestCase):
+    def test_no_tokens_or_fuses_left(self):
+        # The tokens and fuses leaves of a game with no tokens or fuses left
+        # are -1, which must still land in their own parts of the vector.
+        config = hanabi_config.MINI_HANABI_CONFIG
+        for cls in [hanabi_spaces.NestedSpaces, hanabi_spaces.FlattenedSpaces]:
+            spaces = cls(config)
+            leaf_sizes = spaces.tables().leaf_sizes
+            for num_tokens, num_fuses in [(0, 0), (config.max_tokens, 0),
+                                          (0, config.max_fuses)]:
+                game_state = hanabi.GameState(config, np.random.RandomState(0))
+                game_state.num_tokens = num_tokens
+                game_state.num_fuses = num_fuses
+                sample = spaces.observation_to_sample(
+                    game_state.to_observation())
+                out = np.zeros(spaces.encoding_size(), dtype=np.float32)
+                spaces.encode_into(sample, out)
+                if cls is hanabi_spaces.NestedSpaces:
+                    self.assertEqual(out[:leaf_sizes[0]].argmax(), num_tokens)
+                    self.assertEqual(out[:leaf_sizes[0]].sum(), 1)
+                    fuses = out[leaf_sizes[0]:leaf_sizes[0] + leaf_sizes[1]]
+                    self.assertEqual(fuses.argmax(), num_fuses)
+                    self.assertEqual(fuses.sum(), 1)
+                    self.assertEqual(out.sum(), len(leaf_sizes))
+                else:
+                    self.assertEqual(list(out[:2]), [num_tokens, num_fuses])
+                self.assertTrue(spaces.encoding_space().contains(out))
+
+class TestCompiledSpaces(unittest.TestCase):
+    def test_compile(self):
+        random = np.random.RandomState(0)
+        for config in [hanabi_config.HANABI_CONFIG,
+                       hanabi_config.MINI_HANABI_CONFIG,
+                       hanabi_config.MINI_HANABI_3P_CONFIG]:
+            observations = []
+            for _ in range(3):
+                game_state = hanabi.GameState(config, random)
+                while game_state.num_turns_left != 0:
+                    observations.append(game_state.to_observation())
+                    moves = game_state.legal_moves()
+                    game_state.play_move(moves[random.randint(len(moves))])
+
+            for cls in [hanabi_spaces.NestedSpaces,
+                        hanabi_spaces.FlattenedSpaces]:
+                spaces = cls(config)
+                compiled = spaces.compile()
+                self.assertIs(cls(config._replace()).compile(), compiled)
+                for observation in observations:
+                    sample = spaces.observation_to_sample(observation)
+                    self.assertEqual(compiled.observation_to_sample(observation),
+                                     sample)
+                    self.assertEqual(compiled.sample_to_observation(sample),
+                                     spaces.sample_to_observation(sample))
+                    self.assertEqual(compiled.sample_to_leaves(sample),
+                                     spaces.sample_to_leaves(sample))
+                    out = np.full(spaces.encoding_size(), 7, dtype=np.float32)
+                    self.assertIs(compiled.encode_into(sample, out), out)
+                    self.assertEqual(list(out), list(spaces.encode(sample)))
+
 if __name__ == "__main__":
     unittest.main()
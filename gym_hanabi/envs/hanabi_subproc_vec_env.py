@@ -0,0 +1,211 @@
+import multiprocessing
+import multiprocessing.shared_memory
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi_vec_env
+
+def shared_array(shape, dtype, name=None):
+    """
+    Returns a pair (array, shared memory) of a NumPy array backed by shared
+    memory. If `name` is None, new shared memory is created; otherwise the
+    shared memory `name` is attached.
+    """
+    size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    if name is None:
+        memory = multiprocessing.shared_memory.SharedMemory(create=True,
+                                                            size=size)
+    else:
+        memory = multiprocessing.shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=memory.buf), memory
+
+def buffer_specs(spaces, n):
+    """
+    Returns {buffer name -> (shape, dtype)} for the shared buffers of `n`
+    games whose observations and actions belong to `spaces`.
+    """
+    return {
+        "actions": ((n,), np.int64),
+        "observations": ((n, spaces.encoding_size()), np.float32),
+        "rewards": ((n,), np.float64),
+        "dones": ((n,), bool),
+        "illegal": ((n,), bool),
+        "scores": ((n,), np.int64),
+        "masks": ((n, spaces.action_space().n), bool),
+    }
+
+def worker(connection, env_id, num_envs, start, stop, memory_names,
+           vec_env_kwargs):
+    """
+    Runs a HanabiVecEnv of games `start` to `stop` of the `num_envs` games
+    of a HanabiSubprocVecEnv, constructed with `vec_env_kwargs`. Every
+    command writes its results into the shared buffers and replies with
+    None.
+    """
+    vec_env = hanabi_vec_env.HanabiVecEnv(env_id, stop - start,
+                                          **vec_env_kwargs)
+    buffers = {}
+    memories = []
+    for name, (shape, dtype) in buffer_specs(vec_env.spaces, num_envs).items():
+        array, memory = shared_array(shape, dtype, memory_names[name])
+        buffers[name] = array[start:stop]
+        memories.append(memory)
+
+    try:
+        while True:
+            command, arg = connection.recv()
+            if command == "step":
+                observations, rewards, dones, infos = vec_env.step(
+                    buffers["actions"])
+                buffers["observations"][:] = observations
+                buffers["rewards"][:] = rewards
+                buffers["dones"][:] = dones
+                buffers["illegal"][:] = infos["illegal"]
+                buffers["scores"][:] = infos["scores"]
+            elif command == "reset":
+                buffers["observations"][:] = vec_env.reset()
+            elif command == "seed":
+                vec_env.seed(arg)
+            elif command == "set_ai_policy":
+                vec_env.set_ai_policy(arg)
+            elif command == "close":
+                break
+            else:
+                raise ValueError("Unexpected command {}.".format(command))
+            if command in ["step", "reset"]:
+                buffers["masks"][:] = vec_env.legal_action_masks()
+            connection.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del buffers
+        for memory in memories:
+            memory.close()
+        connection.close()
+
+class HanabiSubprocVecEnv(object):
+    """
+    A drop-in replacement for `hanabi_vec_env.HanabiVecEnv` that steps its
+    games in `num_workers` subprocesses, so that the games step while the
+    parent process runs e.g. a policy's forward pass.
+
+    Every worker runs a HanabiVecEnv over a contiguous slice of the games.
+    Actions, observations, rewards, dones, infos and legal action masks are
+    exchanged through NumPy arrays in shared memory; the pipes to the
+    workers only carry commands. `step` and `reset` return copies of the
+    shared arrays, which the next call overwrites.
+    """
+
+    def __init__(self, env_id, num_envs, num_workers=None, ai_policy=None,
+                 use_batch=True, illegal_move_mode="terminate",
+                 illegal_move_penalty=1.0, start_method=None):
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        num_workers = max(1, min(num_workers, num_envs))
+
+        # The parent keeps a HanabiVecEnv of a single game for the spaces.
+        vec_env_kwargs = {
+            "ai_policy": ai_policy,
+            "use_batch": use_batch,
+            "illegal_move_mode": illegal_move_mode,
+            "illegal_move_penalty": illegal_move_penalty,
+        }
+        spec_env = hanabi_vec_env.HanabiVecEnv(env_id, 1, **vec_env_kwargs)
+        self.env_id = env_id
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        self.illegal_move_mode = illegal_move_mode
+        self.illegal_move_penalty = illegal_move_penalty
+        self.config = spec_env.config
+        self.reward = spec_env.reward
+        self.spaces = spec_env.spaces
+        self.action_space = spec_env.action_space
+        self.observation_space = spec_env.observation_space
+
+        self.buffers = {}
+        self.memories = []
+        for name, (shape, dtype) in buffer_specs(self.spaces, num_envs).items():
+            self.buffers[name], memory = shared_array(shape, dtype)
+            self.memories.append(memory)
+        memory_names = {name: memory.name for name, memory in
+                            zip(self.buffers, self.memories)}
+
+        # Worker i runs games bounds[i] to bounds[i + 1].
+        self.bounds = [num_envs * i // num_workers
+                           for i in range(num_workers + 1)]
+        context = multiprocessing.get_context(start_method)
+        self.connections = []
+        self.processes = []
+        for i in range(num_workers):
+            parent, child = context.Pipe()
+            start, stop = self.bounds[i], self.bounds[i + 1]
+            process = context.Process(
+                target=worker,
+                args=(child, env_id, num_envs, start, stop, memory_names,
+                      vec_env_kwargs),
+                daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+    def call(self, command, args=None):
+        """
+        Sends `command` to every worker, with `args[i]` (or None) as the
+        argument of worker i, and waits for every worker to finish.
+        """
+        for i, connection in enumerate(self.connections):
+            connection.send((command, None if args is None else args[i]))
+        for connection in self.connections:
+            connection.recv()
+
+    def set_ai_policy(self, ai_policy):
+        self.call("set_ai_policy", [ai_policy] * self.num_workers)
+
+    def seed(self, seed=None):
+        # Every worker seeds its games with seed + its first game.
+        if seed is None:
+            seeds = [None] * self.num_workers
+        else:
+            seeds = [seed + start for start in self.bounds[:-1]]
+        self.call("seed", seeds)
+        return seeds
+
+    def legal_action_masks(self):
+        return self.buffers["masks"].copy()
+
+    def reset(self):
+        self.call("reset")
+        return self.buffers["observations"].copy()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,), actions.shape
+        self.buffers["actions"][:] = actions
+        self.call("step")
+        infos = {"illegal": self.buffers["illegal"].copy(),
+                 "scores": self.buffers["scores"].copy()}
+        return (self.buffers["observations"].copy(),
+                self.buffers["rewards"].copy(),
+                self.buffers["dones"].copy(),
+                infos)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+        for connection in self.connections:
+            connection.close()
+        self.buffers = {}
+        for memory in self.memories:
+            memory.close()
+            memory.unlink()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
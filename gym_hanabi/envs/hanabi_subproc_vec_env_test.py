@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi_subproc_vec_env
+from gym_hanabi.envs import hanabi_vec_env
+from gym_hanabi.policies import heuristic_policy
+
+class TestHanabiSubprocVecEnv(unittest.TestCase):
+    def check_matches_vec_envs(self, env_id, use_batch, illegal_rate=0.0,
+                               **kwargs):
+        """
+        Checks that a HanabiSubprocVecEnv constructed with `kwargs` steps
+        like the HanabiVecEnvs of its workers, with about `illegal_rate` of
+        the actions illegal.
+        """
+        random = np.random.RandomState(0)
+        # The AI envs' partner has to be deterministic.
+        ai_policy = heuristic_policy.HeuristicPolicy(
+            hanabi_vec_env.HanabiVecEnv(env_id, 1, use_batch=use_batch))
+        subproc_env = hanabi_subproc_vec_env.HanabiSubprocVecEnv(
+            env_id, 7, num_workers=3, ai_policy=ai_policy,
+            use_batch=use_batch, **kwargs)
+        try:
+            # Worker i steps the games bounds[i] to bounds[i + 1] of a
+            # HanabiVecEnv seeded with seed + bounds[i].
+            bounds = subproc_env.bounds
+            vec_envs = [hanabi_vec_env.HanabiVecEnv(
+                            env_id, stop - start, ai_policy=ai_policy,
+                            use_batch=use_batch, **kwargs)
+                        for start, stop in zip(bounds[:-1], bounds[1:])]
+            subproc_env.seed(3)
+            for start, vec_env in zip(bounds, vec_envs):
+                vec_env.seed(3 + start)
+
+            observations = subproc_env.reset()
+            expected = np.concatenate([v.reset() for v in vec_envs])
+            self.assertEqual(observations.tolist(), expected.tolist())
+            for _ in range(100):
+                masks = subproc_env.legal_action_masks()
+                self.assertEqual(masks.tolist(), np.concatenate(
+                    [v.legal_action_masks() for v in vec_envs]).tolist())
+                actions = (random.rand(*masks.shape) * masks).argmax(axis=1)
+                actions = np.where(random.rand(len(actions)) < illegal_rate,
+                                   random.randint(masks.shape[1] + 1,
+                                                  size=len(actions)),
+                                   actions)
+                results = subproc_env.step(actions)
+                expected = [v.step(actions[start:stop]) for v, start, stop
+                                in zip(vec_envs, bounds[:-1], bounds[1:])]
+                for i in range(3):
+                    self.assertEqual(results[i].tolist(), np.concatenate(
+                        [e[i] for e in expected]).tolist())
+                for key in ["illegal", "scores"]:
+                    self.assertEqual(results[3][key].tolist(),
+                                     np.concatenate([e[3][key] for e in
+                                                     expected]).tolist())
+        finally:
+            subproc_env.close()
+
+    def test_matches_vec_envs(self):
+        self.check_matches_vec_envs("MiniHanabiSelf-v0", True)
+        self.check_matches_vec_envs("MiniHanabiAi-v0", False)
+
+    def test_illegal_move_modes(self):
+        for mode in ["noop", "resample"]:
+            self.check_matches_vec_envs("MiniHanabiSelf-v0", True,
+                                        illegal_rate=0.3,
+                                        illegal_move_mode=mode,
+                                        illegal_move_penalty=2.5)
+        self.check_matches_vec_envs("MiniHanabiAi-v0", False,
+                                    illegal_rate=0.3,
+                                    illegal_move_mode="noop",
+                                    illegal_move_penalty=2.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_config
+
+def state_of(game_state):
+    """
+    Returns everything about `game_state` that a move can change.
+    """
+    return (
+        game_state.num_tokens,
+        game_state.num_fuses,
+        game_state.num_turns_left,
+        game_state.player_turn,
+        list(game_state.deck),
+        list(game_state.discarded_cards),
+        list(game_state.discard_counts),
+        {c: n for c, n in game_state.played_cards.items() if n != 0},
+        list(game_state.last_moves),
+        [(list(p.cards), list(p.info), list(p.possible))
+            for p in game_state.players],
+        game_state.zobrist_hash(),
+        [game_state.info_set_hash(p) for p in range(len(game_state.players))],
+    )
+
+def random_games(config, num_games, seed=0):
+    """
+    Yields (game_state, legal moves) before every move of `num_games` random
+    games played with legal moves only.
+    """
+    random = np.random.RandomState(seed)
+    for _ in range(num_games):
+        game_state = hanabi.GameState(config, random)
+        while game_state.num_turns_left != 0:
+            moves = game_state.legal_moves()
+            yield game_state, moves
+            game_state.play_move(moves[random.randint(len(moves))])
+
+class TestGameState(unittest.TestCase):
+    def setUp(self):
+        self.configs = [
+            hanabi_config.HANABI_CONFIG,
+            hanabi_config.MINI_HANABI_CONFIG,
+            hanabi_config.MINI_HANABI_3P_CONFIG,
+        ]
+
+    def test_snapshot_restore(self):
+        for config in self.configs:
+            for game_state, moves in random_games(config, 5):
+                expected = state_of(game_state)
+                snapshot = game_state.snapshot()
+                clone = game_state.clone()
+                self.assertEqual(state_of(clone), expected)
+                self.assertIs(clone.random, game_state.random)
+
+                # Play every legal move from the same state.
+                for move in moves:
+                    game_state.play_move(move)
+                    game_state.restore(snapshot)
+                    self.assertEqual(state_of(game_state), expected)
+
+                # Playing on the clone leaves the original untouched.
+                clone.play_move(moves[0])
+                self.assertEqual(state_of(game_state), expected)
+
+    def test_reset(self):
+        for config in self.configs:
+            random = np.random.RandomState(0)
+            game_state = hanabi.GameState(config, random)
+            for seed in range(5):
+                # Finish a game, with a hashed state and undo records.
+                game_state.zobrist_hash()
+                while game_state.num_turns_left != 0:
+                    moves = game_state.legal_moves()
+                    game_state.play_move(moves[random.randint(len(moves))],
+                                         record_undo=True)
+                game_state.random = np.random.RandomState(seed)
+                game_state.reset()
+                expected = hanabi.GameState(config, np.random.RandomState(seed))
+                self.assertEqual(state_of(game_state), state_of(expected))
+                self.assertEqual(game_state.undo_log, [])
+
+                deck = list(expected.deck) + [c for p in expected.players
+                                                  for c in p.cards]
+                game_state.reset(deck)
+                self.assertEqual(state_of(game_state), state_of(
+                    hanabi.GameState(config, None, deck=deck)))
+
+    def test_undo(self):
+        def walk(game_state, depth):
+            expected = state_of(game_state)
+            for move in game_state.legal_moves():
+                result = game_state.play_move(move, record_undo=True)
+                if depth > 1 and game_state.num_turns_left != 0:
+                    walk(game_state, depth - 1)
+                self.assertEqual(game_state.undo(), result)
+                self.assertEqual(state_of(game_state), expected)
+
+        for config in self.configs:
+            for game_state, _ in random_games(config, 3):
+                walk(game_state, 2)
+                self.assertEqual(game_state.undo_log, [])
+
+    def test_discard_counts(self):
+        for config in self.configs:
+            num_cards = len(config.colors) * len(config.card_counts)
+            for game_state, _ in random_games(config, 5):
+                discarded = [hanabi.card_to_int(config, card)
+                                 for card in game_state.discarded_cards]
+                self.assertEqual(game_state.discard_counts, list(
+                    np.bincount(discarded, minlength=num_cards)))
+
+    def test_zobrist_hash(self):
+        for config in self.configs:
+            # Distinct states (ignoring the unhashed last moves) have
+            # distinct hashes.
+            hashes = {}
+            for game_state, _ in random_games(config, 5):
+                expected = state_of(game_state)
+                key = repr(expected[:8] + expected[9:-2])
+                hashes[key] = game_state.zobrist_hash()
+                game_state.rehash()
+                self.assertEqual(state_of(game_state), expected)
+
+                # Swapping one of the current player's cards with a card of
+                # the deck changes the state but not the player's info set.
+                player = game_state.player_turn
+                cards = game_state.get_current_cards()
+                if not game_state.deck or cards[0] in (None,
+                                                       game_state.deck[0]):
+                    continue
+                other = game_state.clone()
+                other.players[player].cards[0], other.deck[0] = \
+                    other.deck[0], other.players[player].cards[0]
+                other.rehash()
+                self.assertNotEqual(other.zobrist_hash(),
+                                    game_state.zobrist_hash())
+                self.assertEqual(other.info_set_hash(player),
+                                 game_state.info_set_hash(player))
+                for p in range(config.num_players):
+                    if p != player:
+                        self.assertNotEqual(other.info_set_hash(p),
+                                            game_state.info_set_hash(p))
+            self.assertEqual(len(set(hashes.values())), len(hashes))
+
+    def test_possible(self):
+        for config in self.configs:
+            num_cards = len(config.colors) * len(config.card_counts)
+            cards = [hanabi.int_to_card(config, c) for c in range(num_cards)]
+            for game_state, moves in random_games(config, 5):
+                for player in game_state.players:
+                    # Replay every hint the player received: every card still
+                    # possible agrees with the info, and the true card is
+                    # always possible.
+                    for card, info, possible in zip(player.cards, player.info,
+                                                    player.possible):
+                        if card is None:
+                            self.assertEqual(possible, 0)
+                            continue
+                        self.assertTrue(
+                            possible >> hanabi.card_to_int(config, card) & 1)
+                        for c in range(num_cards):
+                            if not possible >> c & 1:
+                                continue
+                            if info.color is not None:
+                                self.assertEqual(cards[c].color, info.color)
+                            if info.number is not None:
+                                self.assertEqual(cards[c].number, info.number)
+
+                # A hint rules out the hinted color or number for every card
+                # that it doesn't point at.
+                for move in moves:
+                    if not isinstance(move, (hanabi.InformColorMove,
+                                             hanabi.InformNumberMove)):
+                        continue
+                    clone = game_state.clone()
+                    result = clone.play_move(move)
+                    who = clone.players[result.target]
+                    for card, possible in zip(who.cards, who.possible):
+                        if card is None:
+                            continue
+                        for c in range(num_cards):
+                            if possible >> c & 1:
+                                if isinstance(move, hanabi.InformColorMove):
+                                    self.assertEqual(cards[c].color == move.color,
+                                                     card.color == move.color)
+                                else:
+                                    self.assertEqual(
+                                        cards[c].number == move.number,
+                                        card.number == move.number)
+
+                playable = game_state.playable_mask()
+                for c, card in enumerate(cards):
+                    self.assertEqual(
+                        bool(playable >> c & 1),
+                        game_state.played_cards[card.color] == card.number - 1)
+
+if __name__ == "__main__":
+    unittest.main()
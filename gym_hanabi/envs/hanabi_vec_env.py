@@ -0,0 +1,217 @@
+import gym
+import gym.utils.seeding
+import numpy as np
+
+import gym_hanabi
+from gym_hanabi.envs import hanabi_ai_env
+from gym_hanabi.envs import hanabi_batch
+from gym_hanabi.envs import hanabi_env
+from gym_hanabi.envs import hanabi_self_env
+
+def spec_kwargs(env_id):
+    """
+    Returns a copy of the kwargs that `env_id` was registered with.
+    """
+    spec = gym.spec(env_id)
+    # Older versions of gym keep the kwargs in `_kwargs`.
+    kwargs = getattr(spec, "kwargs", None)
+    if kwargs is None:
+        kwargs = spec._kwargs
+    return dict(kwargs)
+
+class HanabiVecEnv(object):
+    """
+    Steps `num_envs` games of the registered env `env_id` (any of
+    `gym_hanabi.SELF_ENV_IDS` and `gym_hanabi.AI_ENV_IDS`) in lockstep.
+
+    Observations are the vector encodings of the env's spaces (see
+    `Spaces.encode_into`), stacked into an (N, encoding size) float32 array.
+    `step` takes one action per game and returns (observations, rewards,
+    dones, infos), where rewards and dones are arrays and infos is a dict of
+    arrays:
+
+      - illegal: whether the action was illegal (handled per the env's
+                 illegal_move_mode).
+      - scores:  the game's score after the action.
+
+    Games that end are reset automatically, so the observation of a game
+    that is done is the first observation of its next game. Like gym's
+    TimeLimit, a game also ends after the spec's `max_episode_steps` steps.
+    Illegal actions are handled like the envs' `illegal_move_mode` (see
+    `hanabi_env.ILLEGAL_MOVE_MODES`).
+
+    Self envs are simulated by a `hanabi_batch.BatchGameState` and encoded
+    straight from its arrays. AI envs (or `use_batch=False`, or rewards that
+    aren't sums over the piles, see `Reward.is_pile_sum`) step one
+    HanabiEnv per game; the AI partners' moves of all the games are picked
+    with one batched call (see `hanabi_ai_env.step_envs`).
+    """
+
+    def __init__(self, env_id, num_envs, ai_policy=None, use_batch=True,
+                 illegal_move_mode="terminate", illegal_move_penalty=1.0):
+        assert env_id in gym_hanabi.SELF_ENV_IDS + gym_hanabi.AI_ENV_IDS, \
+            env_id
+        assert illegal_move_mode in hanabi_env.ILLEGAL_MOVE_MODES, \
+            illegal_move_mode
+        kwargs = spec_kwargs(env_id)
+        self.env_id = env_id
+        self.num_envs = num_envs
+        self.config = kwargs["config"]
+        self.reward = kwargs["reward"]
+        self.spaces = kwargs["spaces"]
+        self.max_episode_steps = gym.spec(env_id).max_episode_steps
+        self.illegal_move_mode = illegal_move_mode
+        self.illegal_move_penalty = illegal_move_penalty
+        self.action_space = self.spaces.action_space()
+        self.observation_space = self.spaces.encoding_space()
+        self.use_batch = (use_batch and env_id in gym_hanabi.SELF_ENV_IDS and
+                          self.reward.is_pile_sum())
+        self.batch = None
+        self.envs = None
+        if not self.use_batch:
+            if env_id in gym_hanabi.AI_ENV_IDS:
+                kwargs["ai_policy"] = ai_policy
+                cls = hanabi_ai_env.HanabiAiEnv
+            else:
+                cls = hanabi_self_env.HanabiSelfEnv
+            self.envs = [cls(observation_mode="vector",
+                             illegal_move_mode=illegal_move_mode,
+                             illegal_move_penalty=illegal_move_penalty,
+                             use_deck_bank=True,
+                             reuse_game_states=True,
+                             **kwargs)
+                             for _ in range(num_envs)]
+            # Every env encodes its observations straight into its row of
+            # one buffer, and only when `observations` asks for them.
+            self.observation_buffer = np.zeros(
+                (num_envs, self.spaces.encoding_size()), dtype=np.float32)
+            for env, row in zip(self.envs, self.observation_buffer):
+                env.observation_buffer = row
+                env.defer_observations = True
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.seed()
+
+    def set_ai_policy(self, ai_policy):
+        for env in self.envs or []:
+            env.ai_policy = ai_policy
+
+    def seed(self, seed=None):
+        self.np_random, seed = gym.utils.seeding.np_random(seed)
+        if self.envs is None:
+            return [seed]
+        return [env._seed(seed + i)[0] for i, env in enumerate(self.envs)]
+
+    def new_decks(self, num_games):
+        return hanabi_batch.shuffled_decks(self.config, self.np_random,
+                                           num_games)
+
+    def observations(self):
+        if self.use_batch:
+            return self.spaces.encode_leaves_batch(
+                self.spaces.batch_to_leaves(self.batch), np.float32)
+        for env in self.envs:
+            env.observation()
+        return self.observation_buffer.copy()
+
+    def legal_action_masks(self):
+        """
+        Returns an (N, number of actions) bool array with the legal action
+        mask of every game's current player.
+        """
+        if self.use_batch:
+            batch = self.batch
+            hands = batch.hands[np.arange(self.num_envs), batch.player_turn]
+            return self.spaces.legal_action_mask_batch(batch.num_tokens, hands)
+        return np.array([env.legal_action_mask() for env in self.envs])
+
+    def reset(self):
+        self.episode_steps[:] = 0
+        if self.use_batch:
+            self.batch = hanabi_batch.BatchGameState(
+                self.config, self.num_envs, decks=self.new_decks(self.num_envs))
+        else:
+            for env in self.envs:
+                env._reset()
+        return self.observations()
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        assert actions.shape == (self.num_envs,), actions.shape
+        if self.use_batch:
+            rewards, dones, illegal, scores = self.step_batch(actions)
+        else:
+            rewards, dones, illegal, scores = self.step_envs(actions)
+
+        self.episode_steps += 1
+        if self.max_episode_steps is not None:
+            dones |= self.episode_steps >= self.max_episode_steps
+        games = np.flatnonzero(dones)
+        if len(games):
+            self.episode_steps[games] = 0
+            if self.use_batch:
+                self.batch.reset(self.new_decks(len(games)), games)
+            else:
+                for game in games:
+                    self.envs[game]._reset()
+        infos = {"illegal": illegal, "scores": scores}
+        return self.observations(), rewards, dones, infos
+
+    def step_batch(self, actions):
+        batch = self.batch
+        hands = batch.hands[np.arange(self.num_envs), batch.player_turn]
+        if self.illegal_move_mode == "resample":
+            actions, resampled = self.resample_illegal_actions(actions)
+        move_ids = self.spaces.decode_actions_batch(actions, hands)
+        played = batch.played.copy()
+        # BatchGameState leaves the games of illegal moves untouched.
+        _, dones, illegal = batch.play_moves(move_ids)
+        rewards = self.reward.batch_delta(self.config, played, batch.played)
+        if self.illegal_move_mode == "noop":
+            rewards = np.where(illegal, -self.illegal_move_penalty, rewards)
+        else:
+            rewards = np.where(
+                illegal,
+                self.reward.batch_illegal_move_reward(self.config,
+                                                      batch.played),
+                rewards)
+            dones = dones | illegal
+        if self.illegal_move_mode == "resample":
+            illegal = illegal | resampled
+        return (rewards.astype(np.float64), dones, illegal,
+                batch.current_scores())
+
+    def resample_illegal_actions(self, actions):
+        """
+        Replaces every illegal action by a uniformly random legal action of
+        its game. Returns the new actions and which actions were replaced.
+        """
+        masks = self.legal_action_masks()
+        num_actions = masks.shape[1]
+        in_range = (actions >= 0) & (actions < num_actions)
+        legal = in_range & masks[np.arange(self.num_envs),
+                                 np.where(in_range, actions, 0)]
+        # The argmax of random keys over the legal actions is uniform.
+        keys = self.np_random.uniform(size=masks.shape) * masks
+        resampled = ~legal & masks.any(axis=1)
+        return np.where(resampled, keys.argmax(axis=1), actions), ~legal
+
+    def step_envs(self, actions):
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        illegal = np.zeros(self.num_envs, dtype=bool)
+        scores = np.zeros(self.num_envs, dtype=np.int64)
+        if self.env_id in gym_hanabi.AI_ENV_IDS:
+            # Pick the moves of every game's AI partner at once.
+            results = hanabi_ai_env.step_envs(self.envs, actions)
+        else:
+            results = [env._step(a) for env, a in zip(self.envs, actions)]
+        for i, (env, (_, reward, done, info)) in enumerate(
+                zip(self.envs, results)):
+            rewards[i] = reward
+            dones[i] = done
+            illegal[i] = info["illegal"]
+            scores[i] = env.game_state.current_score()
+        return rewards, dones, illegal, scores
+
+    def close(self):
+        pass
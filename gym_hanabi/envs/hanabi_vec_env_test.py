@@ -0,0 +1,136 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_vec_env
+from gym_hanabi.policies import heuristic_policy
+
+class TestHanabiVecEnv(unittest.TestCase):
+    def new_game_state(self, vec_env, game):
+        config = vec_env.config
+        deck = [hanabi.int_to_card(config, int(c))
+                    for c in vec_env.batch.decks[game]]
+        return hanabi.GameState(config, None, deck=deck)
+
+    def test_matches_game_states(self):
+        random = np.random.RandomState(0)
+        for env_id in ["HanabiSelf-v0", "MiniHanabi3PSelf-v0",
+                       "MiniHanabiFlattenedSpaceSelf-v0",
+                       "MiniHanabiSquaredRewardSelf-v0"]:
+            vec_env = hanabi_vec_env.HanabiVecEnv(env_id, 8)
+            self.assertTrue(vec_env.use_batch)
+            spaces = vec_env.spaces
+            reward = vec_env.reward
+            vec_env.seed(0)
+            observations = vec_env.reset()
+            game_states = [self.new_game_state(vec_env, g) for g in range(8)]
+            num_dones = 0
+            while num_dones < 20:
+                masks = vec_env.legal_action_masks()
+                actions = []
+                for game, game_state in enumerate(game_states):
+                    sample = spaces.observation_to_sample(
+                        game_state.to_observation())
+                    self.assertEqual(list(observations[game]),
+                                     list(spaces.encode(sample)))
+                    self.assertEqual(list(masks[game]),
+                                     list(spaces.legal_action_mask(game_state)))
+                    # Mostly legal actions, and the occasional illegal one.
+                    if random.rand() < 0.05:
+                        actions.append(random.randint(len(masks[game])))
+                    else:
+                        actions.append(random.choice(np.flatnonzero(
+                            masks[game])))
+
+                observations, rewards, dones, infos = vec_env.step(actions)
+                for game, game_state in enumerate(game_states):
+                    action = actions[game]
+                    if masks[game][action]:
+                        before = reward.current_reward(game_state)
+                        game_state.play_move(spaces.sample_to_action(
+                            action, game_state.get_current_cards()))
+                        self.assertFalse(infos["illegal"][game])
+                        self.assertEqual(
+                            rewards[game],
+                            reward.current_reward(game_state) - before)
+                        self.assertEqual(dones[game],
+                                         game_state.num_turns_left == 0)
+                    else:
+                        self.assertTrue(infos["illegal"][game])
+                        self.assertEqual(
+                            rewards[game],
+                            reward.illegal_move_reward(game_state))
+                        self.assertTrue(dones[game])
+                    self.assertEqual(infos["scores"][game],
+                                     game_state.current_score())
+                    if dones[game]:
+                        num_dones += 1
+                        game_states[game] = self.new_game_state(vec_env, game)
+
+    def test_illegal_move_modes(self):
+        random = np.random.RandomState(0)
+        for use_batch in [True, False]:
+            for mode in ["noop", "resample"]:
+                vec_env = hanabi_vec_env.HanabiVecEnv(
+                    "MiniHanabiSelf-v0", 8, use_batch=use_batch,
+                    illegal_move_mode=mode, illegal_move_penalty=2.5)
+                vec_env.seed(0)
+                observations = vec_env.reset()
+                for _ in range(50):
+                    masks = vec_env.legal_action_masks()
+                    # Half of the actions are random, mostly illegal ones.
+                    actions = (random.rand(*masks.shape) * masks).argmax(axis=1)
+                    random_actions = random.randint(masks.shape[1] + 1,
+                                                    size=len(actions))
+                    actions = np.where(random.rand(len(actions)) < 0.5,
+                                       random_actions, actions)
+                    legal = np.array([a < masks.shape[1] and m[a]
+                                          for a, m in zip(actions, masks)])
+                    before = observations
+                    observations, rewards, dones, infos = vec_env.step(actions)
+                    self.assertEqual(list(infos["illegal"]), list(~legal))
+                    for game in np.flatnonzero(~legal):
+                        if mode == "noop":
+                            self.assertEqual(rewards[game], -2.5)
+                            self.assertFalse(dones[game])
+                            self.assertEqual(list(observations[game]),
+                                             list(before[game]))
+                        elif not dones[game]:
+                            self.assertNotEqual(list(observations[game]),
+                                                list(before[game]))
+
+    def test_envs(self):
+        random = np.random.RandomState(0)
+        for env_id in ["MiniHanabiSelf-v0", "MiniHanabiAi-v0"]:
+            vec_env = hanabi_vec_env.HanabiVecEnv(env_id, 4, use_batch=False)
+            self.assertFalse(vec_env.use_batch)
+            vec_env.set_ai_policy(heuristic_policy.HeuristicPolicy(vec_env))
+            vec_env.seed(0)
+            for env in vec_env.envs:
+                env.set_profiling()
+            observations = vec_env.reset()
+            num_steps = 0
+            num_dones = 0
+            while num_dones < 10:
+                self.assertEqual(observations.shape,
+                                 (4, vec_env.spaces.encoding_size()))
+                for observation, env in zip(observations, vec_env.envs):
+                    self.assertEqual(list(observation), list(
+                        env.spaces.encode(env.observation_sample())))
+                masks = vec_env.legal_action_masks()
+                actions = [random.choice(np.flatnonzero(m)) for m in masks]
+                observations, rewards, dones, infos = vec_env.step(actions)
+                self.assertFalse(infos["illegal"].any())
+                num_steps += 1
+                num_dones += dones.sum()
+
+            # Every env's observation is encoded once per step, including the
+            # steps that reset games that ended.
+            for env in vec_env.envs:
+                self.assertGreater(env.episode_index, 0)
+                self.assertEqual(env.perf_stats()["observation"]["count"],
+                                 num_steps + 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 import gym_hanabi.policies.common
+from gym_hanabi.policies.heuristic_policy import FastHeuristicPolicy
 from gym_hanabi.policies.heuristic_policy import HeuristicPolicy
+from gym_hanabi.policies.heuristic_simple_policy import FastHeuristicSimplePolicy
 from gym_hanabi.policies.heuristic_simple_policy import HeuristicSimplePolicy
 from gym_hanabi.policies.keyboard_policy import KeyboardPolicy
 from gym_hanabi.policies.random_policy import RandomPolicy
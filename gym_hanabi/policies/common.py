@@ -1,7 +1,11 @@
+import collections
 import csv
 
 import argparse
+import numpy as np
+
 import gym_hanabi
+from gym_hanabi.envs import hanabi_spaces
 
 def write_csv(filename, header, rows):
     with open(filename, "w") as f:
@@ -43,3 +47,87 @@ def get_ai_parser():
         help="Filename of final pickled policy")
     parser.add_argument("snapshot_dir", help="Snapshot directory")
     return parser
+
+# The arrays of a batch of N NestedSpaces observation samples that
+# NestedSampleArrays reads. Colors and numbers are sample values: colors are
+# indexes into config.colors (len(colors) if unknown, len(colors) + 1 if the
+# card is absent), numbers are the card number minus one (len(card_counts) if
+# unknown, len(card_counts) + 1 if absent).
+SampleArrays = collections.namedtuple(
+    "SampleArrays",
+    [
+        "num_tokens",         # (N,) information tokens
+        "heights",            # (N, colors + 2) highest played number of
+                              # every color, and -1 for the unknown and
+                              # absent colors
+        "discarded",          # (N, cards) number of discarded copies of
+                              # every card index
+        "your_colors",        # (N, hand size) colors of your info
+        "your_numbers",       # (N, hand size) numbers of your info
+        "their_colors",       # (N, hand size) colors of the next player's
+                              # cards
+        "their_numbers",      # (N, hand size) numbers of the next player's
+                              # cards
+        "their_info_colors",  # (N, hand size) colors of their info
+        "their_info_numbers", # (N, hand size) numbers of their info
+    ])
+
+class NestedSampleArrays(object):
+    """
+    Reads batches of NestedSpaces observation samples into SampleArrays
+    through the spaces' compiled `sample_to_leaves`, so that policies can
+    evaluate their rules with NumPy instead of decoding every sample into a
+    `hanabi.Observation`.
+    """
+
+    def __init__(self, spaces):
+        if not isinstance(spaces, hanabi_spaces.NestedSpaces):
+            raise ValueError("Expected NestedSpaces, got {}.".format(
+                type(spaces).__name__))
+        c = spaces.config
+        self.sample_to_leaves = spaces.compile().sample_to_leaves
+        self.num_colors = len(c.colors)
+        self.num_numbers = len(c.card_counts)
+        self.hand_size = c.hand_size
+        # The leaves are the tokens, the fuses, the discarded and played
+        # counts, your info and then every other player's cards and info.
+        num_cards = self.num_colors * self.num_numbers
+        self.played_start = 2 + num_cards
+        self.hands_start = self.played_start + num_cards
+
+    def read(self, samples):
+        leaves = np.array([self.sample_to_leaves(s) for s in samples],
+                          dtype=np.int64).reshape(len(samples), -1)
+        n = len(samples)
+        played = leaves[:, self.played_start:self.hands_start].reshape(
+            n, self.num_colors, self.num_numbers)
+        heights = np.full((n, self.num_colors + 2), -1, dtype=np.int64)
+        heights[:, :self.num_colors] = (
+            played * np.arange(1, self.num_numbers + 1)).max(axis=2)
+        hands = leaves[:, self.hands_start:].reshape(n, -1, self.hand_size, 2)
+        return SampleArrays(
+            leaves[:, 0] + 1, heights, leaves[:, 2:self.played_start],
+            hands[:, 0, :, 0], hands[:, 0, :, 1],
+            hands[:, 1, :, 0], hands[:, 1, :, 1],
+            hands[:, 2, :, 0], hands[:, 2, :, 1])
+
+def move_actions(spaces, moves):
+    """
+    Returns a NumPy array of the actions of `moves`.
+    """
+    return np.array([spaces.action_to_sample(move) for move in moves])
+
+def first_index(mask):
+    """
+    Returns the index of the first true entry of every row of the 2D bool
+    array `mask`, or -1 for rows without one.
+    """
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+def last_index(mask):
+    """
+    Returns the index of the last true entry of every row of the 2D bool array
+    `mask`, or -1 for rows without one.
+    """
+    last = mask.shape[1] - 1 - mask[:, ::-1].argmax(axis=1)
+    return np.where(mask.any(axis=1), last, -1)
@@ -1,4 +1,10 @@
+import numpy as np
+
 from gym_hanabi.envs import hanabi
+from gym_hanabi.policies.common import NestedSampleArrays
+from gym_hanabi.policies.common import first_index
+from gym_hanabi.policies.common import last_index
+from gym_hanabi.policies.common import move_actions
 
 class HeuristicPolicy(object):
     def __init__(self, env):
@@ -199,3 +205,179 @@ class HeuristicPolicy(object):
     def get_action(self, observation):
         return (self.spaces.action_to_sample(self.get_move(observation)), )
 
+class FastHeuristicPolicy(HeuristicPolicy):
+    """
+    Picks exactly the same moves as HeuristicPolicy, but evaluates its rules
+    with NumPy on the arrays of whole batches of NestedSpaces samples (see
+    `common.NestedSampleArrays`) instead of decoding every sample. Raises a
+    ValueError for other spaces.
+
+    `get_actions` picks the actions of a batch of samples at once, so
+    `hanabi_ai_env.step_envs` makes one call for all the envs of a
+    HanabiVecEnv. One sample at a time, NumPy's per-call overhead makes it
+    slower than HeuristicPolicy.
+    """
+
+    # Every card's information in least_info_discards' codes.
+    NO_INFO, COLOR_INFO, NUMBER_INFO, FULL_INFO, ABSENT = range(5)
+
+    def __init__(self, env):
+        super(FastHeuristicPolicy, self).__init__(env)
+        self.arrays = NestedSampleArrays(self.spaces)
+        c = self.config
+        self.num_colors = len(c.colors)
+        self.num_numbers = len(c.card_counts)
+        self.card_counts = np.array(c.card_counts)
+        self.code_powers = 5 ** np.arange(c.hand_size)
+        self.least_info_discards = self.build_least_info_discards()
+        self.inform_color_actions = move_actions(
+            self.spaces, [hanabi.InformColorMove(color, 0)
+                              for color in c.colors])
+        self.inform_number_actions = move_actions(
+            self.spaces, [hanabi.InformNumberMove(number, 0)
+                              for number in range(1, self.num_numbers + 1)])
+        self.discard_actions = move_actions(
+            self.spaces, [hanabi.DiscardMove(i) for i in range(c.hand_size)])
+        self.play_actions = move_actions(
+            self.spaces, [hanabi.PlayMove(i) for i in range(c.hand_size)])
+
+    def build_least_info_discards(self):
+        """
+        Returns the card that compute_play_or_discard discards when no card
+        can definitely be discarded, for every hand of information, indexed
+        by the sum of every card's code (NO_INFO, ..., ABSENT) times 5 to the
+        power of the card's index. Like compute_information, absent cards are
+        left out.
+        """
+        hand_size = self.config.hand_size
+        discards = np.zeros(5 ** hand_size, dtype=np.int64)
+        for code in range(len(discards)):
+            infos = [code // 5 ** i % 5 for i in range(hand_size)]
+            present = [i for i, info in enumerate(infos)
+                           if info != self.ABSENT]
+            if not present:
+                continue
+            discard_card = present[0]
+            for card in present:
+                # Bit 0 is color information, bit 1 number information.
+                if infos[card] & ~infos[discard_card] == 0:
+                    discard_card = card
+            discards[code] = discard_card
+        return discards
+
+    def play_order(self, heights, colors, numbers):
+        """
+        Returns the masks of the cards that compute_play_or_discard puts in
+        front of and behind the cards it thinks are playable (both (N, hand
+        size)), and the card that it discards (N,).
+        """
+        rows = np.arange(len(colors))[:, np.newaxis]
+        known_color = colors < self.num_colors
+        known_number = numbers < self.num_numbers
+        pile = heights[rows, colors]
+        piles = heights[:, np.newaxis, :self.num_colors]
+        number_only = known_number & ~known_color
+        color_only = known_color & ~known_number
+        both = known_color & known_number
+
+        front = both & (numbers == pile)
+        behind = number_only & (piles == numbers[:, :, np.newaxis]).any(axis=2)
+        discards = ((color_only & (pile == self.num_numbers)) |
+                    (number_only &
+                     (piles > numbers[:, :, np.newaxis]).all(axis=2)) |
+                    (both & (numbers < pile)))
+
+        codes = np.where(colors > self.num_colors, self.ABSENT,
+                         known_color + 2 * known_number)
+        discard = last_index(discards)
+        discard = np.where(discard >= 0, discard, self.least_info_discards[
+            codes.dot(self.code_powers)])
+        return front, behind, discard
+
+    def first_in_play_order(self, front, behind):
+        """
+        Returns the first of the cards in `front` and `behind` (see
+        play_order) in compute_play_or_discard's order, or -1.
+        """
+        first = last_index(front)
+        return np.where(first >= 0, first, first_index(behind))
+
+    def get_actions(self, observation_samples):
+        a = self.arrays.read(observation_samples)
+        n = len(observation_samples)
+        rows = np.arange(n)
+        hand_rows = rows[:, np.newaxis]
+        num_colors = self.num_colors
+        num_numbers = self.num_numbers
+
+        front, behind, discard = self.play_order(
+            a.heights, a.your_colors, a.your_numbers)
+        play = self.first_in_play_order(front, behind)
+        default_actions = np.where(play >= 0, self.play_actions[play],
+                                   self.discard_actions[discard])
+
+        # The hypothetical plays of get_move unpack your info as (number,
+        # color), so they only ever bump piles that aren't colors and leave
+        # the heights that compute_information sees as they are.
+        their_colors = a.their_colors
+        their_numbers = a.their_numbers
+        present = their_colors < num_colors
+        playable = their_numbers == a.heights[hand_rows, their_colors]
+        their_front, their_behind, their_discard = self.play_order(
+            a.heights, a.their_info_colors, a.their_info_numbers)
+
+        # The information moves of compute_information's rules (4), (3), (2)
+        # and then (1), so that earlier rules win.
+        actions = default_actions
+        informed = np.zeros(n, dtype=bool)
+        no_info = ((a.their_info_colors == num_colors) &
+                   (a.their_info_numbers == num_numbers))
+        card = first_index(no_info & playable)
+        duplicates = ((their_numbers[:, :, np.newaxis] ==
+                       their_numbers[:, np.newaxis, :]) &
+                      (their_colors[:, :, np.newaxis] !=
+                       their_colors[:, np.newaxis, :]) &
+                      ((a.their_info_colors == num_colors) &
+                       present)[:, np.newaxis, :]).any(axis=2)
+        informs = np.where(
+            duplicates[rows, card],
+            self.inform_color_actions[their_colors[rows, card] % num_colors],
+            self.inform_number_actions[their_numbers[rows, card] %
+                                       num_numbers])
+        actions = np.where(card >= 0, informs, actions)
+        informed |= card >= 0
+
+        color_only = ((a.their_info_colors < num_colors) &
+                      (a.their_info_numbers == num_numbers))
+        card = first_index(color_only & playable)
+        actions = np.where(card >= 0, self.inform_number_actions[
+            their_numbers[rows, card] % num_numbers], actions)
+        informed |= card >= 0
+
+        color = their_colors[rows, their_discard] % num_colors
+        number = their_numbers[rows, their_discard] % num_numbers
+        last_copy = (a.discarded[rows, color * num_numbers + number] + 1 ==
+                     self.card_counts[number])
+        card = ((their_colors[rows, their_discard] < num_colors) &
+                (number >= a.heights[rows, color]) & last_copy)
+        actions = np.where(card, self.inform_number_actions[number], actions)
+        informed |= card
+
+        misplays = ~playable & present
+        card = self.first_in_play_order(their_front & misplays,
+                                        their_behind & misplays)
+        actions = np.where(card >= 0, self.inform_color_actions[
+            their_colors[rows, card] % num_colors], actions)
+        informed |= card >= 0
+
+        actions = np.where(informed & (a.num_tokens > 0), actions,
+                           default_actions)
+        return actions, {}
+
+    def get_move(self, observation_sample):
+        return self.spaces.sample_to_action(
+            self.get_action(observation_sample)[0], None)
+
+    def get_action(self, observation):
+        actions, _ = self.get_actions([observation])
+        return (actions[0], )
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_reward
+from gym_hanabi.envs import hanabi_self_env
+from gym_hanabi.envs import hanabi_spaces
+from gym_hanabi.policies import heuristic_policy
+from gym_hanabi.policies import heuristic_simple_policy
+
+class TestFastHeuristicPolicies(unittest.TestCase):
+    def test_same_moves(self):
+        random = np.random.RandomState(0)
+        for config in [hanabi_config.HANABI_CONFIG,
+                       hanabi_config.MINI_HANABI_CONFIG]:
+            env = hanabi_self_env.HanabiSelfEnv(
+                config, hanabi_reward.ConstantReward(),
+                hanabi_spaces.NestedSpaces(config))
+            env._seed(0)
+            pairs = [
+                (heuristic_policy.HeuristicPolicy(env),
+                 heuristic_policy.FastHeuristicPolicy(env)),
+                (heuristic_simple_policy.HeuristicSimplePolicy(env),
+                 heuristic_simple_policy.FastHeuristicSimplePolicy(env)),
+            ]
+            samples = []
+            for _ in range(30):
+                sample = env._reset()
+                done = False
+                while not done:
+                    samples.append(sample)
+                    for policy, fast_policy in pairs:
+                        self.assertEqual(fast_policy.get_move(sample),
+                                         policy.get_move(sample))
+
+                    # Mostly follow the heuristic so that games get long.
+                    if random.rand() < 0.7:
+                        action = pairs[0][0].get_action(sample)[0]
+                    else:
+                        action = random.choice(np.flatnonzero(
+                            env.legal_action_mask()))
+                    sample, _, done, _ = env._step(action)
+
+            # Batches pick the same actions as single samples.
+            for policy, fast_policy in pairs:
+                actions, _ = fast_policy.get_actions(samples)
+                self.assertEqual(list(actions),
+                                 [policy.get_action(s)[0] for s in samples])
+
+    def test_unsupported_spaces(self):
+        config = hanabi_config.MINI_HANABI_CONFIG
+        env = hanabi_self_env.HanabiSelfEnv(
+            config, hanabi_reward.ConstantReward(),
+            hanabi_spaces.FlattenedSpaces(config))
+        for policy in [heuristic_policy.FastHeuristicPolicy,
+                       heuristic_simple_policy.FastHeuristicSimplePolicy]:
+            with self.assertRaises(ValueError):
+                policy(env)
+
+if __name__ == "__main__":
+    unittest.main()
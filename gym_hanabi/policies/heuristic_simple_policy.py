@@ -1,4 +1,9 @@
+import numpy as np
+
 from gym_hanabi.envs import hanabi
+from gym_hanabi.policies.common import NestedSampleArrays
+from gym_hanabi.policies.common import first_index
+from gym_hanabi.policies.common import move_actions
 
 class HeuristicSimplePolicy(object):
     """
@@ -56,3 +61,55 @@ class HeuristicSimplePolicy(object):
 
     def get_action(self, observation):
         return (self.spaces.action_to_sample(self.get_move(observation)), )
+
+class FastHeuristicSimplePolicy(HeuristicSimplePolicy):
+    """
+    Picks exactly the same moves as HeuristicSimplePolicy, but evaluates its
+    rules with NumPy on the arrays of whole batches of NestedSpaces samples
+    (see `common.NestedSampleArrays`) instead of decoding every sample.
+    Raises a ValueError for other spaces. Like FastHeuristicPolicy, it's
+    only faster on batches of samples (see `get_actions`).
+    """
+
+    def __init__(self, env):
+        super(FastHeuristicSimplePolicy, self).__init__(env)
+        self.arrays = NestedSampleArrays(self.spaces)
+        c = self.config
+        self.num_numbers = len(c.card_counts)
+        self.inform_number_actions = move_actions(
+            self.spaces, [hanabi.InformNumberMove(number, 0)
+                              for number in range(1, self.num_numbers + 1)])
+        self.discard_actions = move_actions(
+            self.spaces, [hanabi.DiscardMove(i) for i in range(c.hand_size)])
+        self.play_actions = move_actions(
+            self.spaces, [hanabi.PlayMove(i) for i in range(c.hand_size)])
+
+    def get_actions(self, observation_samples):
+        a = self.arrays.read(observation_samples)
+        rows = np.arange(len(observation_samples))
+        numbers = np.arange(self.num_numbers)
+        # (N, number) masks of the numbers that we'd inform them about and
+        # that we have number information about, in CARDCOUNT order.
+        inform = ((a.their_numbers[:, :, np.newaxis] == numbers) &
+                  (a.their_info_numbers == self.num_numbers)[:, :, np.newaxis])
+        inform = inform.any(axis=1) & (a.num_tokens > 0)[:, np.newaxis]
+        yours = a.your_numbers[:, :, np.newaxis] == numbers
+        number = first_index(inform | yours.any(axis=1))
+
+        card = yours[rows, :, number].argmax(axis=1)
+        # Only the ones are discarded, once every color has a one played.
+        discard = (number == 0) & (a.heights[:, :-2] >= 1).all(axis=1)
+        actions = np.where(discard, self.discard_actions[card],
+                           self.play_actions[card])
+        actions = np.where(inform[rows, number],
+                           self.inform_number_actions[number], actions)
+        actions = np.where(number >= 0, actions, self.play_actions[0])
+        return actions, {}
+
+    def get_move(self, observation_sample):
+        return self.spaces.sample_to_action(
+            self.get_action(observation_sample)[0], None)
+
+    def get_action(self, observation):
+        actions, _ = self.get_actions([observation])
+        return (actions[0], )
@@ -18,6 +18,8 @@ def nats():
 
 def main(args):
     env = gym.make(args.env_id)
+    if args.profile:
+        env.unwrapped.set_profiling()
 
     with open(args.pickled_policy, "rb") as f:
         policy = pickle.load(f)
@@ -47,6 +49,8 @@ def main(args):
     print("average length = {}".format(average(lengths)))
     print("average reward = {}".format(average(rewards)))
     print("average score  = {}".format(average(scores)))
+    if args.profile:
+        print(env.unwrapped.perf.summary())
     if args.output != "":
         header = ["length","reward","score"]
         assert len(lengths) == len(rewards) == len(scores)
@@ -62,6 +66,8 @@ def get_parser():
         type=int, default=1, help="Number of Hanabi games to play.")
     parser.add_argument("-o", "--output",
         default="", help="File to write output.")
+    parser.add_argument("-p", "--profile",
+        action="store_true", help="Print the time spent in each step phase.")
 
     parser.add_argument("env_id",
         choices=gym_hanabi.SELF_ENV_IDS, help="Environment id")
@@ -0,0 +1,605 @@
+import argparse
+import copy
+import multiprocessing
+import time
+
+import numpy as np
+
+import gym_hanabi
+from gym_hanabi.envs import hanabi
+from gym_hanabi.envs import hanabi_batch
+from gym_hanabi.envs import hanabi_compact
+from gym_hanabi.envs import hanabi_config
+from gym_hanabi.envs import hanabi_packing
+from gym_hanabi.envs import hanabi_render
+from gym_hanabi.envs import hanabi_reward
+from gym_hanabi.envs import hanabi_self_env
+from gym_hanabi.envs import hanabi_spaces
+from gym_hanabi.envs import hanabi_subproc_vec_env
+from gym_hanabi.envs import hanabi_vec_env
+from gym_hanabi.policies import heuristic_policy
+from gym_hanabi.policies import heuristic_simple_policy
+
+CONFIGS = {
+    "hanabi": hanabi_config.HANABI_CONFIG,
+    "medium": hanabi_config.MEDIUM_HANABI_CONFIG,
+    "mini": hanabi_config.MINI_HANABI_CONFIG,
+    "mini3p": hanabi_config.MINI_HANABI_3P_CONFIG,
+}
+
+def report(name, count, seconds, unit="steps"):
+    print("{:<28} {:>12.0f} {}/s".format(name, count / seconds, unit))
+
+def benchmark_batch(args):
+    """
+    Compares the number of moves per second that `hanabi.GameState` and
+    `hanabi_batch.BatchGameState` can simulate. Both play random move ids and
+    start a new game whenever a game ends or a move is illegal.
+    """
+    config = CONFIGS[args.config]
+    moves = hanabi_spaces.NestedSpaces(config).moves()
+    random = np.random.RandomState(args.seed)
+    move_ids = random.randint(len(moves), size=(args.num_steps, args.num_games))
+
+    steps = 0
+    start = time.time()
+    game_state = hanabi.GameState(config, random)
+    for move_id in move_ids[:, 0]:
+        try:
+            game_state.play_move(moves[move_id])
+            done = game_state.num_turns_left == 0
+        except ValueError:
+            done = True
+        if done:
+            game_state = hanabi.GameState(config, random)
+        steps += 1
+    report("GameState", steps, time.time() - start)
+
+    steps = 0
+    start = time.time()
+    batch = hanabi_batch.BatchGameState(config, args.num_games, random=random)
+    for step_move_ids in move_ids:
+        _, dones, illegal = batch.play_moves(step_move_ids)
+        over = np.flatnonzero(dones | illegal)
+        if len(over):
+            decks = hanabi_batch.shuffled_decks(config, random, len(over))
+            batch.reset(decks, over)
+        steps += args.num_games
+    report("BatchGameState", steps, time.time() - start)
+
+def benchmark_compact(args):
+    """
+    Compares the number of moves per second that `hanabi.GameState` and
+    `hanabi_compact.CompactGameState` can simulate.
+    """
+    config = CONFIGS[args.config]
+    moves = hanabi_spaces.NestedSpaces(config).moves()
+    random = np.random.RandomState(args.seed)
+    move_ids = random.randint(len(moves), size=args.num_steps)
+
+    for name, new_game, play in [
+            ("GameState",
+             lambda: hanabi.GameState(config, random),
+             lambda game_state, move_id: game_state.play_move(moves[move_id])),
+            ("CompactGameState",
+             lambda: hanabi_compact.CompactGameState(config, random),
+             lambda game_state, move_id: game_state.play_move_id(move_id))]:
+        start = time.time()
+        game_state = new_game()
+        for move_id in move_ids:
+            try:
+                play(game_state, move_id)
+                done = game_state.num_turns_left == 0
+            except ValueError:
+                done = True
+            if done:
+                game_state = new_game()
+        report(name, len(move_ids), time.time() - start)
+
+def benchmark_snapshot(args):
+    """
+    Compares the cost of forking a `hanabi.GameState` with `copy.deepcopy`,
+    `clone`, and `snapshot`/`restore`.
+    """
+    config = CONFIGS[args.config]
+    game_state = hanabi.GameState(config, np.random.RandomState(args.seed))
+    for move in [hanabi.DiscardMove(0), hanabi.PlayMove(0)] * 3:
+        game_state.play_move(move)
+    snapshot = game_state.snapshot()
+
+    for name, fork in [("copy.deepcopy", lambda: copy.deepcopy(game_state)),
+                       ("GameState.clone", game_state.clone),
+                       ("GameState.snapshot", game_state.snapshot),
+                       ("GameState.restore",
+                        lambda: game_state.restore(snapshot))]:
+        start = time.time()
+        for _ in range(args.num_forks):
+            fork()
+        seconds = time.time() - start
+        report(name, args.num_forks, seconds, unit="forks")
+
+def benchmark_reset(args):
+    """
+    Measures the number of new `hanabi.GameState`s per second against games
+    reset in place, and the number of `HanabiSelfEnv` resets per second with
+    and without a deck bank and with and without reused game states.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    start = time.time()
+    for _ in range(args.num_resets):
+        hanabi.GameState(config, random)
+    report("new GameState", args.num_resets, time.time() - start,
+           unit="resets")
+    game_state = hanabi.GameState(config, random)
+    start = time.time()
+    for _ in range(args.num_resets):
+        game_state.reset()
+    report("GameState.reset", args.num_resets, time.time() - start,
+           unit="resets")
+
+    spaces = hanabi_spaces.NestedSpaces(config)
+    for name, kwargs in [
+            ("shuffled decks", {"use_deck_bank": False}),
+            ("shuffled decks, reused", {"use_deck_bank": False,
+                                        "reuse_game_states": True}),
+            ("deck bank", {"use_deck_bank": True}),
+            ("deck bank, reused", {"use_deck_bank": True,
+                                   "reuse_game_states": True})]:
+        env = hanabi_self_env.HanabiSelfEnv(
+            config, hanabi_reward.ConstantReward(), spaces, **kwargs)
+        env._seed(args.seed)
+        start = time.time()
+        for _ in range(args.num_resets):
+            env._reset()
+        report(name, args.num_resets, time.time() - start, unit="resets")
+
+def benchmark_spaces(args):
+    """
+    Compares decoding and encoding every action by rebuilding the move list
+    (as the spaces used to) against the lookup tables of `Spaces.tables`.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    game_state = hanabi.GameState(config, random)
+    cards = game_state.get_current_cards()
+    for spaces in [hanabi_spaces.NestedSpaces(config),
+                   hanabi_spaces.FlattenedSpaces(config)]:
+        name = type(spaces).__name__
+        actions = random.randint(spaces.action_space().n, size=args.num_calls)
+        moves = [spaces.sample_to_action(a, cards) for a in actions]
+
+        start = time.time()
+        for action in actions:
+            spaces.moves()[action]
+        report(name + " moves()", len(actions), time.time() - start,
+               unit="decodes")
+
+        start = time.time()
+        for action in actions:
+            spaces.sample_to_action(action, cards)
+        report(name + " decode", len(actions), time.time() - start,
+               unit="decodes")
+
+        start = time.time()
+        for move in moves:
+            spaces.action_to_sample(move)
+        report(name + " encode", len(moves), time.time() - start,
+               unit="encodes")
+
+def benchmark_encode(args):
+    """
+    Compares encoding observation samples and decoding actions one at a time
+    against `Spaces.encode_batch` and `Spaces.decode_actions_batch`.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    for spaces in [hanabi_spaces.NestedSpaces(config),
+                   hanabi_spaces.FlattenedSpaces(config)]:
+        name = type(spaces).__name__
+        env = hanabi_self_env.HanabiSelfEnv(
+            config, hanabi_reward.ConstantReward(), spaces,
+            use_deck_bank=True)
+        env._seed(args.seed)
+        samples = []
+        hands = []
+        env._reset()
+        while len(samples) < args.num_observations:
+            samples.append(env.observation_sample())
+            cards = env.game_state.get_current_cards()
+            hands.append([hanabi.card_to_int(config, c) for c in cards])
+            action = random.choice(np.flatnonzero(env.legal_action_mask()))
+            _, _, done, _ = env._step(action)
+            if done:
+                env._reset()
+        hands = np.array(hands)
+        actions = random.randint(spaces.action_space().n, size=len(hands))
+
+        start = time.time()
+        for sample in samples:
+            spaces.encode(sample)
+        report(name + " encode", len(samples), time.time() - start,
+               unit="observations")
+
+        start = time.time()
+        spaces.encode_batch(samples)
+        report(name + " encode_batch", len(samples), time.time() - start,
+               unit="observations")
+
+        start = time.time()
+        for action, hand in zip(actions, hands):
+            cards = [hanabi.int_to_card(config, c) for c in hand]
+            hanabi.move_to_id(config, spaces.sample_to_action(action, cards))
+        report(name + " decode", len(actions), time.time() - start,
+               unit="actions")
+
+        start = time.time()
+        spaces.decode_actions_batch(actions, hands)
+        report(name + " decode_actions_batch", len(actions),
+               time.time() - start, unit="actions")
+
+def benchmark_pack(args):
+    """
+    Measures the size of packed observations (see
+    `hanabi_packing.ObservationPacker`) against float32 vector encodings,
+    and how many observations per second can be packed and unpacked.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    for spaces in [hanabi_spaces.NestedSpaces(config),
+                   hanabi_spaces.FlattenedSpaces(config)]:
+        name = type(spaces).__name__
+        env = hanabi_self_env.HanabiSelfEnv(
+            config, hanabi_reward.ConstantReward(), spaces,
+            use_deck_bank=True)
+        env._seed(args.seed)
+        samples = [env._reset()]
+        while len(samples) < args.num_observations:
+            action = random.choice(np.flatnonzero(env.legal_action_mask()))
+            observation, _, done, _ = env._step(action)
+            samples.append(env._reset() if done else observation)
+
+        packer = hanabi_packing.ObservationPacker(spaces)
+        print("{}: {} bytes packed, {} bytes as float32 vectors".format(
+            name, packer.num_bytes, 4 * spaces.encoding_size()))
+
+        leaves = np.array([spaces.sample_to_leaves(s) for s in samples])
+        start = time.time()
+        packed = packer.pack_leaves(leaves)
+        report(name + " pack", len(samples), time.time() - start,
+               unit="observations")
+
+        start = time.time()
+        packer.unpack_leaves(packed)
+        report(name + " unpack", len(samples), time.time() - start,
+               unit="observations")
+
+def benchmark_compile(args):
+    """
+    Compares the generic encoding and decoding methods of the spaces against
+    the functions that `Spaces.compile` generates for the config.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    observations = []
+    while len(observations) < args.num_observations:
+        game_state = hanabi.GameState(config, random)
+        while game_state.num_turns_left != 0:
+            observations.append(game_state.to_observation())
+            moves = game_state.legal_moves()
+            game_state.play_move(moves[random.randint(len(moves))])
+
+    for spaces in [hanabi_spaces.NestedSpaces(config),
+                   hanabi_spaces.FlattenedSpaces(config)]:
+        start = time.time()
+        compiled = spaces.compile()
+        print("{} compile: {:.3f} s".format(type(spaces).__name__,
+                                            time.time() - start))
+        samples = [spaces.observation_to_sample(o) for o in observations]
+        out = np.empty(spaces.encoding_size(), dtype=np.float32)
+        for name, inputs, generic, specialized in [
+                ("observation_to_sample", observations,
+                 spaces.observation_to_sample, compiled.observation_to_sample),
+                ("sample_to_observation", samples,
+                 spaces.sample_to_observation, compiled.sample_to_observation),
+                ("sample_to_leaves", samples,
+                 spaces.sample_to_leaves, compiled.sample_to_leaves),
+                ("encode_into", samples,
+                 lambda s: spaces.encode_into(s, out),
+                 lambda s: compiled.encode_into(s, out))]:
+            print("{} {}".format(type(spaces).__name__, name))
+            for kind, function in [("generic", generic),
+                                   ("compiled", specialized)]:
+                start = time.time()
+                for x in inputs:
+                    function(x)
+                report("  " + kind, len(inputs), time.time() - start,
+                       unit="calls")
+
+def benchmark_vec(args):
+    """
+    Compares the number of steps per second of one HanabiSelfEnv in vector
+    observation mode against HanabiVecEnvs that step their games one env at
+    a time and all at once with a BatchGameState. Every env plays random
+    legal actions.
+    """
+    env_id = args.env_id
+    random = np.random.RandomState(args.seed)
+    kwargs = hanabi_vec_env.spec_kwargs(env_id)
+    env = hanabi_self_env.HanabiSelfEnv(observation_mode="vector",
+                                         use_deck_bank=True, **kwargs)
+    env._seed(args.seed)
+    env._reset()
+    start = time.time()
+    for _ in range(args.num_steps):
+        action = random.choice(np.flatnonzero(env.legal_action_mask()))
+        _, _, done, _ = env._step(action)
+        if done:
+            env._reset()
+    report("HanabiSelfEnv", args.num_steps, time.time() - start)
+
+    for use_batch in [False, True]:
+        vec_env = hanabi_vec_env.HanabiVecEnv(env_id, args.num_envs,
+                                              use_batch=use_batch)
+        vec_env.seed(args.seed)
+        vec_env.reset()
+        steps = 0
+        start = time.time()
+        while steps < args.num_steps:
+            masks = vec_env.legal_action_masks()
+            # A random legal action per game.
+            actions = (random.rand(*masks.shape) * masks).argmax(axis=1)
+            vec_env.step(actions)
+            steps += args.num_envs
+        name = "HanabiVecEnv ({})".format("batch" if use_batch else "envs")
+        report(name, steps, time.time() - start)
+
+def benchmark_subproc(args):
+    """
+    Measures how the steps per second of a HanabiSubprocVecEnv scale with
+    its number of workers, up to the number of cores, with a fixed number of
+    games per worker. The in-process HanabiVecEnv is the baseline.
+    """
+    env_id = args.env_id
+    random = np.random.RandomState(args.seed)
+
+    def run(vec_env):
+        vec_env.seed(args.seed)
+        vec_env.reset()
+        steps = 0
+        start = time.time()
+        while steps < args.num_steps:
+            masks = vec_env.legal_action_masks()
+            actions = (random.rand(*masks.shape) * masks).argmax(axis=1)
+            vec_env.step(actions)
+            steps += vec_env.num_envs
+        vec_env.close()
+        return steps / (time.time() - start)
+
+    baseline = run(hanabi_vec_env.HanabiVecEnv(env_id, args.num_envs))
+    print("{:<28} {:>12.0f} steps/s".format("HanabiVecEnv", baseline))
+    num_workers = 1
+    while True:
+        num_workers = min(num_workers, multiprocessing.cpu_count())
+        rate = run(hanabi_subproc_vec_env.HanabiSubprocVecEnv(
+            env_id, args.num_envs * num_workers, num_workers=num_workers))
+        print("{:<28} {:>12.0f} steps/s {:>6.2f}x".format(
+            "{} workers".format(num_workers), rate, rate / baseline))
+        if num_workers == multiprocessing.cpu_count():
+            break
+        num_workers *= 2
+
+class MlpPolicy(object):
+    """
+    A stand-in for a neural AI partner: a random two layer perceptron over
+    the vector encodings of observation samples. Like an rllab policy, it
+    has `get_action` and a batched `get_actions`.
+    """
+
+    def __init__(self, spaces, random, hidden_size=64):
+        self.spaces = spaces
+        self.w1 = random.randn(spaces.encoding_size(), hidden_size)
+        self.w2 = random.randn(hidden_size, spaces.action_space().n)
+
+    def get_actions(self, observations):
+        x = self.spaces.encode_batch(observations, np.float64)
+        return (np.maximum(x.dot(self.w1), 0).dot(self.w2).argmax(axis=1),
+                {})
+
+    def get_action(self, observation):
+        actions, infos = self.get_actions([observation])
+        return actions[0], infos
+
+class UnbatchedPolicy(object):
+    def __init__(self, policy):
+        self.policy = policy
+
+    def get_action(self, observation):
+        return self.policy.get_action(observation)
+
+def benchmark_partner(args):
+    """
+    Compares the steps per second of a HanabiVecEnv of AI envs whose MLP AI
+    partner is called once per game against one batched call per step.
+    """
+    random = np.random.RandomState(args.seed)
+    vec_env = hanabi_vec_env.HanabiVecEnv(args.env_id, args.num_envs)
+    policy = MlpPolicy(vec_env.spaces, random)
+    for name, ai_policy in [("per game", UnbatchedPolicy(policy)),
+                            ("batched", policy)]:
+        vec_env.set_ai_policy(ai_policy)
+        vec_env.seed(args.seed)
+        vec_env.reset()
+        steps = 0
+        start = time.time()
+        while steps < args.num_steps:
+            masks = vec_env.legal_action_masks()
+            actions = (random.rand(*masks.shape) * masks).argmax(axis=1)
+            vec_env.step(actions)
+            steps += args.num_envs
+        report("AI partner " + name, steps, time.time() - start)
+
+def benchmark_heuristic(args):
+    """
+    Compares the number of moves per second that the heuristic policies and
+    their decode-free versions pick on the same observations, one at a time
+    and (for the decode-free versions) in batches of `num_envs` like the AI
+    partners of a HanabiVecEnv.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    env = hanabi_self_env.HanabiSelfEnv(
+        config, hanabi_reward.ConstantReward(),
+        hanabi_spaces.NestedSpaces(config), use_deck_bank=True)
+    env._seed(args.seed)
+    samples = [env._reset()]
+    while len(samples) < args.num_observations:
+        action = random.choice(np.flatnonzero(env.legal_action_mask()))
+        observation, _, done, _ = env._step(action)
+        samples.append(env._reset() if done else observation)
+
+    for policy in [heuristic_policy.HeuristicPolicy(env),
+                   heuristic_policy.FastHeuristicPolicy(env),
+                   heuristic_simple_policy.HeuristicSimplePolicy(env),
+                   heuristic_simple_policy.FastHeuristicSimplePolicy(env)]:
+        start = time.time()
+        for sample in samples:
+            policy.get_action(sample)
+        report(type(policy).__name__, len(samples), time.time() - start,
+               unit="moves")
+        if hasattr(policy, "get_actions"):
+            start = time.time()
+            for i in range(0, len(samples), args.num_envs):
+                policy.get_actions(samples[i:i + args.num_envs])
+            report("  batched", len(samples), time.time() - start,
+                   unit="moves")
+
+def benchmark_render(args):
+    """
+    Compares the number of frames per second that `GameState.render` and a
+    `hanabi_render.Renderer` render, and the bytes per frame of full frames
+    and of diffs, on the frames of random games.
+    """
+    config = CONFIGS[args.config]
+    random = np.random.RandomState(args.seed)
+    env = hanabi_self_env.HanabiSelfEnv(
+        config, hanabi_reward.ConstantReward(),
+        hanabi_spaces.NestedSpaces(config), use_deck_bank=True)
+    env._seed(args.seed)
+    env._reset()
+    game_states = [copy.deepcopy(env.game_state)]
+    while len(game_states) < args.num_frames:
+        action = random.choice(np.flatnonzero(env.legal_action_mask()))
+        _, _, done, _ = env._step(action)
+        if done:
+            env._reset()
+        game_states.append(copy.deepcopy(env.game_state))
+
+    start = time.time()
+    frames = [game_state.render() for game_state in game_states]
+    report("GameState.render", len(frames), time.time() - start,
+           unit="frames")
+    renderer = hanabi_render.Renderer(config)
+    start = time.time()
+    for game_state in game_states:
+        renderer.render(game_state)
+    report("Renderer.render", len(frames), time.time() - start,
+           unit="frames")
+    renderer = hanabi_render.Renderer(config)
+    start = time.time()
+    diffs = [renderer.diff(game_state) for game_state in game_states]
+    report("Renderer.diff", len(frames), time.time() - start, unit="frames")
+    print("{:<28} {:>12.1f} bytes/frame".format(
+        "full frames", float(sum(map(len, frames))) / len(frames)))
+    print("{:<28} {:>12.1f} bytes/frame".format(
+        "diffs", float(sum(map(len, diffs))) / len(diffs)))
+
+def get_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--config",
+        choices=sorted(CONFIGS), default="mini", help="Hanabi config")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed")
+    subparsers = parser.add_subparsers(dest="benchmark")
+    subparsers.required = True
+
+    batch = subparsers.add_parser("batch",
+        help="GameState vs BatchGameState moves per second")
+    batch.add_argument("-n", "--num_games", type=int, default=1024)
+    batch.add_argument("-t", "--num_steps", type=int, default=1000)
+    batch.set_defaults(func=benchmark_batch)
+
+    compact = subparsers.add_parser("compact",
+        help="GameState vs CompactGameState moves per second")
+    compact.add_argument("-t", "--num_steps", type=int, default=100000)
+    compact.set_defaults(func=benchmark_compact)
+
+    snapshot = subparsers.add_parser("snapshot",
+        help="deepcopy vs clone vs snapshot/restore forks per second")
+    snapshot.add_argument("-n", "--num_forks", type=int, default=20000)
+    snapshot.set_defaults(func=benchmark_snapshot)
+
+    reset = subparsers.add_parser("reset", help="env resets per second")
+    reset.add_argument("-n", "--num_resets", type=int, default=20000)
+    reset.set_defaults(func=benchmark_reset)
+
+    spaces = subparsers.add_parser("spaces",
+        help="Spaces action decodes and encodes per second")
+    spaces.add_argument("-n", "--num_calls", type=int, default=100000)
+    spaces.set_defaults(func=benchmark_spaces)
+
+    encode = subparsers.add_parser("encode",
+        help="one at a time vs batched observation encodes and action decodes")
+    encode.add_argument("-n", "--num_observations", type=int, default=10000)
+    encode.set_defaults(func=benchmark_encode)
+
+    pack = subparsers.add_parser("pack",
+        help="packed observation size and packs/unpacks per second")
+    pack.add_argument("-n", "--num_observations", type=int, default=100000)
+    pack.set_defaults(func=benchmark_pack)
+
+    compile_ = subparsers.add_parser("compile",
+        help="generic vs compiled encodes and decodes per second")
+    compile_.add_argument("-n", "--num_observations", type=int, default=20000)
+    compile_.set_defaults(func=benchmark_compile)
+
+    vec = subparsers.add_parser("vec",
+        help="single env vs vector env steps per second")
+    vec.add_argument("-e", "--env_id", default="MiniHanabiSelf-v0",
+                     choices=gym_hanabi.SELF_ENV_IDS)
+    vec.add_argument("-n", "--num_envs", type=int, default=256)
+    vec.add_argument("-t", "--num_steps", type=int, default=50000)
+    vec.set_defaults(func=benchmark_vec)
+
+    subproc = subparsers.add_parser("subproc",
+        help="subprocess vector env steps per second by number of workers")
+    subproc.add_argument("-e", "--env_id", default="MiniHanabiSelf-v0",
+                         choices=gym_hanabi.SELF_ENV_IDS)
+    subproc.add_argument("-n", "--num_envs", type=int, default=256,
+                         help="games per worker")
+    subproc.add_argument("-t", "--num_steps", type=int, default=200000)
+    subproc.set_defaults(func=benchmark_subproc)
+
+    partner = subparsers.add_parser("partner",
+        help="per game vs batched AI partner steps per second")
+    partner.add_argument("-e", "--env_id", default="MiniHanabiAi-v0",
+                         choices=gym_hanabi.AI_ENV_IDS)
+    partner.add_argument("-n", "--num_envs", type=int, default=64)
+    partner.add_argument("-t", "--num_steps", type=int, default=20000)
+    partner.set_defaults(func=benchmark_partner)
+
+    heuristic = subparsers.add_parser("heuristic",
+        help="heuristic policy moves per second")
+    heuristic.add_argument("-n", "--num_observations", type=int, default=20000)
+    heuristic.add_argument("-e", "--num_envs", type=int, default=64)
+    heuristic.set_defaults(func=benchmark_heuristic)
+
+    render = subparsers.add_parser("render",
+        help="GameState.render vs cached Renderer frames per second")
+    render.add_argument("-n", "--num_frames", type=int, default=20000)
+    render.set_defaults(func=benchmark_render)
+
+    return parser
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    args.func(args)